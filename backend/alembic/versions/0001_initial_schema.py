@@ -0,0 +1,267 @@
+"""initial schema
+
+Tables as created by Base.metadata.create_all before migrations were added.
+Databases created that way are marked with ``alembic stamp 0001``.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 06:26:29.283840
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('users',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=False),
+    sa.Column('role', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_table('chat_messages',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('role', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('message_metadata', sa.JSON(), nullable=True),
+    sa.Column('session_id', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('doctors',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('specialization', sa.String(), nullable=True),
+    sa.Column('license_number', sa.String(), nullable=True),
+    sa.Column('years_of_experience', sa.Integer(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('bio', sa.Text(), nullable=True),
+    sa.Column('hospital_affiliation', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('license_number'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('family_members',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('primary_user_id', sa.String(), nullable=True),
+    sa.Column('full_name', sa.String(), nullable=False),
+    sa.Column('relationship', sa.String(), nullable=False),
+    sa.Column('date_of_birth', sa.DateTime(), nullable=False),
+    sa.Column('gender', sa.String(), nullable=True),
+    sa.Column('blood_group', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('photo_url', sa.String(), nullable=True),
+    sa.Column('medical_history', sa.JSON(), nullable=True),
+    sa.Column('allergies', sa.JSON(), nullable=True),
+    sa.Column('chronic_conditions', sa.JSON(), nullable=True),
+    sa.Column('current_medications', sa.JSON(), nullable=True),
+    sa.Column('emergency_contact', sa.String(), nullable=True),
+    sa.Column('insurance_info', sa.JSON(), nullable=True),
+    sa.Column('genetic_risk_factors', sa.JSON(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['primary_user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('patients',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('date_of_birth', sa.DateTime(), nullable=True),
+    sa.Column('gender', sa.String(), nullable=True),
+    sa.Column('blood_group', sa.String(), nullable=True),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('emergency_contact', sa.String(), nullable=True),
+    sa.Column('medical_history', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('appointments',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('patient_id', sa.String(), nullable=True),
+    sa.Column('doctor_id', sa.String(), nullable=True),
+    sa.Column('appointment_date', sa.DateTime(), nullable=True),
+    sa.Column('appointment_type', sa.String(), nullable=True),
+    sa.Column('duration', sa.Integer(), nullable=True),
+    sa.Column('video_room_id', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('prescription', sa.JSON(), nullable=True),
+    sa.Column('payment_status', sa.String(), nullable=True),
+    sa.Column('payment_amount', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('doctor_availability',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('doctor_id', sa.String(), nullable=True),
+    sa.Column('day_of_week', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.String(), nullable=False),
+    sa.Column('end_time', sa.String(), nullable=False),
+    sa.Column('is_available', sa.Boolean(), nullable=True),
+    sa.Column('slot_duration', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('doctor_reviews',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('doctor_id', sa.String(), nullable=True),
+    sa.Column('patient_id', sa.String(), nullable=True),
+    sa.Column('rating', sa.Integer(), nullable=True),
+    sa.Column('review', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('family_health_timeline',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('family_member_id', sa.String(), nullable=True),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('event_title', sa.String(), nullable=False),
+    sa.Column('event_description', sa.Text(), nullable=True),
+    sa.Column('event_date', sa.DateTime(), nullable=False),
+    sa.Column('doctor_name', sa.String(), nullable=True),
+    sa.Column('hospital', sa.String(), nullable=True),
+    sa.Column('attachments', sa.JSON(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['family_member_id'], ['family_members.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('health_metrics',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('patient_id', sa.String(), nullable=True),
+    sa.Column('metric_type', sa.String(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('unit', sa.String(), nullable=False),
+    sa.Column('systolic', sa.Float(), nullable=True),
+    sa.Column('diastolic', sa.Float(), nullable=True),
+    sa.Column('device_id', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('is_alert', sa.Boolean(), nullable=True),
+    sa.Column('alert_message', sa.String(), nullable=True),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('medical_records',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('patient_id', sa.String(), nullable=True),
+    sa.Column('record_type', sa.String(), nullable=True),
+    sa.Column('file_path', sa.String(), nullable=True),
+    sa.Column('file_url', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('uploaded_by', sa.String(), nullable=True),
+    sa.Column('record_metadata', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('payments',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('appointment_id', sa.String(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('payment_method', sa.String(), nullable=True),
+    sa.Column('payment_provider', sa.String(), nullable=True),
+    sa.Column('transaction_id', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('payment_date', sa.DateTime(), nullable=True),
+    sa.Column('receipt_url', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('transaction_id')
+    )
+    op.create_table('predictions',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('patient_id', sa.String(), nullable=True),
+    sa.Column('prediction_type', sa.String(), nullable=True),
+    sa.Column('input_data', sa.JSON(), nullable=True),
+    sa.Column('result', sa.String(), nullable=True),
+    sa.Column('confidence_score', sa.Float(), nullable=True),
+    sa.Column('risk_level', sa.String(), nullable=True),
+    sa.Column('detailed_analysis', sa.JSON(), nullable=True),
+    sa.Column('medical_record_id', sa.String(), nullable=True),
+    sa.Column('reviewed_by', sa.String(), nullable=True),
+    sa.Column('doctor_notes', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['medical_record_id'], ['medical_records.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('prescriptions',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('appointment_id', sa.String(), nullable=True),
+    sa.Column('patient_id', sa.String(), nullable=True),
+    sa.Column('doctor_id', sa.String(), nullable=True),
+    sa.Column('medications', sa.JSON(), nullable=False),
+    sa.Column('diagnosis', sa.Text(), nullable=False),
+    sa.Column('instructions', sa.Text(), nullable=True),
+    sa.Column('valid_until', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('prescriptions')
+    op.drop_table('predictions')
+    op.drop_table('payments')
+    op.drop_table('medical_records')
+    op.drop_table('health_metrics')
+    op.drop_table('family_health_timeline')
+    op.drop_table('doctor_reviews')
+    op.drop_table('doctor_availability')
+    op.drop_table('appointments')
+    op.drop_table('patients')
+    op.drop_table('family_members')
+    op.drop_table('doctors')
+    op.drop_table('chat_messages')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
@@ -0,0 +1,49 @@
+"""hot path indexes
+
+Composite indexes for the per-user list endpoints. On PostgreSQL they are
+built CONCURRENTLY, outside the migration transaction, so metric ingestion
+keeps writing while they build. ``patients.user_id`` and
+``doctors.user_id`` are already covered by their unique constraints.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 06:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_health_metrics_patient_type_recorded", "health_metrics", ["patient_id", "metric_type", "recorded_at"]),
+    ("ix_chat_messages_user_session_created", "chat_messages", ["user_id", "session_id", "created_at"]),
+    ("ix_appointments_patient_status_date", "appointments", ["patient_id", "status", "appointment_date"]),
+    ("ix_appointments_doctor_status_date", "appointments", ["doctor_id", "status", "appointment_date"]),
+    ("ix_predictions_patient_created", "predictions", ["patient_id", "created_at"]),
+    ("ix_family_members_primary_user_active", "family_members", ["primary_user_id", "is_active"]),
+    ("ix_family_health_timeline_member_date", "family_health_timeline", ["family_member_id", "event_date"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,75 @@
+"""drift and rescore tables
+
+Tables added for input drift monitoring and offline re-scoring. They are
+not part of the 0001 baseline, which legacy ``create_all`` databases are
+stamped with, so they get their own revision. Creation is skipped where
+the tables already exist.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 08:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('feature_drift_windows',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('model_name', sa.String(), nullable=False),
+    sa.Column('feature', sa.String(), nullable=False),
+    sa.Column('is_reference', sa.Boolean(), nullable=False),
+    sa.Column('window_start', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('window_end', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('mean', sa.Float(), nullable=True),
+    sa.Column('variance', sa.Float(), nullable=True),
+    sa.Column('minimum', sa.Float(), nullable=True),
+    sa.Column('maximum', sa.Float(), nullable=True),
+    sa.Column('quantiles', sa.JSON(), nullable=True),
+    sa.Column('histogram', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_feature_drift_windows_model_name'), 'feature_drift_windows', ['model_name'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_feature_drift_windows_window_end'), 'feature_drift_windows', ['window_end'], unique=False, if_not_exists=True)
+    op.create_table('prediction_rescores',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('prediction_id', sa.String(), nullable=False),
+    sa.Column('prediction_type', sa.String(), nullable=True),
+    sa.Column('model_version', sa.String(), nullable=False),
+    sa.Column('run_id', sa.String(), nullable=True),
+    sa.Column('result', sa.String(), nullable=True),
+    sa.Column('confidence_score', sa.Float(), nullable=True),
+    sa.Column('risk_level', sa.String(), nullable=True),
+    sa.Column('detailed_analysis', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['prediction_id'], ['predictions.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('prediction_id', 'model_version', name='uq_prediction_rescores_version'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_prediction_rescores_prediction_id'), 'prediction_rescores', ['prediction_id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_prediction_rescores_run_id'), 'prediction_rescores', ['run_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_prediction_rescores_run_id'), table_name='prediction_rescores')
+    op.drop_index(op.f('ix_prediction_rescores_prediction_id'), table_name='prediction_rescores')
+    op.drop_table('prediction_rescores')
+    op.drop_index(op.f('ix_feature_drift_windows_window_end'), table_name='feature_drift_windows')
+    op.drop_index(op.f('ix_feature_drift_windows_model_name'), table_name='feature_drift_windows')
+    op.drop_table('feature_drift_windows')
@@ -4,7 +4,9 @@ Authentication routes
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from typing import Optional
@@ -49,7 +51,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get current authenticated user"""
     credentials_exception = HTTPException(
@@ -66,17 +68,24 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    # Profiles are loaded up front: AsyncSession cannot lazy-load them later
+    user = (await db.execute(
+        select(User)
+        .options(selectinload(User.patient_profile), selectinload(User.doctor_profile))
+        .where(User.id == token_data.user_id)
+    )).scalar_one_or_none()
     if user is None:
         raise credentials_exception
     return user
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user"""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = (await db.execute(
+        select(User).where(User.email == user_data.email)
+    )).scalar_one_or_none()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -93,8 +102,8 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     # Create role-specific profile
     if user_data.role.value == "patient":
@@ -104,7 +113,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         doctor_profile = Doctor(user_id=db_user.id)
         db.add(doctor_profile)
     
-    db.commit()
+    await db.commit()
     
     return db_user
 
@@ -112,11 +121,13 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login user and return JWT tokens"""
     # Find user
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = (await db.execute(
+        select(User).where(User.email == form_data.username)
+    )).scalar_one_or_none()
     
     if not user or not verify_password(form_data.password, str(user.hashed_password)):  # type: ignore
         raise HTTPException(
@@ -3,7 +3,8 @@ AI Medical Chatbot API endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 import openai
@@ -59,7 +60,7 @@ Remember: You are here to educate and support, not replace professional medical
 async def chat_with_ai(
     request: ChatRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Chat with AI medical assistant
@@ -69,10 +70,12 @@ async def chat_with_ai(
         session_id = request.session_id or f"session_{current_user.id}_{datetime.now().timestamp()}"
         
         # Get conversation history for context
-        history = db.query(ChatMessage).filter(
-            ChatMessage.user_id == current_user.id,
-            ChatMessage.session_id == session_id
-        ).order_by(ChatMessage.created_at.desc()).limit(10).all()
+        history = (await db.execute(
+            select(ChatMessage).where(
+                ChatMessage.user_id == current_user.id,
+                ChatMessage.session_id == session_id
+            ).order_by(ChatMessage.created_at.desc()).limit(10)
+        )).scalars().all()
         
         # Build messages for OpenAI
         messages = [{"role": "system", "content": SYSTEM_PROMPT}]
@@ -92,7 +95,7 @@ async def chat_with_ai(
             session_id=session_id
         )
         db.add(user_message)
-        db.commit()
+        await db.commit()
         
         # Get AI response
         if OPENAI_API_KEY:
@@ -118,7 +121,7 @@ async def chat_with_ai(
             session_id=session_id
         )
         db.add(assistant_message)
-        db.commit()
+        await db.commit()
         
         return ChatResponse(
             response=ai_response,
@@ -138,17 +141,19 @@ async def get_chat_history(
     session_id: Optional[str] = None,
     limit: int = 50,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get chat history for current user
     """
-    query = db.query(ChatMessage).filter(ChatMessage.user_id == current_user.id)
+    query = select(ChatMessage).where(ChatMessage.user_id == current_user.id)
     
     if session_id:
-        query = query.filter(ChatMessage.session_id == session_id)
+        query = query.where(ChatMessage.session_id == session_id)
     
-    messages = query.order_by(ChatMessage.created_at.desc()).limit(limit).all()
+    messages = (await db.execute(
+        query.order_by(ChatMessage.created_at.desc()).limit(limit)
+    )).scalars().all()
     
     return [
         MessageHistory(
@@ -165,16 +170,18 @@ async def get_chat_history(
 async def clear_chat_history(
     session_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Clear chat history for a session
     """
-    db.query(ChatMessage).filter(
-        ChatMessage.user_id == current_user.id,
-        ChatMessage.session_id == session_id
-    ).delete()
-    db.commit()
+    await db.execute(
+        delete(ChatMessage).where(
+            ChatMessage.user_id == current_user.id,
+            ChatMessage.session_id == session_id
+        )
+    )
+    await db.commit()
     
     return {"message": "Chat history cleared successfully"}
 
@@ -3,13 +3,16 @@ Doctor management routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from pathlib import Path
 
 from app.core.database import get_db
 from app.api.v1.auth import get_current_user
-from app.models.models import User, Doctor, Prediction
+from app.models.models import User, Doctor, Prediction, MedicalRecord
 from app.schemas.schemas import DoctorResponse, DoctorUpdate, PredictionResponse
+from app.services.explainability import EXPLANATION_READY
 
 router = APIRouter()
 
@@ -17,7 +20,7 @@ router = APIRouter()
 @router.get("/profile", response_model=DoctorResponse)
 async def get_doctor_profile(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current doctor's profile"""
     if str(current_user.role) != "doctor":
@@ -39,7 +42,7 @@ async def get_doctor_profile(
 async def update_doctor_profile(
     profile_data: DoctorUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update current doctor's profile"""
     if str(current_user.role) != "doctor":
@@ -60,8 +63,8 @@ async def update_doctor_profile(
     for field, value in update_data.items():
         setattr(doctor, field, value)
     
-    db.commit()
-    db.refresh(doctor)
+    await db.commit()
+    await db.refresh(doctor)
     
     return doctor
 
@@ -72,7 +75,7 @@ async def review_prediction(
     doctor_notes: str,
     approve: bool,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Review and approve/reject a prediction"""
     if str(current_user.role) != "doctor":
@@ -81,7 +84,7 @@ async def review_prediction(
             detail="Only doctors can review predictions"
         )
     
-    prediction = db.query(Prediction).filter(Prediction.id == prediction_id).first()
+    prediction = await db.get(Prediction, prediction_id)
     if not prediction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,7 +95,61 @@ async def review_prediction(
     prediction.doctor_notes = doctor_notes  # type: ignore
     prediction.status = "approved" if approve else "rejected"  # type: ignore
     
-    db.commit()
-    db.refresh(prediction)
+    await db.commit()
+    await db.refresh(prediction)
     
     return {"message": "Prediction reviewed successfully", "prediction_id": prediction.id}
+
+
+@router.get("/predictions/{prediction_id}/heatmap")
+async def get_prediction_heatmap(
+    prediction_id: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the explainability heatmap of a brain tumor prediction
+    
+    Returns the PNG once it is ready; otherwise the response is 202 with the
+    current explanation status and, for skipped or failed ones, the reason.
+    """
+    if str(current_user.role) != "doctor":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors can view prediction heatmaps"
+        )
+    
+    prediction = await db.get(Prediction, prediction_id)
+    if not prediction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prediction not found"
+        )
+    
+    analysis = prediction.detailed_analysis or {}
+    explanation_status = analysis.get("explanation_status")
+    if explanation_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No heatmap for this prediction"
+        )
+    
+    if explanation_status != EXPLANATION_READY:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "prediction_id": prediction_id,
+                "explanation_status": explanation_status,
+                "reason": analysis.get("explanation_reason") or analysis.get("explanation_error")
+            }
+        )
+    
+    record = await db.get(MedicalRecord, prediction.medical_record_id) if prediction.medical_record_id else None
+    heatmap_path = (record.record_metadata or {}).get("heatmap_path") if record else None
+    if not heatmap_path or not Path(heatmap_path).exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Heatmap file not found"
+        )
+    
+    return FileResponse(heatmap_path, media_type="image/png")
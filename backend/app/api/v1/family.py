@@ -3,7 +3,8 @@ Family Health Records API endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
@@ -128,7 +129,7 @@ def member_to_response(member: FamilyMember) -> FamilyMemberResponse:
 async def add_family_member(
     member: FamilyMemberCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Add a new family member
@@ -151,8 +152,8 @@ async def add_family_member(
     )
     
     db.add(new_member)
-    db.commit()
-    db.refresh(new_member)
+    await db.commit()
+    await db.refresh(new_member)
     
     return member_to_response(new_member)
 
@@ -160,15 +161,17 @@ async def add_family_member(
 @router.get("/members", response_model=List[FamilyMemberResponse])
 async def get_family_members(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all family members for current user
     """
-    members = db.query(FamilyMember).filter(
-        FamilyMember.primary_user_id == current_user.id,
-        FamilyMember.is_active == True
-    ).all()
+    members = (await db.execute(
+        select(FamilyMember).where(
+            FamilyMember.primary_user_id == current_user.id,
+            FamilyMember.is_active == True
+        )
+    )).scalars().all()
     
     return [member_to_response(m) for m in members]
 
@@ -177,15 +180,17 @@ async def get_family_members(
 async def get_family_member(
     member_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get specific family member details
     """
-    member = db.query(FamilyMember).filter(
-        FamilyMember.id == member_id,
-        FamilyMember.primary_user_id == current_user.id
-    ).first()
+    member = (await db.execute(
+        select(FamilyMember).where(
+            FamilyMember.id == member_id,
+            FamilyMember.primary_user_id == current_user.id
+        )
+    )).scalar_one_or_none()
     
     if not member:
         raise HTTPException(
@@ -201,15 +206,17 @@ async def update_family_member(
     member_id: str,
     update: FamilyMemberUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update family member information
     """
-    member = db.query(FamilyMember).filter(
-        FamilyMember.id == member_id,
-        FamilyMember.primary_user_id == current_user.id
-    ).first()
+    member = (await db.execute(
+        select(FamilyMember).where(
+            FamilyMember.id == member_id,
+            FamilyMember.primary_user_id == current_user.id
+        )
+    )).scalar_one_or_none()
     
     if not member:
         raise HTTPException(
@@ -237,8 +244,8 @@ async def update_family_member(
     if update.genetic_risk_factors is not None:
         member.genetic_risk_factors = update.genetic_risk_factors
     
-    db.commit()
-    db.refresh(member)
+    await db.commit()
+    await db.refresh(member)
     
     return FamilyMemberResponse(
         id=member.id,
@@ -264,15 +271,17 @@ async def update_family_member(
 async def delete_family_member(
     member_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete (soft delete) a family member
     """
-    member = db.query(FamilyMember).filter(
-        FamilyMember.id == member_id,
-        FamilyMember.primary_user_id == current_user.id
-    ).first()
+    member = (await db.execute(
+        select(FamilyMember).where(
+            FamilyMember.id == member_id,
+            FamilyMember.primary_user_id == current_user.id
+        )
+    )).scalar_one_or_none()
     
     if not member:
         raise HTTPException(
@@ -281,7 +290,7 @@ async def delete_family_member(
         )
     
     member.is_active = False
-    db.commit()
+    await db.commit()
     
     return {"message": "Family member removed successfully"}
 
@@ -290,16 +299,18 @@ async def delete_family_member(
 async def add_timeline_event(
     event: TimelineEventCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Add health event to family timeline
     """
     # Verify family member belongs to user
-    member = db.query(FamilyMember).filter(
-        FamilyMember.id == event.family_member_id,
-        FamilyMember.primary_user_id == current_user.id
-    ).first()
+    member = (await db.execute(
+        select(FamilyMember).where(
+            FamilyMember.id == event.family_member_id,
+            FamilyMember.primary_user_id == current_user.id
+        )
+    )).scalar_one_or_none()
     
     if not member:
         raise HTTPException(
@@ -320,8 +331,8 @@ async def add_timeline_event(
     )
     
     db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
+    await db.commit()
+    await db.refresh(new_event)
     
     return TimelineEventResponse(
         id=new_event.id,
@@ -342,24 +353,26 @@ async def add_timeline_event(
 async def get_family_timeline(
     member_id: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get family health timeline events
     """
-    # Get all family members for user
-    member_ids = [m.id for m in db.query(FamilyMember).filter(
+    # Restrict to the user's family members
+    member_ids = select(FamilyMember.id).where(
         FamilyMember.primary_user_id == current_user.id
-    ).all()]
+    )
     
-    query = db.query(FamilyHealthTimeline).filter(
+    query = select(FamilyHealthTimeline).where(
         FamilyHealthTimeline.family_member_id.in_(member_ids)
     )
     
     if member_id:
-        query = query.filter(FamilyHealthTimeline.family_member_id == member_id)
+        query = query.where(FamilyHealthTimeline.family_member_id == member_id)
     
-    events = query.order_by(FamilyHealthTimeline.event_date.desc()).all()
+    events = (await db.execute(
+        query.order_by(FamilyHealthTimeline.event_date.desc())
+    )).scalars().all()
     
     return [
         TimelineEventResponse(
@@ -382,15 +395,17 @@ async def get_family_timeline(
 @router.get("/summary", response_model=FamilyHealthSummary)
 async def get_family_health_summary(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get family health summary with insights
     """
-    members = db.query(FamilyMember).filter(
-        FamilyMember.primary_user_id == current_user.id,
-        FamilyMember.is_active == True
-    ).all()
+    members = (await db.execute(
+        select(FamilyMember).where(
+            FamilyMember.primary_user_id == current_user.id,
+            FamilyMember.is_active == True
+        )
+    )).scalars().all()
     
     # Aggregate genetic risks
     genetic_risks = {}
@@ -3,7 +3,8 @@ Real-time Health Monitoring API endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict
 from pydantic import BaseModel
 from datetime import datetime, timedelta
@@ -11,7 +12,7 @@ import json
 
 from app.core.database import get_db
 from app.api.v1.auth import get_current_user
-from app.models.models import User, HealthMetric, Patient
+from app.models.models import User, HealthMetric
 
 router = APIRouter()
 
@@ -137,13 +138,13 @@ def check_metric_alerts(metric_type: str, value: float, systolic: Optional[float
 async def add_health_metric(
     metric: HealthMetricCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Add a new health metric measurement
     """
     # Get patient profile
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    patient = current_user.patient_profile
     if not patient:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -174,8 +175,8 @@ async def add_health_metric(
     )
     
     db.add(health_metric)
-    db.commit()
-    db.refresh(health_metric)
+    await db.commit()
+    await db.refresh(health_metric)
     
     # Send real-time update via WebSocket
     if is_alert:
@@ -205,27 +206,29 @@ async def get_health_metrics(
     metric_type: Optional[str] = None,
     days: int = 7,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get health metrics for current user
     """
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    patient = current_user.patient_profile
     if not patient:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Patient profile not found"
         )
     
-    query = db.query(HealthMetric).filter(
+    query = select(HealthMetric).where(
         HealthMetric.patient_id == patient.id,
         HealthMetric.recorded_at >= datetime.now() - timedelta(days=days)
     )
     
     if metric_type:
-        query = query.filter(HealthMetric.metric_type == metric_type)
+        query = query.where(HealthMetric.metric_type == metric_type)
     
-    metrics = query.order_by(HealthMetric.recorded_at.desc()).all()
+    metrics = (await db.execute(
+        query.order_by(HealthMetric.recorded_at.desc())
+    )).scalars().all()
     
     return [
         HealthMetricResponse(
@@ -248,12 +251,12 @@ async def get_health_metrics(
 async def get_health_stats(
     days: int = 30,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get statistical summary of health metrics
     """
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    patient = current_user.patient_profile
     if not patient:
         return []
     
@@ -261,11 +264,13 @@ async def get_health_stats(
     stats_list = []
     
     for metric_type in metric_types:
-        metrics = db.query(HealthMetric).filter(
-            HealthMetric.patient_id == patient.id,
-            HealthMetric.metric_type == metric_type,
-            HealthMetric.recorded_at >= datetime.now() - timedelta(days=days)
-        ).order_by(HealthMetric.recorded_at).all()
+        metrics = (await db.execute(
+            select(HealthMetric).where(
+                HealthMetric.patient_id == patient.id,
+                HealthMetric.metric_type == metric_type,
+                HealthMetric.recorded_at >= datetime.now() - timedelta(days=days)
+            ).order_by(HealthMetric.recorded_at)
+        )).scalars().all()
         
         if not metrics:
             continue
@@ -303,7 +308,7 @@ async def get_health_stats(
 
 
 @router.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: str, db: Session = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket, user_id: str, db: AsyncSession = Depends(get_db)):
     """
     WebSocket endpoint for real-time health monitoring
     """
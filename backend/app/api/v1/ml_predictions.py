@@ -2,9 +2,17 @@
 Machine Learning prediction routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from sqlalchemy.orm import Session
-import shutil
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, UploadFile, File, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import csv
+import io
+import numpy as np
+from datetime import datetime, timedelta, timezone
+import logging
 from pathlib import Path
 import uuid
 
@@ -14,24 +22,68 @@ from app.api.v1.auth import get_current_user
 from app.models.models import User, Prediction, MedicalRecord
 from app.schemas.schemas import (
     DiabetesInput,
+    DiabetesBatchInput,
     BrainTumorPredictionResponse,
     DiabetesPredictionResponse,
+    DiabetesBatchPredictionResponse,
+    DiabetesWhatIfInput,
+    DiabetesWhatIfResponse,
+    ModelActivateRequest,
     PredictionResponse
 )
 from app.services.ml_service import ml_service
+from app.services.drift_monitor import drift_monitor
+from app.services.explainability import EXPLANATION_PENDING, explanation_worker
 from app.services.image_preprocessing import image_preprocessor
+from app.services.inference_executor import InferenceQueueFull, inference_executor
+from app.services.prediction_cache import prediction_cache
+from app.services.upload_reader import UploadTooLarge, read_upload, save_upload
+
+# Sniffed types accepted by the 2D brain tumor endpoint
+IMAGE_UPLOAD_TYPES = ("image/jpeg", "image/png")
+
+# Sniffed types accepted by the study endpoint and the extension they are stored under
+STUDY_UPLOAD_EXTENSIONS = {
+    "application/dicom": ".dcm",
+    "application/x-nifti": ".nii",
+    "application/gzip": ".nii.gz",
+    "application/zip": ".zip"
+}
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _inference_unavailable(exc: InferenceQueueFull) -> HTTPException:
+    """Map a saturated inference executor to 503 with Retry-After"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Inference service is busy, please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+def _persist_upload(file_path: Path, contents: bytes):
+    """Write an upload to storage; runs as a background task after the response"""
+    try:
+        file_path.write_bytes(contents)
+    except OSError as e:
+        logger.error(f"Error persisting upload {file_path}: {e}")
+
+
 @router.post("/predict-brain-tumor", response_model=BrainTumorPredictionResponse)
 async def predict_brain_tumor(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Predict brain tumor from MRI scan
+    
+    The upload is read into memory once, validated and decoded from that
+    buffer, and written to storage only after the response is sent.
     """
     # Validate file
     content_type = file.content_type or ""
@@ -41,30 +93,63 @@ async def predict_brain_tumor(
             detail="File must be an image"
         )
     
-    # Save uploaded file
+    # Storage location for the original upload
     file_id = str(uuid.uuid4())
     filename = file.filename or "upload.jpg"
     file_ext = Path(filename).suffix
     file_path = settings.UPLOAD_DIR / f"{file_id}{file_ext}"
     
     try:
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Validate image
-        is_valid, message = image_preprocessor.validate_image(str(file_path))
-        if not is_valid:
-            file_path.unlink()
+        # Stream the upload: size limit, hash and type sniffing in one pass
+        upload = await read_upload(file, settings.MAX_UPLOAD_SIZE)
+        if upload.detected_type not in IMAGE_UPLOAD_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=message
+                detail="File content is not a supported image (JPEG or PNG)"
             )
+        contents = upload.data
+        content_hash = upload.sha256
         
-        # Preprocess image
-        preprocessed_image = image_preprocessor.preprocess_mri_image(str(file_path))
+        # Identical bytes already scored by the active model skip validation,
+        # preprocessing and inference
+        prediction_result = None
+        shadow_input = None
+        model_version = ml_service.registry.active_version("brain_tumor")
+        if model_version is not None:
+            prediction_result = await prediction_cache.get("brain_tumor", content_hash, model_version)
+            if prediction_result is not None:
+                prediction_result["analysis"]["cache_hit"] = True
         
-        # Make prediction
-        prediction_result = ml_service.predict_brain_tumor(preprocessed_image)
+        if prediction_result is None:
+            # Validate image
+            is_valid, message = await inference_executor.run(
+                image_preprocessor.validate_image_bytes,
+                contents,
+                settings.MAX_UPLOAD_SIZE // (1024 * 1024)
+            )
+            if not is_valid:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=message
+                )
+            
+            # Decode and preprocess image from memory
+            preprocessed_image = await inference_executor.run_cpu(
+                image_preprocessor.preprocess_mri_bytes, contents, content_hash
+            )
+            
+            # Make prediction
+            prediction_result = await ml_service.predict_brain_tumor_batched(preprocessed_image)
+            
+            # Fallback results (no model loaded) are not worth caching
+            if ml_service.registry.active_version("brain_tumor") is not None:
+                shadow_input = preprocessed_image
+                await prediction_cache.set(
+                    "brain_tumor",
+                    content_hash,
+                    prediction_result["analysis"]["model_version"],
+                    prediction_result
+                )
         
         # Save medical record
         medical_record = MedicalRecord(
@@ -75,14 +160,19 @@ async def predict_brain_tumor(
             uploaded_by=current_user.id
         )
         db.add(medical_record)
-        db.commit()
-        db.refresh(medical_record)
+        await db.commit()
+        await db.refresh(medical_record)
+        
+        # Heatmaps are computed after the response by the explanation worker
+        explain = settings.EXPLANATIONS_ENABLED and ml_service.registry.active_version("brain_tumor") is not None
+        if explain:
+            prediction_result["analysis"]["explanation_status"] = EXPLANATION_PENDING
         
         # Save prediction
         prediction = Prediction(
             patient_id=current_user.patient_profile.id if current_user.patient_profile else None,
             prediction_type="brain_tumor",
-            input_data={"file_path": str(file_path)},
+            input_data={"file_path": str(file_path), "sha256": content_hash},
             result=prediction_result["result"],
             confidence_score=prediction_result["confidence_score"],
             risk_level=prediction_result["risk_level"],
@@ -91,8 +181,24 @@ async def predict_brain_tumor(
             status="pending"
         )
         db.add(prediction)
-        db.commit()
-        db.refresh(prediction)
+        await db.commit()
+        await db.refresh(prediction)
+        
+        # Persist the original off the hot path; the explanation reads it back
+        background_tasks.add_task(_persist_upload, file_path, contents)
+        if explain:
+            background_tasks.add_task(explanation_worker.submit, str(prediction.id))
+        if shadow_input is not None:
+            # The shadow scores the plain image, so compare it with the
+            # primary's first pass rather than a test-time augmentation mean
+            tta = prediction_result["analysis"].get("tta")
+            background_tasks.add_task(
+                ml_service.shadow.submit,
+                "brain_tumor",
+                shadow_input,
+                tta["first_pass_confidence"] if tta else prediction_result["confidence_score"],
+                prediction_result["analysis"]["model_version"]
+            )
         
         return BrainTumorPredictionResponse(
             prediction_id=str(prediction.id),
@@ -104,21 +210,154 @@ async def predict_brain_tumor(
             recommendations=prediction_result["recommendations"]
         )
     
+    except HTTPException:
+        raise
+    
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    
+    except InferenceQueueFull as e:
+        raise _inference_unavailable(e)
+    
     except Exception as e:
-        # Clean up file if error occurs
-        if file_path.exists():
-            file_path.unlink()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing image: {str(e)}"
         )
 
 
+@router.post("/predict-brain-tumor/study", response_model=BrainTumorPredictionResponse)
+async def predict_brain_tumor_study(
+    file: UploadFile = File(...),
+    max_slices: Optional[int] = Query(None, ge=1),
+    top_k: Optional[int] = Query(None, ge=1),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Predict brain tumor from a whole MRI study
+    
+    Accepts a NIfTI volume (.nii, .nii.gz), a DICOM file or a zipped DICOM
+    series. The upload is streamed to storage, then slices are read from it
+    on demand, scored in batches and aggregated into a study-level result
+    with the most suspicious slice indices.
+    """
+    file_id = str(uuid.uuid4())
+    staging_path = settings.UPLOAD_DIR / f"{file_id}.upload"
+    settings.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    
+    try:
+        # Stream to disk: size limit, hash and type sniffing in one pass
+        upload = await save_upload(file, staging_path, settings.BRAIN_TUMOR_STUDY_MAX_UPLOAD_SIZE)
+        file_ext = STUDY_UPLOAD_EXTENSIONS.get(upload.detected_type)
+        if file_ext is None:
+            staging_path.unlink(missing_ok=True)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File content is not a supported study (NIfTI, DICOM or zipped DICOM series)"
+            )
+        file_path = staging_path.with_suffix(file_ext)
+        staging_path.rename(file_path)
+        
+        try:
+            # Sampling parameters change the result, so they are part of the key
+            cache_hash = f"{upload.sha256}:{max_slices}:{top_k}"
+            prediction_result = None
+            model_version = ml_service.registry.active_version("brain_tumor")
+            if model_version is not None:
+                prediction_result = await prediction_cache.get("brain_tumor_study", cache_hash, model_version)
+                if prediction_result is not None:
+                    prediction_result["analysis"]["cache_hit"] = True
+            
+            if prediction_result is None:
+                try:
+                    prediction_result = await ml_service.predict_brain_tumor_study_async(
+                        str(file_path), max_slices, top_k
+                    )
+                except (ValueError, RuntimeError) as e:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Could not read study: {str(e)}"
+                    )
+                
+                if ml_service.registry.active_version("brain_tumor") is not None:
+                    await prediction_cache.set(
+                        "brain_tumor_study",
+                        cache_hash,
+                        prediction_result["analysis"]["model_version"],
+                        prediction_result
+                    )
+            
+            # Save medical record
+            medical_record = MedicalRecord(
+                patient_id=current_user.patient_profile.id if current_user.patient_profile else None,
+                record_type="mri_brain_study",
+                file_path=str(file_path),
+                description="MRI study for brain tumor detection",
+                uploaded_by=current_user.id
+            )
+            db.add(medical_record)
+            await db.commit()
+        except Exception:
+            # Nothing references the upload until the medical record is saved
+            file_path.unlink(missing_ok=True)
+            raise
+        await db.refresh(medical_record)
+        
+        # Save prediction
+        prediction = Prediction(
+            patient_id=current_user.patient_profile.id if current_user.patient_profile else None,
+            prediction_type="brain_tumor",
+            input_data={"file_path": str(file_path), "sha256": upload.sha256, "study": True},
+            result=prediction_result["result"],
+            confidence_score=prediction_result["confidence_score"],
+            risk_level=prediction_result["risk_level"],
+            detailed_analysis=prediction_result["analysis"],
+            medical_record_id=medical_record.id,
+            status="pending"
+        )
+        db.add(prediction)
+        await db.commit()
+        await db.refresh(prediction)
+        
+        return BrainTumorPredictionResponse(
+            prediction_id=str(prediction.id),
+            result=prediction_result["result"],
+            confidence_score=prediction_result["confidence_score"],
+            tumor_detected=prediction_result["tumor_detected"],
+            risk_level=prediction_result["risk_level"],
+            analysis=prediction_result["analysis"],
+            recommendations=prediction_result["recommendations"]
+        )
+    
+    except HTTPException:
+        raise
+    
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    
+    except InferenceQueueFull as e:
+        raise _inference_unavailable(e)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing study: {str(e)}"
+        )
+
+
 @router.post("/predict-diabetes", response_model=DiabetesPredictionResponse)
 async def predict_diabetes(
     data: DiabetesInput,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Predict diabetes risk from clinical data
@@ -137,7 +376,7 @@ async def predict_diabetes(
         }
         
         # Make prediction
-        prediction_result = ml_service.predict_diabetes(features)
+        prediction_result = await ml_service.predict_diabetes_async(features)
         
         # Save prediction
         prediction = Prediction(
@@ -148,13 +387,23 @@ async def predict_diabetes(
             confidence_score=prediction_result["probability"],
             risk_level=prediction_result["risk_level"],
             detailed_analysis={
-                "risk_factors": prediction_result["risk_factors"]
+                "risk_factors": prediction_result["risk_factors"],
+                "model_version": prediction_result["model_version"]
             },
             status="pending"
         )
         db.add(prediction)
-        db.commit()
-        db.refresh(prediction)
+        await db.commit()
+        await db.refresh(prediction)
+        
+        # Score a copy with the shadow version, if any, after the response
+        background_tasks.add_task(
+            ml_service.shadow.submit,
+            "diabetes",
+            features,
+            prediction_result["probability"],
+            prediction_result["model_version"]
+        )
         
         return DiabetesPredictionResponse(
             prediction_id=str(prediction.id),
@@ -162,9 +411,190 @@ async def predict_diabetes(
             probability=prediction_result["probability"],
             risk_level=prediction_result["risk_level"],
             risk_factors=prediction_result["risk_factors"],
-            recommendations=prediction_result["recommendations"]
+            recommendations=prediction_result["recommendations"],
+            model_version=prediction_result["model_version"]
+        )
+    
+    except InferenceQueueFull as e:
+        raise _inference_unavailable(e)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error making prediction: {str(e)}"
+        )
+
+
+async def _read_diabetes_rows(request: Request) -> List[DiabetesInput]:
+    """
+    Parse a batch of diabetes inputs from JSON, a CSV body or a CSV upload
+    
+    CSV input needs a header row with the ``DiabetesInput`` field names.
+    """
+    content_type = request.headers.get("content-type", "")
+    
+    if content_type.startswith("multipart/form-data") or content_type.startswith("text/csv"):
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Multipart requests must include a CSV 'file' field"
+                )
+            raw = await upload.read()
+        else:
+            raw = await request.body()
+        
+        try:
+            text = raw.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="CSV must be UTF-8 encoded"
+            )
+        
+        rows = []
+        errors = []
+        # Row 1 is the header, so data starts at line 2
+        for line_number, record in enumerate(csv.DictReader(io.StringIO(text)), start=2):
+            try:
+                rows.append(DiabetesInput.model_validate(record))
+            except ValidationError as e:
+                errors.append({"line": line_number, "errors": e.errors(include_url=False)})
+        if errors:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=errors[:50]
+            )
+        return rows
+    
+    try:
+        return DiabetesBatchInput.model_validate(await request.json()).rows
+    except ValueError as e:
+        # ValidationError is a ValueError, as is a malformed JSON body
+        detail = e.errors(include_url=False) if isinstance(e, ValidationError) else "Invalid JSON body"
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=detail
+        )
+
+
+@router.post("/predict-diabetes/batch", response_model=DiabetesBatchPredictionResponse)
+async def predict_diabetes_batch(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Score a cohort of patients for diabetes risk
+    
+    Accepts ``{"rows": [DiabetesInput, ...]}`` as JSON, a ``text/csv`` body,
+    or a multipart CSV upload in the ``file`` field. All rows are scored in
+    one vectorized call and stored with a single bulk insert.
+    """
+    rows = await _read_diabetes_rows(request)
+    
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No rows to score"
+        )
+    if len(rows) > settings.DIABETES_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {settings.DIABETES_BATCH_MAX_ROWS} rows"
+        )
+    
+    try:
+        features = [row.model_dump() for row in rows]
+        
+        # Make predictions
+        results = await ml_service.predict_diabetes_batch_async(
+            features, include_recommendations=False
+        )
+        
+        # Save predictions in one round trip
+        patient_id = current_user.patient_profile.id if current_user.patient_profile else None
+        prediction_rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "patient_id": patient_id,
+                "prediction_type": "diabetes",
+                "input_data": row_features,
+                "result": result["result"],
+                "confidence_score": result["probability"],
+                "risk_level": result["risk_level"],
+                "detailed_analysis": {
+                    "risk_factors": result["risk_factors"],
+                    "model_version": result["model_version"]
+                },
+                "status": "pending"
+            }
+            for row_features, result in zip(features, results)
+        ]
+        await db.execute(insert(Prediction), prediction_rows)
+        await db.commit()
+    
+    except InferenceQueueFull as e:
+        raise _inference_unavailable(e)
+    
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error making predictions: {str(e)}"
+        )
+    
+    risk_level_counts = {"low": 0, "moderate": 0, "high": 0}
+    for result in results:
+        risk_level_counts[result["risk_level"]] += 1
+    
+    return DiabetesBatchPredictionResponse(
+        total=len(results),
+        risk_level_counts=risk_level_counts,
+        predictions=[
+            {"prediction_id": row["id"], **result}
+            for row, result in zip(prediction_rows, results)
+        ]
+    )
+
+
+# Features that only take whole values; their what-if axes are rounded
+INTEGER_DIABETES_FEATURES = {"pregnancies", "age"}
+
+
+@router.post("/predict-diabetes/what-if", response_model=DiabetesWhatIfResponse)
+async def predict_diabetes_what_if(
+    data: DiabetesWhatIfInput,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Show how diabetes risk changes as selected features change
+    
+    Each range becomes one axis of a grid around the submitted input; the
+    whole grid is scored in a single vectorized call. Nothing is stored.
+    """
+    ranges = []
+    for r in data.ranges:
+        values = np.linspace(r.start, r.stop, r.steps)
+        if r.feature in INTEGER_DIABETES_FEATURES:
+            values = np.unique(np.round(values))
+        ranges.append((r.feature, values))
+    
+    points = int(np.prod([len(values) for _, values in ranges]))
+    if points > settings.DIABETES_WHAT_IF_MAX_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Grid has {points} points; the limit is {settings.DIABETES_WHAT_IF_MAX_POINTS}"
         )
     
+    try:
+        return await ml_service.predict_diabetes_what_if_async(data.input.model_dump(), ranges)
+    
+    except InferenceQueueFull as e:
+        raise _inference_unavailable(e)
+    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -175,7 +605,7 @@ async def predict_diabetes(
 @router.get("/predictions", response_model=list[PredictionResponse])
 async def get_predictions(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100
 ):
@@ -183,12 +613,14 @@ async def get_predictions(
     Get all predictions for the current user
     """
     if str(current_user.role) == "patient" and current_user.patient_profile:
-        predictions = db.query(Prediction).filter(
-            Prediction.patient_id == current_user.patient_profile.id
-        ).offset(skip).limit(limit).all()
+        query = select(Prediction).where(Prediction.patient_id == current_user.patient_profile.id)
     else:
         # Doctors can see all predictions
-        predictions = db.query(Prediction).offset(skip).limit(limit).all()
+        query = select(Prediction)
+    
+    predictions = (await db.execute(
+        query.order_by(Prediction.created_at.desc()).offset(skip).limit(limit)
+    )).scalars().all()
     
     return predictions
 
@@ -197,12 +629,12 @@ async def get_predictions(
 async def get_prediction(
     prediction_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific prediction by ID
     """
-    prediction = db.query(Prediction).filter(Prediction.id == prediction_id).first()
+    prediction = await db.get(Prediction, prediction_id)
     
     if not prediction:
         raise HTTPException(
@@ -226,8 +658,259 @@ async def ml_health_check():
     """
     Check ML service health
     """
+    models = ml_service.registry.status()
+    return {
+        "status": "healthy" if ml_service.registry.ready else "not ready",
+        "brain_tumor_model": models["brain_tumor"]["state"],
+        "diabetes_model": models["diabetes"]["state"],
+        "models": models
+    }
+
+
+@router.get("/metrics")
+async def ml_metrics():
+    """
+    Inference batching and executor metrics
+    """
+    return {
+        "brain_tumor_batcher": ml_service.brain_tumor_batcher.stats(),
+        "inference_executor": inference_executor.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "preprocessed_tensor_cache": (
+            image_preprocessor.tensor_cache.stats() if image_preprocessor.tensor_cache else None
+        ),
+        "explanations": explanation_worker.stats()
+    }
+
+
+@router.get("/models")
+async def list_models(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List model versions on disk and the version each model is serving
+    """
+    models = ml_service.registry.status()
+    for name, report in models.items():
+        report["available_versions"] = ml_service.available_versions(name)
+    return models
+
+
+@router.post("/models/{model_name}/activate", status_code=status.HTTP_202_ACCEPTED)
+async def activate_model_version(
+    model_name: str,
+    data: ModelActivateRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Load a model version in the background and hot-swap it in (admin only)
+    
+    The new version is warmed up with a synthetic batch before the swap;
+    requests already in flight finish on the previous version. Poll
+    ``GET /models`` for the activation state.
+    """
+    if str(current_user.role) != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can activate model versions"
+        )
+    
+    if model_name not in ml_service.registry.names:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found"
+        )
+    
+    if data.version not in ml_service.available_versions(model_name):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Version {data.version} not found for model {model_name}"
+        )
+    
+    if ml_service.registry.is_activating(model_name):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Another version of {model_name} is being activated"
+        )
+    
+    background_tasks.add_task(ml_service.activate_model_version, model_name, data.version)
+    
+    return {
+        "message": "Model activation started",
+        "model": model_name,
+        "version": data.version,
+        "active_version": ml_service.registry.active_version(model_name)
+    }
+
+
+@router.get("/models/shadow")
+async def shadow_report(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Agreement and latency of shadow model versions against the primaries (admin only)
+    
+    Shadow versions score copies of live inputs after the response is sent;
+    their results are never returned to callers.
+    """
+    if str(current_user.role) != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view shadow evaluations"
+        )
+    
+    report = ml_service.shadow.report()
+    report["models"] = ml_service.shadow_registry.status()
+    return report
+
+
+@router.put("/models/{model_name}/shadow", status_code=status.HTTP_202_ACCEPTED)
+async def set_shadow_version(
+    model_name: str,
+    data: ModelActivateRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Load a model version in the background to shadow the active one (admin only)
+    
+    Poll ``GET /models/shadow`` for the load state and comparison statistics.
+    """
+    if str(current_user.role) != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can configure shadow models"
+        )
+    
+    if model_name not in ml_service.shadow_registry.names:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found"
+        )
+    
+    if data.version not in ml_service.available_versions(model_name):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Version {data.version} not found for model {model_name}"
+        )
+    
+    if ml_service.shadow_registry.is_activating(model_name):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A shadow version of {model_name} is being loaded"
+        )
+    
+    def configure():
+        try:
+            ml_service.shadow.configure(model_name, data.version)
+        except Exception:
+            # Recorded in the shadow registry status
+            pass
+    
+    background_tasks.add_task(configure)
+    
+    return {
+        "message": "Shadow model loading started",
+        "model": model_name,
+        "version": data.version,
+        "shadow_version": ml_service.shadow.shadow_version(model_name)
+    }
+
+
+@router.delete("/models/{model_name}/shadow")
+async def clear_shadow_version(
+    model_name: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stop shadowing a model and release the shadow version (admin only)
+    """
+    if str(current_user.role) != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can configure shadow models"
+        )
+    
+    if model_name not in ml_service.shadow_registry.names:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found"
+        )
+    
+    ml_service.shadow.clear(model_name)
+    return {"message": "Shadow model cleared", "model": model_name}
+
+
+@router.get("/drift/{model_name}")
+async def drift_report(
+    model_name: str,
+    hours: Optional[float] = Query(default=None, gt=0, description="Recent window compared with the reference"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Input drift of a model against its reference profile (admin only)
+    
+    Reports per-feature PSI and Kolmogorov-Smirnov scores of the inputs
+    seen in the last ``hours`` across all workers. This worker's unflushed
+    statistics are written first so the report is current.
+    """
+    if str(current_user.role) != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can view drift reports"
+        )
+    
+    if model_name not in drift_monitor.features:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found"
+        )
+    
+    await run_in_threadpool(drift_monitor.flush)
+    return await db.run_sync(
+        drift_monitor.report, model_name, hours or settings.DRIFT_REPORT_HOURS
+    )
+
+
+@router.post("/drift/{model_name}/reference")
+async def set_drift_reference(
+    model_name: str,
+    hours: Optional[float] = Query(default=None, gt=0, description="Recent window promoted to the reference"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Use the inputs of the last ``hours`` as the model's reference profile (admin only)
+    
+    Meant for a period known to be healthy, when no training-data profile
+    has been loaded with ``python -m app.cli.drift_reference``.
+    """
+    if str(current_user.role) != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can set drift references"
+        )
+    
+    if model_name not in drift_monitor.features:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found"
+        )
+    
+    await run_in_threadpool(drift_monitor.flush)
+    since = datetime.now(timezone.utc) - timedelta(hours=hours or settings.DRIFT_REPORT_HOURS)
+    observations = await db.run_sync(drift_monitor.reference_from_windows, model_name, since)
+    if observations == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No inputs recorded in that window"
+        )
+    
     return {
-        "status": "healthy",
-        "brain_tumor_model": "loaded" if ml_service.brain_tumor_model else "not loaded",
-        "diabetes_model": "loaded" if ml_service.diabetes_model else "not loaded"
+        "message": "Drift reference updated",
+        "model": model_name,
+        "since": since.isoformat(),
+        "observations": observations
     }
@@ -3,7 +3,7 @@ Patient management routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.core.database import get_db
@@ -17,7 +17,7 @@ router = APIRouter()
 @router.get("/profile", response_model=PatientResponse)
 async def get_patient_profile(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current patient's profile"""
     if str(current_user.role) != "patient":
@@ -39,7 +39,7 @@ async def get_patient_profile(
 async def update_patient_profile(
     profile_data: PatientUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update current patient's profile"""
     if str(current_user.role) != "patient":
@@ -60,7 +60,7 @@ async def update_patient_profile(
     for field, value in update_data.items():
         setattr(patient, field, value)
     
-    db.commit()
-    db.refresh(patient)
+    await db.commit()
+    await db.refresh(patient)
     
     return patient
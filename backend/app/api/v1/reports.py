@@ -3,7 +3,7 @@ Report generation routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.api.v1.auth import get_current_user
@@ -16,7 +16,7 @@ router = APIRouter()
 async def generate_report(
     prediction_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Generate PDF report for a prediction"""
     # This would integrate with a PDF generation service
@@ -3,7 +3,8 @@ Telemedicine Video Consultation API endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
@@ -11,7 +12,7 @@ import uuid
 
 from app.core.database import get_db
 from app.api.v1.auth import get_current_user
-from app.models.models import User, Appointment, Patient, Doctor, Prescription
+from app.models.models import User, Appointment, Doctor, Prescription
 
 router = APIRouter()
 
@@ -77,13 +78,13 @@ class AppointmentUpdate(BaseModel):
 async def create_appointment(
     appointment: AppointmentCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new appointment (patient only)
     """
     # Verify user is a patient
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
+    patient = current_user.patient_profile
     if not patient:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -91,7 +92,7 @@ async def create_appointment(
         )
     
     # Verify doctor exists
-    doctor = db.query(Doctor).filter(Doctor.id == appointment.doctor_id).first()
+    doctor = await db.get(Doctor, appointment.doctor_id)
     if not doctor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -120,8 +121,8 @@ async def create_appointment(
     )
     
     db.add(new_appointment)
-    db.commit()
-    db.refresh(new_appointment)
+    await db.commit()
+    await db.refresh(new_appointment)
     
     return AppointmentResponse(
         id=new_appointment.id,
@@ -143,28 +144,30 @@ async def create_appointment(
 async def get_appointments(
     status_filter: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get appointments for current user (patient or doctor)
     """
-    query = db.query(Appointment)
+    query = select(Appointment)
     
     # Filter based on user role
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
+    patient = current_user.patient_profile
+    doctor = current_user.doctor_profile
     
     if patient:
-        query = query.filter(Appointment.patient_id == patient.id)
+        query = query.where(Appointment.patient_id == patient.id)
     elif doctor:
-        query = query.filter(Appointment.doctor_id == doctor.id)
+        query = query.where(Appointment.doctor_id == doctor.id)
     else:
         return []
     
     if status_filter:
-        query = query.filter(Appointment.status == status_filter)
+        query = query.where(Appointment.status == status_filter)
     
-    appointments = query.order_by(Appointment.appointment_date.desc()).all()
+    appointments = (await db.execute(
+        query.order_by(Appointment.appointment_date.desc())
+    )).scalars().all()
     
     return [
         AppointmentResponse(
@@ -189,12 +192,12 @@ async def get_appointments(
 async def get_appointment(
     appointment_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get specific appointment details
     """
-    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appointment = await db.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -202,8 +205,8 @@ async def get_appointment(
         )
     
     # Verify user has access
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
+    patient = current_user.patient_profile
+    doctor = current_user.doctor_profile
     
     if patient and appointment.patient_id != patient.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
@@ -233,12 +236,12 @@ async def update_appointment(
     appointment_id: str,
     update: AppointmentUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update appointment status or notes
     """
-    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appointment = await db.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -250,8 +253,8 @@ async def update_appointment(
     if update.notes:
         appointment.notes = update.notes
     
-    db.commit()
-    db.refresh(appointment)
+    await db.commit()
+    await db.refresh(appointment)
     
     return AppointmentResponse(
         id=appointment.id,
@@ -273,12 +276,12 @@ async def update_appointment(
 async def start_video_session(
     appointment_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Generate video room for appointment
     """
-    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appointment = await db.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -289,7 +292,7 @@ async def start_video_session(
     if not appointment.video_room_id:
         appointment.video_room_id = f"room_{uuid.uuid4().hex[:16]}"
         appointment.status = "in_progress"
-        db.commit()
+        await db.commit()
     
     # In production, integrate with Twilio/Agora/Daily.co
     # For now, return a simple WebRTC room identifier
@@ -308,12 +311,12 @@ async def start_video_session(
 async def create_prescription(
     prescription: PrescriptionCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create prescription (doctors only)
     """
-    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
+    doctor = current_user.doctor_profile
     if not doctor:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -321,7 +324,7 @@ async def create_prescription(
         )
     
     # Verify appointment exists
-    appointment = db.query(Appointment).filter(Appointment.id == prescription.appointment_id).first()
+    appointment = await db.get(Appointment, prescription.appointment_id)
     if not appointment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -342,8 +345,8 @@ async def create_prescription(
     )
     
     db.add(new_prescription)
-    db.commit()
-    db.refresh(new_prescription)
+    await db.commit()
+    await db.refresh(new_prescription)
     
     return PrescriptionResponse(
         id=new_prescription.id,
@@ -362,24 +365,26 @@ async def create_prescription(
 @router.get("/prescriptions", response_model=List[PrescriptionResponse])
 async def get_prescriptions(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get prescriptions for current user
     """
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    doctor = db.query(Doctor).filter(Doctor.user_id == current_user.id).first()
+    patient = current_user.patient_profile
+    doctor = current_user.doctor_profile
     
-    query = db.query(Prescription)
+    query = select(Prescription)
     
     if patient:
-        query = query.filter(Prescription.patient_id == patient.id)
+        query = query.where(Prescription.patient_id == patient.id)
     elif doctor:
-        query = query.filter(Prescription.doctor_id == doctor.id)
+        query = query.where(Prescription.doctor_id == doctor.id)
     else:
         return []
     
-    prescriptions = query.order_by(Prescription.created_at.desc()).all()
+    prescriptions = (await db.execute(
+        query.order_by(Prescription.created_at.desc())
+    )).scalars().all()
     
     return [
         PrescriptionResponse(
@@ -0,0 +1,106 @@
+"""
+Build a drift reference profile from training data
+
+Computes the same per-feature statistics the drift monitor keeps for live
+traffic and stores them as the model's reference. Run from the backend
+directory:
+
+    python -m app.cli.drift_reference --model diabetes --csv diabetes_train.csv
+    python -m app.cli.drift_reference --model brain_tumor --images data/train
+
+Diabetes CSVs need a header row with the ``DiabetesInput`` field names;
+image directories are searched recursively for JPEG and PNG files.
+"""
+
+import argparse
+import csv
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.cli.migrate import require_tables
+from app.core.database import SessionLocal
+from app.models.models import FeatureDriftWindow
+from app.services.drift_monitor import DRIFT_FEATURES, FeatureStats, drift_monitor, image_intensity_features
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+
+
+def _new_stats(model_name: str) -> Dict[str, FeatureStats]:
+    return {spec.name: FeatureStats(spec) for spec in DRIFT_FEATURES[model_name]}
+
+
+def profile_csv(path: Path) -> Dict[str, FeatureStats]:
+    """Statistics of every diabetes feature column in a CSV file"""
+    stats = _new_stats("diabetes")
+    columns: Dict[str, List[float]] = {feature: [] for feature in stats}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for record in csv.DictReader(f):
+            for feature, values in columns.items():
+                value = record.get(feature)
+                if value not in (None, ""):
+                    values.append(float(value))
+    for feature, values in columns.items():
+        stats[feature].update(values)
+    return stats
+
+
+def profile_images(directory: Path) -> Dict[str, FeatureStats]:
+    """Intensity statistics of every image under a directory, preprocessed as for inference"""
+    from app.services.image_preprocessing import image_preprocessor
+
+    stats = _new_stats("brain_tumor")
+    paths = sorted(path for pattern in IMAGE_PATTERNS for path in directory.rglob(pattern))
+    for index, path in enumerate(paths, start=1):
+        try:
+            image = image_preprocessor.preprocess_mri_bytes(path.read_bytes())
+        except Exception as e:
+            logger.warning(f"Skipping {path}: {e}")
+            continue
+        for feature, values in image_intensity_features(image).items():
+            stats[feature].update(values)
+        if index % 500 == 0:
+            logger.info(f"Profiled {index}/{len(paths)} images")
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli.drift_reference",
+        description="Store a drift reference profile computed from training data"
+    )
+    parser.add_argument("--model", choices=sorted(DRIFT_FEATURES), required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", type=Path, help="Diabetes training data with a header row")
+    source.add_argument("--images", type=Path, help="Directory of training MRI images")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if args.model == "diabetes" and args.csv is None:
+        parser.error("--model diabetes needs --csv")
+    if args.model == "brain_tumor" and args.images is None:
+        parser.error("--model brain_tumor needs --images")
+
+    stats = profile_csv(args.csv) if args.csv else profile_images(args.images)
+    rows = [feature_stats.to_row() for feature_stats in stats.values() if feature_stats.count]
+    if not rows:
+        parser.error("No usable training data found")
+
+    require_tables(FeatureDriftWindow.__tablename__)
+    db = SessionLocal()
+    try:
+        drift_monitor.set_reference(db, args.model, rows)
+    finally:
+        db.close()
+
+    logger.info(
+        f"Stored {args.model} drift reference: "
+        + ", ".join(f"{row['feature']} (n={row['count']}, mean={row['mean']:.3f})" for row in rows)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Apply database migrations
+
+Run once per deploy, before any API worker starts; workers no longer
+create or inspect the schema themselves. From the backend directory:
+
+    python -m app.cli.migrate
+    python -m app.cli.migrate --revision 0001
+
+Databases created by ``create_all`` before migrations existed have tables
+but no ``alembic_version``; they are stamped with the initial revision
+before upgrading, provided every baseline table is present. On PostgreSQL an advisory lock serialises concurrent
+runs, so starting the command from several containers at once is safe.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, pool, text
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Revision matching the schema create_all used to produce
+BASELINE_REVISION = "0001"
+
+# Tables created by the baseline revision
+BASELINE_TABLES = (
+    "users", "patients", "doctors", "medical_records", "predictions", "doctor_reviews",
+    "appointments", "doctor_availability", "chat_messages", "health_metrics", "payments",
+    "prescriptions", "family_members", "family_health_timeline"
+)
+
+# Arbitrary application-wide key for pg_advisory_lock
+MIGRATION_LOCK_KEY = 724_310_001
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def migrate(revision: str = "head"):
+    """
+    Upgrade the configured database to ``revision``
+
+    Raises:
+        RuntimeError: If an unversioned database lacks baseline tables, so
+            stamping it would record tables that do not exist
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logging"] = False
+
+    lock_engine = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    with lock_engine.connect() as connection:
+        postgres = connection.dialect.name == "postgresql"
+        if postgres:
+            # Session-level lock, held while the migrations run on their own connection
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+        try:
+            tables = inspect(connection).get_table_names()
+            if "alembic_version" not in tables and "users" in tables:
+                missing = [table for table in BASELINE_TABLES if table not in tables]
+                if missing:
+                    raise RuntimeError(
+                        f"Existing schema has no migration history and lacks baseline tables "
+                        f"{', '.join(missing)}; refusing to stamp {BASELINE_REVISION}"
+                    )
+                logger.info(f"Existing schema has no migration history; stamping {BASELINE_REVISION}")
+                command.stamp(config, BASELINE_REVISION)
+            command.upgrade(config, revision)
+            command.current(config)
+        finally:
+            if postgres:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
+    lock_engine.dispose()
+
+
+def require_tables(*names: str):
+    """
+    Exit unless the migrated schema has the given tables
+
+    For CLIs that write to tables added by later revisions; they never
+    create schema themselves.
+    """
+    from app.core.database import engine
+
+    existing = set(inspect(engine).get_table_names())
+    missing = [name for name in names if name not in existing]
+    if missing:
+        sys.exit(
+            f"Missing table(s) {', '.join(missing)}; "
+            f"apply the migrations with `python -m app.cli.migrate` first"
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli.migrate",
+        description="Apply database migrations before starting the API workers"
+    )
+    parser.add_argument("--revision", default="head", help="Target revision (default: head)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    migrate(args.revision)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+Offline re-scoring of stored predictions
+
+Re-runs a model version over historical predictions and stores the results
+in ``prediction_rescores`` next to the originals. Run from the backend
+directory:
+
+    python -m app.cli.rescore --type diabetes
+    python -m app.cli.rescore --type brain_tumor --version v3 --workers 4
+
+Predictions are streamed in id order with a server-side cursor. Each worker
+owns a contiguous id range and records its progress in a checkpoint file
+after every committed chunk, so re-running the same command resumes where
+it stopped. Changing ``--workers`` changes the ranges and starts a new set
+of checkpoints.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+
+from app.cli.migrate import require_tables
+from app.core.database import SessionLocal, engine
+from app.models.models import Prediction, PredictionRescore
+
+logger = logging.getLogger(__name__)
+
+PREDICTION_TYPES = ("brain_tumor", "diabetes")
+
+# Prediction ids are lowercase UUID strings; ranges are cut on their first four hex digits
+ID_PREFIX_SPACE = 16 ** 4
+
+
+def partition_bounds(workers: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Split the id space into ``workers`` contiguous [low, high) ranges
+
+    Returns:
+        (low, high) string bounds, None meaning unbounded
+    """
+    cuts = [format(i * ID_PREFIX_SPACE // workers, "04x") for i in range(1, workers)]
+    return list(zip([None] + cuts, cuts + [None]))
+
+
+class Checkpoint:
+    """Progress of one worker, persisted as JSON after every committed chunk"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.model_version: Optional[str] = None
+        self.last_id: Optional[str] = None
+        self.processed = 0
+        self.failed = 0
+        self.changed = 0
+        self.done = False
+        if path.exists():
+            self.__dict__.update(json.loads(path.read_text()))
+            self.path = path
+
+    def reset(self, model_version: str):
+        """Start over, e.g. because the default model version moved"""
+        self.model_version = model_version
+        self.last_id = None
+        self.processed = self.failed = self.changed = 0
+        self.done = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in self.__dict__.items() if key != "path"}
+
+    def save(self):
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), indent=2))
+        os.replace(tmp_path, self.path)
+
+
+def _rescore_row(prediction: Prediction, run_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert parameters for one re-scored prediction"""
+    return {
+        "prediction_id": prediction.id,
+        "prediction_type": prediction.prediction_type,
+        "model_version": result["analysis"]["model_version"],
+        "run_id": run_id,
+        "result": result["result"],
+        "confidence_score": result["confidence_score"],
+        "risk_level": result["risk_level"],
+        "detailed_analysis": result["analysis"]
+    }
+
+
+def _score_diabetes(predictions: List[Prediction]) -> List[Optional[Dict[str, Any]]]:
+    """Score stored diabetes inputs with one vectorized call, falling back row by row"""
+    from app.services.ml_service import ml_service
+
+    def to_result(prediction: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "result": prediction["result"],
+            "confidence_score": prediction["probability"],
+            "risk_level": prediction["risk_level"],
+            "analysis": {
+                "risk_factors": prediction["risk_factors"],
+                "model_version": prediction["model_version"]
+            }
+        }
+
+    rows = [prediction.input_data or {} for prediction in predictions]
+    try:
+        return [to_result(p) for p in ml_service.predict_diabetes_batch(rows, include_recommendations=False)]
+    except Exception:
+        # A malformed row fails the whole batch; isolate it
+        results = []
+        for row in rows:
+            try:
+                results.append(to_result(ml_service.predict_diabetes_batch([row], False)[0]))
+            except Exception as e:
+                logger.warning(f"Could not re-score diabetes input {row}: {e}")
+                results.append(None)
+        return results
+
+
+def _score_brain_tumor(
+    predictions: List[Prediction],
+    batch_size: int
+) -> List[Optional[Dict[str, Any]]]:
+    """Score stored MRI uploads in fixed-size batches; studies are scored one by one"""
+    from app.services.image_preprocessing import image_preprocessor
+    from app.services.ml_service import ml_service
+    from app.services.volume_loader import load_volume
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(predictions)
+    pending: List[Tuple[int, bytes, str]] = []
+
+    def flush():
+        if not pending:
+            return
+        images = image_preprocessor.preprocess_batch(
+            [data for _, data, _ in pending],
+            content_hashes=[content_hash for _, _, content_hash in pending]
+        )
+        for (position, _, _), result in zip(pending, ml_service.predict_brain_tumor_many(images)):
+            results[position] = result
+        pending.clear()
+
+    for position, prediction in enumerate(predictions):
+        input_data = prediction.input_data or {}
+        file_path = input_data.get("file_path")
+        try:
+            if input_data.get("study"):
+                results[position] = ml_service.predict_brain_tumor_study(load_volume(file_path))
+                continue
+            data = Path(file_path).read_bytes()
+        except Exception as e:
+            logger.warning(f"Could not read upload for prediction {prediction.id}: {e}")
+            continue
+
+        content_hash = input_data.get("sha256") or hashlib.sha256(data).hexdigest()
+        pending.append((position, data, content_hash))
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+
+    return results
+
+
+def _iter_chunks(read_db, query, after_id: Optional[str], chunk_size: int):
+    """
+    Yield lists of predictions in id order, starting after ``after_id``
+
+    Uses a server-side cursor where the driver supports one (PostgreSQL).
+    SQLite cannot commit on another connection while a read is in
+    progress, so there each chunk is fetched as its own keyset page.
+    """
+    if after_id is not None:
+        query = query.where(Prediction.id > after_id)
+
+    if engine.dialect.supports_server_side_cursors:
+        result = read_db.execute(query.execution_options(yield_per=chunk_size))
+        for chunk in result.scalars().partitions(chunk_size):
+            yield chunk
+            read_db.expunge_all()
+        return
+
+    while True:
+        chunk = read_db.execute(query.limit(chunk_size)).scalars().all()
+        if not chunk:
+            return
+        yield chunk
+        read_db.expunge_all()
+        read_db.rollback()
+        query = query.where(Prediction.id > chunk[-1].id)
+
+
+def rescore_partition(
+    prediction_type: str,
+    version: Optional[str],
+    low: Optional[str],
+    high: Optional[str],
+    checkpoint_path: str,
+    run_id: str,
+    chunk_size: int,
+    batch_size: int
+) -> Dict[str, Any]:
+    """
+    Re-score every prediction of one type whose id is in [low, high)
+
+    Runs in a worker process: connections inherited from the parent are
+    dropped and the model is loaded locally. Activating ``version`` here
+    only affects this process; the serving workers' ACTIVE pointer is not
+    touched.
+
+    Returns:
+        The final checkpoint contents
+    """
+    from app.services.ml_service import ml_service
+
+    engine.dispose(close=False)
+
+    if version is not None:
+        ml_service.registry.activate(prediction_type, version)
+    entry = ml_service.registry.get(prediction_type)
+    if entry is None:
+        raise RuntimeError(f"No {prediction_type} model available")
+
+    checkpoint = Checkpoint(Path(checkpoint_path))
+    if checkpoint.model_version != entry.version:
+        checkpoint.reset(entry.version)
+    if checkpoint.done:
+        return checkpoint.to_dict()
+
+    query = select(Prediction).where(Prediction.prediction_type == prediction_type)
+    if low is not None:
+        query = query.where(Prediction.id >= low)
+    if high is not None:
+        query = query.where(Prediction.id < high)
+    query = query.order_by(Prediction.id)
+
+    # The streaming cursor needs its own connection: committing on it
+    # would close a server-side cursor
+    read_db = SessionLocal()
+    write_db = SessionLocal()
+    try:
+        for chunk in _iter_chunks(read_db, query, checkpoint.last_id, chunk_size):
+            if prediction_type == "diabetes":
+                results = _score_diabetes(chunk)
+            else:
+                results = _score_brain_tumor(chunk, batch_size)
+
+            rows = []
+            for prediction, result in zip(chunk, results):
+                if result is None:
+                    checkpoint.failed += 1
+                    continue
+                rows.append(_rescore_row(prediction, run_id, result))
+                if result["result"] != prediction.result:
+                    checkpoint.changed += 1
+
+            if rows:
+                # Delete-then-insert keeps a chunk replayed after a crash idempotent
+                write_db.execute(
+                    delete(PredictionRescore).where(
+                        PredictionRescore.prediction_id.in_([row["prediction_id"] for row in rows]),
+                        PredictionRescore.model_version == entry.version
+                    )
+                )
+                write_db.execute(insert(PredictionRescore), rows)
+                write_db.commit()
+
+            checkpoint.processed += len(chunk)
+            checkpoint.last_id = chunk[-1].id
+            checkpoint.save()
+            logger.info(
+                f"[{low or 'start'}..{high or 'end'}) re-scored {checkpoint.processed} "
+                f"{prediction_type} predictions ({checkpoint.failed} failed)"
+            )
+
+        checkpoint.done = True
+        checkpoint.save()
+    finally:
+        read_db.close()
+        write_db.close()
+
+    return checkpoint.to_dict()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli.rescore",
+        description="Re-score stored predictions with a model version"
+    )
+    parser.add_argument("--type", choices=PREDICTION_TYPES, required=True, dest="prediction_type")
+    parser.add_argument("--version", help="Model version to score with (default: the active version)")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel worker processes")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Predictions streamed and committed per chunk")
+    parser.add_argument("--batch-size", type=int, default=32, help="Images per forward pass")
+    parser.add_argument("--run-id", help="Name of this run (default: <type>-<version>)")
+    parser.add_argument("--checkpoint-dir", default="rescore_checkpoints")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    require_tables(PredictionRescore.__tablename__)
+
+    workers = max(1, args.workers)
+    run_id = args.run_id or f"{args.prediction_type}-{args.version or 'active'}"
+    checkpoint_dir = Path(args.checkpoint_dir)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = [
+        (
+            args.prediction_type,
+            args.version,
+            low,
+            high,
+            str(checkpoint_dir / f"{run_id}-{index + 1:03d}-of-{workers:03d}.json"),
+            run_id,
+            args.chunk_size,
+            args.batch_size
+        )
+        for index, (low, high) in enumerate(partition_bounds(workers))
+    ]
+
+    started = time.perf_counter()
+    if workers == 1:
+        summaries = [rescore_partition(*jobs[0])]
+    else:
+        # Spawned workers load their own model and database connections
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            summaries = list(pool.map(rescore_partition, *zip(*jobs)))
+
+    totals = {
+        key: sum(summary[key] for summary in summaries)
+        for key in ("processed", "failed", "changed")
+    }
+    logger.info(
+        f"Run {run_id} finished in {time.perf_counter() - started:.1f}s: "
+        f"{totals['processed']} processed, {totals['failed']} failed, "
+        f"{totals['changed']} with a different result"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,31 +3,87 @@ Database configuration and session management
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_pool import instrument_pool, pool_options
+from app.core.replicas import REPLICA, ReplicaSet, RoutingSession, db_route, replica_urls
 
-# Create database engine
+# Async drivers for the synchronous URL schemes used in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite"
+}
+
+
+def async_database_url(url: str) -> str:
+    """Swap a synchronous database URL to its async driver"""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+# Create database engine; used by background threads, CLIs and table creation
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=False
+    echo=False,
+    **pool_options(settings.DATABASE_URL)
 )
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers, so queries never block the event loop
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    echo=False,
+    **pool_options(settings.DATABASE_URL, asynchronous=True)
+)
+
+# Pool usage per engine, reported on /metrics/database
+async_pool_metrics = instrument_pool(async_engine.sync_engine, "async")
+sync_pool_metrics = instrument_pool(engine, "sync")
+
+# Read replicas for GET requests; empty when DATABASE_REPLICA_URLS is unset
+replica_set = ReplicaSet([async_database_url(url) for url in replica_urls()])
+
+# Objects stay usable after commit; lazy loads are not possible on AsyncSession
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Create Base class for models
 Base = declarative_base()
 
 
 # Dependency to get database session
-def get_db():
+async def get_db():
     """
-    Dependency function to get database session
+    Dependency function to get an async database session
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
+        if replica_set and db_route.get() == REPLICA:
+            replica = replica_set.choose()
+            if replica is not None:
+                db.info["replica"] = replica.engine.sync_engine
         yield db
-    finally:
-        db.close()
+
+
+def pool_status():
+    """
+    Connection pool usage of both engines in this worker
+    """
+    status = {
+        "async": async_pool_metrics.snapshot(async_engine.sync_engine.pool),
+        "sync": sync_pool_metrics.snapshot(engine.pool)
+    }
+    for replica in replica_set.replicas:
+        status[replica.name] = replica.metrics.snapshot(replica.engine.sync_engine.pool)
+    return status
@@ -0,0 +1,265 @@
+"""
+Connection pool configuration and metrics
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pre-ping strategies accepted by DB_POOL_PRE_PING
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+# Checkout waits kept for the percentiles in the metrics snapshot
+WAIT_SAMPLE_SIZE = 1024
+
+
+class PoolMetrics:
+    """
+    Counters for one engine's connection pool
+
+    Fed by the measured pool classes (checkout wait and timeouts) and by
+    pool events (checkouts, connection churn, ping failures). All counts
+    are per worker process.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Label for the engine in the metrics output
+        """
+        self.name = name
+        self.started_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.waits = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self.checked_out = 0
+        self.checked_out_peak = 0
+        self.overflow_peak = 0
+        self.opened = 0
+        self.closed = 0
+        self.invalidated = 0
+        self.pings = 0
+        self.ping_failures = 0
+
+    def record_wait(self, seconds: float, pool):
+        with self.lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.waits.append(seconds)
+            if isinstance(pool, QueuePool):
+                self.overflow_peak = max(self.overflow_peak, pool.overflow())
+
+    def record_timeout(self):
+        with self.lock:
+            self.timeouts += 1
+
+    def record_checkout(self):
+        with self.lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.checked_out_peak = max(self.checked_out_peak, self.checked_out)
+
+    def record_checkin(self):
+        with self.lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        """
+        Current pool usage and counters since the pool was created
+        """
+        with self.lock:
+            waits = sorted(self.waits)
+            uptime = max(time.monotonic() - self.started_at, 1e-9)
+            report = {
+                "pid": os.getpid(),
+                "pool_class": type(pool).__name__,
+                "checked_out": self.checked_out,
+                "checked_out_peak": self.checked_out_peak,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_wait_ms": {
+                    "avg": round(self.wait_total / len(waits) * 1000, 3) if waits else 0.0,
+                    "p50": round(_percentile(waits, 0.5) * 1000, 3),
+                    "p95": round(_percentile(waits, 0.95) * 1000, 3),
+                    "p99": round(_percentile(waits, 0.99) * 1000, 3),
+                    "max": round(self.wait_max * 1000, 3)
+                },
+                "connections_opened": self.opened,
+                "connections_closed": self.closed,
+                "connections_invalidated": self.invalidated,
+                "churn_per_minute": round((self.opened + self.closed) / uptime * 60, 3),
+                "pings": self.pings,
+                "ping_failures": self.ping_failures
+            }
+        if isinstance(pool, QueuePool):
+            report.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "idle": pool.checkedin(),
+                # Negative until the pool has opened pool_size connections
+                "overflow": max(0, pool.overflow()),
+                "overflow_peak": self.overflow_peak,
+                "timeout_seconds": pool.timeout()
+            })
+        return report
+
+
+def _percentile(ordered, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MeasuredPoolMixin:
+    """
+    Times each checkout, including the wait for a free connection
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout()
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - started, self)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; counters carry over
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeasuredQueuePool(MeasuredPoolMixin, QueuePool):
+    pass
+
+
+class MeasuredAsyncQueuePool(MeasuredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Pools log under their class; keep these as quiet as SQLAlchemy's own pools
+for _pool_class in (MeasuredQueuePool, MeasuredAsyncQueuePool):
+    logging.getLogger(f"{__name__}.{_pool_class.__name__}").setLevel(logging.WARNING)
+
+
+def pool_options(url: str, asynchronous: bool = False) -> Dict[str, Any]:
+    """
+    Keyword arguments for create_engine built from the DB_POOL_* settings
+
+    In-memory SQLite keeps its single-connection pool and gets no sizing.
+
+    Args:
+        url: Database URL the engine is created for
+        asynchronous: Whether the engine runs on an async driver
+
+    Returns:
+        Pool arguments for create_engine / create_async_engine
+    """
+    if settings.DB_POOL_PRE_PING not in PRE_PING_STRATEGIES:
+        raise ValueError(
+            f"DB_POOL_PRE_PING must be one of {', '.join(PRE_PING_STRATEGIES)}"
+        )
+
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING == "always"}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+
+    options.update({
+        "poolclass": MeasuredAsyncQueuePool if asynchronous else MeasuredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_use_lifo": settings.DB_POOL_USE_LIFO
+    })
+    return options
+
+
+def instrument_pool(engine: Engine, name: str) -> PoolMetrics:
+    """
+    Attach metrics, and the idle pre-ping strategy, to an engine's pool
+
+    Args:
+        engine: Synchronous engine (``AsyncEngine.sync_engine`` for async ones)
+        name: Label for the engine in the metrics output
+
+    Returns:
+        The metrics collector for the pool
+    """
+    metrics = PoolMetrics(name)
+    pool = engine.pool
+    if isinstance(pool, MeasuredPoolMixin):
+        pool.metrics = metrics
+    ping_idle = settings.DB_POOL_PRE_PING == "idle"
+    idle_seconds = settings.DB_POOL_PRE_PING_IDLE_SECONDS
+
+    # Listeners registered on the pool survive engine.dispose()
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        with metrics.lock:
+            metrics.opened += 1
+
+    @event.listens_for(pool, "close")
+    def on_close(dbapi_connection, connection_record):
+        with metrics.lock:
+            metrics.closed += 1
+
+    @event.listens_for(pool, "close_detached")
+    def on_close_detached(dbapi_connection):
+        with metrics.lock:
+            metrics.closed += 1
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        with metrics.lock:
+            metrics.invalidated += 1
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.pop("checked_in_at", None)
+        if ping_idle and checked_in_at is not None and time.monotonic() - checked_in_at > idle_seconds:
+            # Only connections that sat idle pay for a round trip
+            with metrics.lock:
+                metrics.pings += 1
+            try:
+                cursor = dbapi_connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+            except Exception as e:
+                with metrics.lock:
+                    metrics.ping_failures += 1
+                logger.warning(f"Discarding stale {name} connection: {e}")
+                # The pool retries the checkout with a new connection
+                raise DisconnectionError() from e
+        metrics.record_checkout()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        if connection_record is not None:
+            connection_record.info["checked_in_at"] = time.monotonic()
+        metrics.record_checkin()
+
+    return metrics
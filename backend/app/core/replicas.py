@@ -0,0 +1,232 @@
+"""
+Read replica routing
+
+Read-only requests run their SELECTs on a healthy replica, picked round-robin
+per session; writes, and every read in a session after its first write, go
+to the primary. A client that just wrote is pinned to the primary for a
+few seconds so it reads its own writes despite replication lag.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.core.db_pool import PoolMetrics, instrument_pool, pool_options
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+# Requests that may be served from a replica
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Request header overriding the route: "primary" or "replica"
+ROUTE_HEADER = b"x-db-route"
+
+# Cookie pinning a client that just wrote to the primary, holding an epoch deadline
+STICKY_COOKIE = "db_primary_until"
+
+# Route chosen for the current request; background work defaults to the primary
+db_route: contextvars.ContextVar[str] = contextvars.ContextVar("db_route", default=PRIMARY)
+
+
+class RoutingSession(Session):
+    """
+    Session sending plain SELECTs to ``info["replica"]`` until it writes
+
+    Flushes, DML and anything that is not a SELECT use the primary bind,
+    and once the session has written all later reads use it too, so a
+    request always sees its own changes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and not self.info.get("wrote"):
+            if not self._flushing and isinstance(clause, Select):
+                return replica
+            self.info["wrote"] = True
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+class Replica:
+    """One replica engine and its last health check result"""
+
+    def __init__(self, name: str, url: str, engine: AsyncEngine, metrics: PoolMetrics):
+        self.name = name
+        self.url = url
+        self.engine = engine
+        self.metrics = metrics
+        self.healthy = True
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.sessions = 0
+
+
+class ReplicaSet:
+    """
+    Replica engines with round-robin selection over the healthy ones
+    """
+
+    def __init__(self, urls: List[str], check_timeout: float = 2.0):
+        """
+        Args:
+            urls: Async database URLs of the replicas
+            check_timeout: Seconds a health check may take before the replica is marked down
+        """
+        self.check_timeout = check_timeout
+        self.replicas: List[Replica] = []
+        for index, url in enumerate(urls):
+            name = f"replica-{index + 1}"
+            engine = create_async_engine(url, echo=False, **pool_options(url, asynchronous=True))
+            metrics = instrument_pool(engine.sync_engine, name)
+            self.replicas.append(Replica(name, url, engine, metrics))
+        self._next = 0
+        self.primary_fallbacks = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """
+        Next healthy replica, or None when all are down
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.primary_fallbacks += 1
+            return None
+        replica = healthy[self._next % len(healthy)]
+        self._next += 1
+        replica.sessions += 1
+        return replica
+
+    async def _check(self, replica: Replica):
+        try:
+            async def ping():
+                async with replica.engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+
+            await asyncio.wait_for(ping(), timeout=self.check_timeout)
+            healthy, error = True, None
+        except Exception as e:
+            healthy, error = False, str(e) or type(e).__name__
+
+        if healthy != replica.healthy:
+            if healthy:
+                logger.info(f"Read replica {replica.name} is back; routing reads to it")
+            else:
+                logger.warning(f"Read replica {replica.name} failed its health check: {error}")
+        replica.healthy = healthy
+        replica.last_error = error
+        replica.checked_at = time.time()
+
+    async def check(self):
+        """
+        Ping every replica and update which ones receive reads
+        """
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "last_error": replica.last_error,
+                    "checked_at": replica.checked_at,
+                    "sessions": replica.sessions
+                }
+                for replica in self.replicas
+            ]
+        }
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+class DatabaseRouteMiddleware:
+    """
+    ASGI middleware choosing the database route for each request
+
+    Read methods go to a replica unless the ``X-DB-Route: primary`` header
+    is sent or the client wrote within the last ``sticky_seconds`` (tracked
+    with a cookie); ``X-DB-Route: replica`` skips that read-your-writes pin.
+    Other methods always use the primary, and a successful one sets the
+    cookie. The chosen route is echoed in the ``X-DB-Route`` response header.
+    """
+
+    def __init__(self, app, sticky_seconds: float):
+        """
+        Args:
+            app: ASGI application
+            sticky_seconds: How long a client stays on the primary after a write
+        """
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    def _route(self, scope) -> str:
+        if scope["method"] not in READ_METHODS:
+            return PRIMARY
+
+        override = None
+        cookie = b""
+        for name, value in scope.get("headers", []):
+            if name == ROUTE_HEADER:
+                override = value.decode("latin-1").strip().lower()
+            elif name == b"cookie":
+                cookie += value + b";"
+        if override in (PRIMARY, REPLICA):
+            return override
+
+        for part in cookie.decode("latin-1").split(";"):
+            key, _, value = part.strip().partition("=")
+            if key == STICKY_COOKIE:
+                try:
+                    if float(value) > time.time():
+                        return PRIMARY
+                except ValueError:
+                    pass
+        return REPLICA
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope)
+        pin = scope["method"] not in READ_METHODS and self.sticky_seconds > 0
+
+        async def send_with_route(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((ROUTE_HEADER, route.encode()))
+                if pin and message["status"] < 400:
+                    deadline = time.time() + self.sticky_seconds
+                    cookie = (
+                        f"{STICKY_COOKIE}={deadline:.3f}; Max-Age={int(self.sticky_seconds) + 1}; "
+                        f"Path=/; HttpOnly; SameSite=Lax"
+                    )
+                    headers.append((b"set-cookie", cookie.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = db_route.set(route)
+        try:
+            await self.app(scope, receive, send_with_route)
+        finally:
+            db_route.reset(token)
+
+
+def replica_urls() -> List[str]:
+    """Replica URLs from DATABASE_REPLICA_URLS (comma-separated)"""
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
@@ -7,13 +7,20 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from typing import List
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import async_engine, pool_status, replica_set
+from app.core.replicas import DatabaseRouteMiddleware
+from app.core.upload_limits import MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
 from app.api.v1 import auth, patients, doctors, ml_predictions, reports, chatbot, health_monitoring, telemedicine, family
 from app.services.websocket_manager import ConnectionManager
+from app.services.ml_service import ml_service
+from app.services.inference_executor import inference_executor
+from app.services.explainability import explanation_worker
+from app.services.drift_monitor import drift_monitor
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +33,44 @@ logger = logging.getLogger(__name__)
 manager = ConnectionManager()
 
 
+async def watch_model_versions():
+    """
+    Periodically hot-swap to model versions activated by other workers
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(settings.MODEL_VERSION_POLL_SECONDS)
+        try:
+            await loop.run_in_executor(None, ml_service.sync_model_versions)
+        except Exception as e:
+            logger.error(f"Error syncing model versions: {e}")
+
+
+async def flush_drift_statistics():
+    """
+    Periodically write this worker's input drift statistics to the database
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(settings.DRIFT_FLUSH_SECONDS)
+        try:
+            await loop.run_in_executor(None, drift_monitor.flush)
+        except Exception as e:
+            logger.error(f"Error flushing drift statistics: {e}")
+
+
+async def watch_replicas():
+    """
+    Periodically health-check read replicas so reads skip the ones that are down
+    """
+    while True:
+        await asyncio.sleep(settings.DB_REPLICA_HEALTH_CHECK_SECONDS)
+        try:
+            await replica_set.check()
+        except Exception as e:
+            logger.error(f"Error checking read replicas: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -34,25 +79,49 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting CuraGenie Backend...")
     
-    # Create database tables
-    try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully")
-    except Exception as e:
-        logger.error(f"Error creating database tables: {e}")
+    # The schema is owned by migrations (python -m app.cli.migrate), run once
+    # before the workers start; workers never create or inspect tables
     
-    # Load ML models
-    try:
-        from app.services.ml_service import MLService
-        ml_service = MLService()
-        logger.info("ML models loaded successfully")
-    except Exception as e:
-        logger.error(f"Error loading ML models: {e}")
+    # Read replicas receive GET traffic only once they answer a health check
+    replica_watcher = None
+    if replica_set:
+        await replica_set.check()
+        replica_watcher = asyncio.create_task(watch_replicas())
+    
+    # Warm up ML models; otherwise they load on first prediction
+    if settings.ML_WARMUP_ON_STARTUP:
+        await asyncio.get_running_loop().run_in_executor(None, ml_service.warm_up)
+    
+    # Shadow versions load off the event loop without delaying startup
+    asyncio.get_running_loop().run_in_executor(None, ml_service.load_shadow_models)
+    
+    # Follow model versions activated through other workers
+    version_watcher = None
+    if settings.MODEL_VERSION_POLL_SECONDS > 0:
+        version_watcher = asyncio.create_task(watch_model_versions())
+    
+    # Input statistics are kept in memory and written out in windows
+    drift_flusher = None
+    if settings.DRIFT_MONITORING_ENABLED and settings.DRIFT_FLUSH_SECONDS > 0:
+        drift_flusher = asyncio.create_task(flush_drift_statistics())
     
     yield
     
     # Shutdown
     logger.info("Shutting down CuraGenie Backend...")
+    if version_watcher is not None:
+        version_watcher.cancel()
+    if drift_flusher is not None:
+        drift_flusher.cancel()
+        await asyncio.get_running_loop().run_in_executor(None, drift_monitor.flush)
+    if replica_watcher is not None:
+        replica_watcher.cancel()
+    explanation_worker.stop()
+    ml_service.shadow.shutdown()
+    await ml_service.brain_tumor_batcher.stop()
+    inference_executor.shutdown()
+    await async_engine.dispose()
+    await replica_set.dispose()
 
 
 # Initialize FastAPI app
@@ -66,6 +135,22 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Reject oversized uploads while they stream in
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/v1/ml/predict-brain-tumor": settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD,
+        "/api/v1/ml/predict-brain-tumor/study": settings.BRAIN_TUMOR_STUDY_MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD
+    }
+)
+
+# Send read-only requests to replicas when any are configured
+if replica_set:
+    app.add_middleware(
+        DatabaseRouteMiddleware,
+        sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS
+    )
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -90,14 +175,36 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Detailed health check endpoint"""
+    models_ready = ml_service.registry.ready
     return {
-        "status": "healthy",
+        "status": "healthy" if models_ready else "degraded",
         "database": "connected",
-        "ml_models": "loaded",
+        "ml_models": "ready" if models_ready else "not ready",
+        "ml_models_detail": {
+            name: report["state"] for name, report in ml_service.registry.status().items()
+        },
         "version": settings.VERSION
     }
 
 
+@app.get("/metrics/database")
+async def database_metrics():
+    """
+    Connection pool usage for this worker; multiply by the worker count to size the database
+    """
+    return {
+        "pool_settings": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "timeout_seconds": settings.DB_POOL_TIMEOUT,
+            "recycle_seconds": settings.DB_POOL_RECYCLE,
+            "pre_ping": settings.DB_POOL_PRE_PING
+        },
+        "engines": pool_status(),
+        "read_replicas": replica_set.status() if replica_set else None
+    }
+
+
 # WebSocket endpoint for real-time updates
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
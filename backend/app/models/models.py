@@ -2,7 +2,7 @@
 Database models for CuraGenie
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, Boolean, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, Boolean, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -91,6 +91,9 @@ class MedicalRecord(Base):
 class Prediction(Base):
     """ML Prediction results model"""
     __tablename__ = "predictions"
+    __table_args__ = (
+        Index("ix_predictions_patient_created", "patient_id", "created_at"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     patient_id = Column(String, ForeignKey("patients.id"))
@@ -109,6 +112,49 @@ class Prediction(Base):
     
     # Relationships
     patient = relationship("Patient", back_populates="predictions")
+    rescores = relationship("PredictionRescore", back_populates="prediction")
+
+
+class PredictionRescore(Base):
+    """Result of re-scoring a stored prediction with another model version"""
+    __tablename__ = "prediction_rescores"
+    __table_args__ = (
+        UniqueConstraint("prediction_id", "model_version", name="uq_prediction_rescores_version"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    prediction_id = Column(String, ForeignKey("predictions.id"), index=True, nullable=False)
+    prediction_type = Column(String)
+    model_version = Column(String, nullable=False)
+    run_id = Column(String, index=True)
+    result = Column(String)
+    confidence_score = Column(Float)
+    risk_level = Column(String)
+    detailed_analysis = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    prediction = relationship("Prediction", back_populates="rescores")
+
+
+class FeatureDriftWindow(Base):
+    """Streaming statistics of one model input feature over a time window, or its reference"""
+    __tablename__ = "feature_drift_windows"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    model_name = Column(String, index=True, nullable=False)
+    feature = Column(String, nullable=False)
+    is_reference = Column(Boolean, default=False, nullable=False)
+    window_start = Column(DateTime(timezone=True))
+    window_end = Column(DateTime(timezone=True), index=True)
+    count = Column(Integer, nullable=False)
+    mean = Column(Float)
+    variance = Column(Float)
+    minimum = Column(Float)
+    maximum = Column(Float)
+    quantiles = Column(JSON)  # {quantile: value}
+    histogram = Column(JSON)  # bin counts, including open-ended outer bins
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 class DoctorReview(Base):
@@ -129,6 +175,10 @@ class DoctorReview(Base):
 class Appointment(Base):
     """Appointments model"""
     __tablename__ = "appointments"
+    __table_args__ = (
+        Index("ix_appointments_patient_status_date", "patient_id", "status", "appointment_date"),
+        Index("ix_appointments_doctor_status_date", "doctor_id", "status", "appointment_date"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     patient_id = Column(String, ForeignKey("patients.id"))
@@ -149,6 +199,9 @@ class Appointment(Base):
 class ChatMessage(Base):
     """AI Chatbot conversation history"""
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_user_session_created", "user_id", "session_id", "created_at"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id"))
@@ -162,6 +215,9 @@ class ChatMessage(Base):
 class HealthMetric(Base):
     """Real-time health monitoring metrics"""
     __tablename__ = "health_metrics"
+    __table_args__ = (
+        Index("ix_health_metrics_patient_type_recorded", "patient_id", "metric_type", "recorded_at"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     patient_id = Column(String, ForeignKey("patients.id"))
@@ -198,6 +254,9 @@ class Prescription(Base):
 class FamilyMember(Base):
     """Family members for family health management"""
     __tablename__ = "family_members"
+    __table_args__ = (
+        Index("ix_family_members_primary_user_active", "primary_user_id", "is_active"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     primary_user_id = Column(String, ForeignKey("users.id"))  # Parent/Guardian
@@ -229,6 +288,9 @@ class FamilyMember(Base):
 class FamilyHealthTimeline(Base):
     """Timeline of health events for family"""
     __tablename__ = "family_health_timeline"
+    __table_args__ = (
+        Index("ix_family_health_timeline_member_date", "family_member_id", "event_date"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     family_member_id = Column(String, ForeignKey("family_members.id"))
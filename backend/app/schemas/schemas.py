@@ -2,8 +2,8 @@
 Pydantic schemas for request/response validation
 """
 
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -156,6 +156,57 @@ class DiabetesInput(BaseModel):
     age: int = Field(ge=1, le=120)
 
 
+class DiabetesBatchInput(BaseModel):
+    rows: List[DiabetesInput]
+
+
+DiabetesFeature = Literal[
+    "pregnancies", "glucose_level", "blood_pressure", "skin_thickness",
+    "insulin", "bmi", "diabetes_pedigree", "age"
+]
+
+
+class WhatIfRange(BaseModel):
+    """Evenly spaced values of one feature, from start to stop inclusive"""
+    feature: DiabetesFeature
+    start: float
+    stop: float
+    steps: int = Field(default=20, ge=2, le=500)
+
+
+class DiabetesWhatIfInput(BaseModel):
+    input: DiabetesInput
+    ranges: List[WhatIfRange] = Field(min_length=1, max_length=3)
+    
+    @model_validator(mode="after")
+    def check_ranges(self):
+        features = [r.feature for r in self.ranges]
+        if len(set(features)) != len(features):
+            raise ValueError("Each feature can only be varied once")
+        for r in self.ranges:
+            bounds = DiabetesInput.model_fields[r.feature].metadata
+            low = next(m.ge for m in bounds if hasattr(m, "ge"))
+            high = next(m.le for m in bounds if hasattr(m, "le"))
+            if not (low <= r.start <= high and low <= r.stop <= high):
+                raise ValueError(f"{r.feature} range must lie within [{low}, {high}]")
+        return self
+
+
+class WhatIfAxis(BaseModel):
+    feature: str
+    values: List[float]
+
+
+class DiabetesWhatIfResponse(BaseModel):
+    baseline: Dict[str, Any]
+    axes: List[WhatIfAxis]
+    probabilities: List[Any]  # nested one level per axis
+    risk_thresholds: Dict[str, float]
+    lowest_risk: Dict[str, Any]
+    points: int
+    model_version: Optional[str] = None
+
+
 class PredictionBase(BaseModel):
     prediction_type: PredictionType
     input_data: Dict[str, Any]
@@ -200,6 +251,26 @@ class DiabetesPredictionResponse(BaseModel):
     risk_level: str
     risk_factors: List[str]
     recommendations: List[str]
+    model_version: Optional[str] = None
+
+
+class DiabetesBatchItem(BaseModel):
+    prediction_id: str
+    result: str
+    probability: float
+    risk_level: str
+    risk_factors: List[str]
+    model_version: Optional[str] = None
+
+
+class DiabetesBatchPredictionResponse(BaseModel):
+    total: int
+    risk_level_counts: Dict[str, int]
+    predictions: List[DiabetesBatchItem]
+
+
+class ModelActivateRequest(BaseModel):
+    version: str
 
 
 # Appointment Schemas
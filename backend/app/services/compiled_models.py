@@ -0,0 +1,149 @@
+"""
+Compiled fast paths for linear scikit-learn models
+Evaluates logistic models with plain NumPy, skipping sklearn input validation
+"""
+
+import logging
+from typing import Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Maximum absolute probability difference tolerated by the parity check
+PARITY_TOLERANCE = 1e-9
+
+
+class CompiledLogisticModel:
+    """
+    Binary logistic model reduced to a coefficient vector and intercept
+
+    Exposes the estimator interface used by ``MLService`` (``predict_proba``,
+    ``predict``, ``classes_``) so it can stand in for the original estimator,
+    which stays available as ``estimator``.
+    """
+
+    def __init__(
+        self,
+        coef: np.ndarray,
+        intercept: float,
+        classes: np.ndarray,
+        estimator: Any
+    ):
+        """
+        Initialize the compiled model
+
+        Args:
+            coef: Coefficients of shape (n_features,) in input column order
+            intercept: Intercept of the decision function
+            classes: The estimator's ``classes_``
+            estimator: Original estimator, kept for fallback and introspection
+        """
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.classes_ = classes
+        self.estimator = estimator
+        self.n_features_in_ = self.coef.shape[0]
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Linear decision function X @ coef + intercept"""
+        return X @ self.coef + self.intercept
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities of shape (N, 2), as sklearn returns them"""
+        # Numerically stable sigmoid: exp(-log(1 + exp(-z)))
+        positive = np.exp(-np.logaddexp(0.0, -self.decision_function(X)))
+        proba = np.empty((X.shape[0], 2), dtype=np.float64)
+        proba[:, 1] = positive
+        proba[:, 0] = 1.0 - positive
+        return proba
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predicted class labels"""
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
+def _extract_linear_parameters(estimator: Any):
+    """
+    Return (coef, intercept) for supported binary logistic estimators
+
+    Supports ``LogisticRegression`` and a ``Pipeline`` of ``StandardScaler``
+    steps ending in one, with the scalers folded into the coefficients.
+    Returns None for anything else.
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    scalers = []
+    final = estimator
+    if isinstance(estimator, Pipeline):
+        *steps, (_, final) = estimator.steps
+        for _, step in steps:
+            if not isinstance(step, StandardScaler):
+                return None
+            scalers.append(step)
+
+    if not isinstance(final, LogisticRegression):
+        return None
+    if final.coef_.shape[0] != 1 or len(final.classes_) != 2:
+        return None
+
+    coef = final.coef_[0].astype(np.float64)
+    intercept = float(final.intercept_[0])
+
+    # Fold scalers from the last to the first:
+    # w . (x - mean) / scale + b  ==  (w / scale) . x + (b - w . mean / scale)
+    for scaler in reversed(scalers):
+        scale = scaler.scale_ if scaler.with_std and scaler.scale_ is not None else 1.0
+        # mean_ is still fitted when with_mean=False, but transform ignores it
+        mean = scaler.mean_ if scaler.with_mean and scaler.mean_ is not None else 0.0
+        coef = coef / scale
+        intercept = intercept - float(np.sum(coef * mean))
+
+    return coef, intercept
+
+
+def compile_logistic_model(
+    estimator: Any,
+    reference_rows: np.ndarray
+) -> Optional[CompiledLogisticModel]:
+    """
+    Compile a fitted binary logistic model into a NumPy evaluator
+
+    The compiled model is only returned if it reproduces the estimator's
+    ``predict_proba`` on ``reference_rows`` within ``PARITY_TOLERANCE``;
+    otherwise (or for unsupported model types) None is returned and the
+    caller keeps using the estimator.
+
+    Args:
+        estimator: Fitted scikit-learn estimator
+        reference_rows: Representative input rows for the parity check
+
+    Returns:
+        The compiled model, or None
+    """
+    try:
+        parameters = _extract_linear_parameters(estimator)
+    except Exception as e:
+        logger.warning(f"Could not inspect {type(estimator).__name__} for compilation: {e}")
+        return None
+    if parameters is None:
+        return None
+
+    coef, intercept = parameters
+    if coef.shape[0] != reference_rows.shape[1]:
+        return None
+
+    compiled = CompiledLogisticModel(coef, intercept, estimator.classes_, estimator)
+    expected = estimator.predict_proba(reference_rows)
+    difference = float(np.max(np.abs(compiled.predict_proba(reference_rows) - expected)))
+    if difference > PARITY_TOLERANCE:
+        logger.warning(
+            f"Compiled {type(estimator).__name__} differs from predict_proba by "
+            f"{difference:.2e}, keeping the estimator"
+        )
+        return None
+
+    logger.info(f"Compiled {type(estimator).__name__} into a NumPy evaluator")
+    return compiled
@@ -0,0 +1,475 @@
+"""
+Input drift monitoring for ML models
+Keeps streaming per-feature statistics of model inputs and scores their
+drift against a stored reference profile
+"""
+
+import logging
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Quantiles reported for current and reference inputs
+DRIFT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# PSI thresholds commonly used for population stability
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+# Proportion floor so empty bins do not make PSI infinite
+PSI_EPSILON = 1e-4
+
+# Pixels below this preprocessed intensity count as background
+BACKGROUND_INTENSITY = 0.05
+
+
+class FeatureSpec:
+    """Histogram range of one monitored feature"""
+
+    def __init__(self, name: str, low: float, high: float, bins: int = 20):
+        self.name = name
+        self.low = low
+        self.high = high
+        self.bins = bins
+
+    @property
+    def edges(self) -> List[float]:
+        """Inner bin edges; the first and last bins are open-ended"""
+        return np.linspace(self.low, self.high, self.bins + 1).tolist()
+
+    def bin_indices(self, values: np.ndarray) -> np.ndarray:
+        """Bins of values: 0 is below ``low``, ``bins + 1`` is at or above ``high``"""
+        inner = 1 + np.floor((values - self.low) / (self.high - self.low) * self.bins).astype(np.int64)
+        return np.where(
+            values < self.low, 0,
+            np.where(values >= self.high, self.bins + 1, np.clip(inner, 1, self.bins))
+        )
+
+
+# Monitored inputs; diabetes ranges follow the DiabetesInput validation bounds
+DRIFT_FEATURES: Dict[str, List[FeatureSpec]] = {
+    "diabetes": [
+        FeatureSpec("pregnancies", 0, 20),
+        FeatureSpec("glucose_level", 0, 300),
+        FeatureSpec("blood_pressure", 0, 200),
+        FeatureSpec("skin_thickness", 0, 100),
+        FeatureSpec("insulin", 0, 900),
+        FeatureSpec("bmi", 0, 70),
+        FeatureSpec("diabetes_pedigree", 0, 3),
+        FeatureSpec("age", 0, 120)
+    ],
+    "brain_tumor": [
+        FeatureSpec("mean_intensity", 0, 1),
+        FeatureSpec("std_intensity", 0, 0.5),
+        FeatureSpec("background_fraction", 0, 1)
+    ]
+}
+
+
+def image_intensity_features(images: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-image intensity summaries of preprocessed MRI images
+
+    Args:
+        images: One (240, 240, 3) image or a stacked (N, 240, 240, 3) batch
+
+    Returns:
+        Arrays of length N keyed by brain_tumor feature name
+    """
+    images = np.asarray(images)
+    if images.ndim == 3:
+        images = images[np.newaxis]
+    flat = images.reshape(len(images), -1)
+    return {
+        "mean_intensity": flat.mean(axis=1),
+        "std_intensity": flat.std(axis=1),
+        "background_fraction": (flat < BACKGROUND_INTENSITY).mean(axis=1)
+    }
+
+
+class FeatureStats:
+    """Streaming moments and a fixed-bin histogram of one feature"""
+
+    def __init__(self, spec: FeatureSpec):
+        self.spec = spec
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.histogram = np.zeros(spec.bins + 2, dtype=np.int64)
+
+    @classmethod
+    def from_values(cls, spec: FeatureSpec, values) -> "FeatureStats":
+        """Statistics of a batch of values, computed with array operations; NaN values are skipped"""
+        stats = cls(spec)
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size:
+            stats.count = int(values.size)
+            stats.mean = float(values.mean())
+            stats._m2 = float(np.square(values - stats.mean).sum())
+            stats.minimum = float(values.min())
+            stats.maximum = float(values.max())
+            stats.histogram = np.bincount(spec.bin_indices(values), minlength=spec.bins + 2)
+        return stats
+
+    def update(self, values):
+        """Add a value or an array of values"""
+        self.merge(FeatureStats.from_values(self.spec, values))
+
+    def merge(self, other: "FeatureStats"):
+        """Combine with another batch (Chan's parallel formula for mean and variance)"""
+        if not other.count:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.histogram = self.histogram + other.histogram
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_row(self) -> Dict[str, Any]:
+        """Column values for a ``FeatureDriftWindow`` row"""
+        return {
+            "feature": self.spec.name,
+            "count": self.count,
+            "mean": self.mean,
+            "variance": self.variance,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "quantiles": histogram_quantiles(self.spec, self.histogram, self.minimum, self.maximum),
+            "histogram": self.histogram.tolist()
+        }
+
+
+def merge_rows(rows: Iterable[Any]) -> Optional[Dict[str, Any]]:
+    """
+    Combine stored windows of one feature into a single summary
+
+    Moments are merged with Chan's parallel formula and histograms are
+    summed; quantiles are read off the merged histogram.
+    """
+    count, mean, m2 = 0, 0.0, 0.0
+    minimum, maximum = math.inf, -math.inf
+    histogram: Optional[np.ndarray] = None
+    for row in rows:
+        if not row.count:
+            continue
+        delta = row.mean - mean
+        total = count + row.count
+        mean += delta * row.count / total
+        m2 += (row.variance or 0.0) * (row.count - 1) + delta ** 2 * count * row.count / total
+        count = total
+        minimum = min(minimum, row.minimum)
+        maximum = max(maximum, row.maximum)
+        counts = np.asarray(row.histogram, dtype=np.int64)
+        histogram = counts if histogram is None else histogram + counts
+    if count == 0:
+        return None
+    return {
+        "count": count,
+        "mean": mean,
+        "std": math.sqrt(m2 / (count - 1)) if count > 1 else 0.0,
+        "minimum": minimum,
+        "maximum": maximum,
+        "histogram": histogram
+    }
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    """PSI between two histograms over the same bins"""
+    e = np.maximum(expected / expected.sum(), PSI_EPSILON)
+    a = np.maximum(actual / actual.sum(), PSI_EPSILON)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def ks_statistic(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Kolmogorov-Smirnov distance between two histograms over the same bins"""
+    return float(np.abs(
+        np.cumsum(expected) / expected.sum() - np.cumsum(actual) / actual.sum()
+    ).max())
+
+
+def histogram_quantiles(
+    spec: FeatureSpec,
+    histogram: np.ndarray,
+    minimum: float,
+    maximum: float
+) -> Dict[str, float]:
+    """
+    Approximate quantiles by linear interpolation within histogram bins
+
+    Bin edges are clipped to the observed minimum and maximum, so the
+    outer bins span only the values seen and no quantile falls outside
+    the observed range.
+    """
+    edges = np.clip(np.concatenate([[spec.low], spec.edges, [spec.high]]), minimum, maximum)
+    cumulative = np.concatenate([[0], np.cumsum(histogram)]) / histogram.sum()
+    return {str(p): float(np.interp(p, cumulative, edges)) for p in DRIFT_QUANTILES}
+
+
+def drift_status(psi: float) -> str:
+    if psi >= PSI_SIGNIFICANT:
+        return "significant"
+    if psi >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+class DriftMonitor:
+    """
+    Streaming input statistics per model, flushed to the database in windows
+
+    ``record`` summarises each batch with array operations outside the
+    lock and only merges the per-feature summaries while holding it.
+    ``flush`` swaps the current window out under the lock and writes one
+    ``FeatureDriftWindow`` row per feature, so each worker process
+    contributes its own windows. Reports merge the windows in a time range
+    and compare them with the model's reference rows.
+    """
+
+    def __init__(self, features: Dict[str, List[FeatureSpec]], enabled: bool = True):
+        """
+        Initialize the monitor
+
+        Args:
+            features: Monitored features per model name
+            enabled: False turns ``record`` into a no-op
+        """
+        self.features = features
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._windows: Dict[str, Dict[str, FeatureStats]] = {}
+        self._window_start = datetime.now(timezone.utc)
+        for name in features:
+            self._reset(name)
+
+    def _reset(self, name: str):
+        self._windows[name] = {spec.name: FeatureStats(spec) for spec in self.features[name]}
+
+    def record(self, name: str, columns: Dict[str, np.ndarray]):
+        """
+        Add model inputs to the current window
+
+        Args:
+            name: Model name
+            columns: Values per feature; NaN (missing) values are skipped
+        """
+        if not self.enabled or name not in self._windows:
+            return
+        try:
+            specs = {spec.name: spec for spec in self.features[name]}
+            batch = [
+                FeatureStats.from_values(specs[feature], values)
+                for feature, values in columns.items()
+                if feature in specs
+            ]
+            with self._lock:
+                window = self._windows[name]
+                for stats in batch:
+                    window[stats.spec.name].merge(stats)
+        except Exception as e:
+            # Monitoring must never fail a prediction
+            logger.warning(f"Error recording drift statistics for {name}: {e}")
+
+    def flush(self):
+        """Write the current window of every model to the database and start a new one"""
+        from app.core.database import SessionLocal
+        from app.models.models import FeatureDriftWindow
+
+        with self._lock:
+            windows = self._windows
+            window_start = self._window_start
+            self._windows = {}
+            for name in self.features:
+                self._reset(name)
+            self._window_start = datetime.now(timezone.utc)
+
+        rows = [
+            FeatureDriftWindow(
+                model_name=name,
+                window_start=window_start,
+                window_end=self._window_start,
+                **stats.to_row()
+            )
+            for name, window in windows.items()
+            for stats in window.values()
+            if stats.count
+        ]
+        if not rows:
+            return
+
+        db = SessionLocal()
+        try:
+            db.add_all(rows)
+            db.commit()
+            logger.info(f"Flushed {len(rows)} drift statistics windows")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error flushing drift statistics: {e}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def _merged_by_feature(rows: Iterable[Any]) -> Dict[str, Optional[Dict[str, Any]]]:
+        grouped: Dict[str, List[Any]] = {}
+        for row in rows:
+            grouped.setdefault(row.feature, []).append(row)
+        return {feature: merge_rows(feature_rows) for feature, feature_rows in grouped.items()}
+
+    def set_reference(
+        self,
+        db,
+        name: str,
+        rows: List[Dict[str, Any]]
+    ):
+        """
+        Replace the stored reference profile of a model
+
+        Args:
+            db: Database session
+            name: Model name
+            rows: ``FeatureStats.to_row()``-shaped dictionaries, one per feature
+        """
+        from app.models.models import FeatureDriftWindow
+
+        db.query(FeatureDriftWindow).filter(
+            FeatureDriftWindow.model_name == name,
+            FeatureDriftWindow.is_reference.is_(True)
+        ).delete(synchronize_session=False)
+        now = datetime.now(timezone.utc)
+        db.add_all(
+            FeatureDriftWindow(model_name=name, is_reference=True, window_start=now, window_end=now, **row)
+            for row in rows
+        )
+        db.commit()
+
+    def reference_from_windows(
+        self,
+        db,
+        name: str,
+        since: datetime,
+        until: Optional[datetime] = None
+    ) -> int:
+        """
+        Promote the live windows in a time range to the reference profile
+
+        Returns:
+            Number of observations in the new reference
+        """
+        merged = self._merged_by_feature(self._window_rows(db, name, since, until))
+        specs = {spec.name: spec for spec in self.features[name]}
+        rows = []
+        for feature, summary in merged.items():
+            if summary is None or feature not in specs:
+                continue
+            rows.append({
+                "feature": feature,
+                "count": summary["count"],
+                "mean": summary["mean"],
+                "variance": summary["std"] ** 2,
+                "minimum": summary["minimum"],
+                "maximum": summary["maximum"],
+                "quantiles": histogram_quantiles(
+                    specs[feature], summary["histogram"], summary["minimum"], summary["maximum"]
+                ),
+                "histogram": summary["histogram"].tolist()
+            })
+        self.set_reference(db, name, rows)
+        return max((row["count"] for row in rows), default=0)
+
+    @staticmethod
+    def _window_rows(db, name: str, since: datetime, until: Optional[datetime] = None):
+        from app.models.models import FeatureDriftWindow
+
+        query = db.query(FeatureDriftWindow).filter(
+            FeatureDriftWindow.model_name == name,
+            FeatureDriftWindow.is_reference.is_(False),
+            FeatureDriftWindow.window_end >= since
+        )
+        if until is not None:
+            query = query.filter(FeatureDriftWindow.window_end <= until)
+        return query.all()
+
+    def report(self, db, name: str, hours: float) -> Dict[str, Any]:
+        """
+        PSI and KS drift of recent inputs against the reference profile
+
+        Args:
+            db: Database session
+            name: Model name
+            hours: Size of the recent window to compare
+
+        Returns:
+            Per-feature drift scores and summaries
+        """
+        from app.models.models import FeatureDriftWindow
+
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        current = self._merged_by_feature(self._window_rows(db, name, since))
+        reference = self._merged_by_feature(
+            db.query(FeatureDriftWindow).filter(
+                FeatureDriftWindow.model_name == name,
+                FeatureDriftWindow.is_reference.is_(True)
+            ).all()
+        )
+
+        features = {}
+        for spec in self.features[name]:
+            actual = current.get(spec.name)
+            expected = reference.get(spec.name)
+            report: Dict[str, Any] = {
+                "current": self._summary(spec, actual),
+                "reference": self._summary(spec, expected),
+                "psi": None,
+                "ks": None,
+                "status": "no_reference" if expected is None else "no_data"
+            }
+            if actual is not None and expected is not None:
+                psi = population_stability_index(expected["histogram"], actual["histogram"])
+                report.update(
+                    psi=psi,
+                    ks=ks_statistic(expected["histogram"], actual["histogram"]),
+                    status=drift_status(psi)
+                )
+            features[spec.name] = report
+
+        return {
+            "model": name,
+            "since": since.isoformat(),
+            "has_reference": bool(reference),
+            "features": features
+        }
+
+    @staticmethod
+    def _summary(spec: FeatureSpec, merged: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if merged is None:
+            return None
+        return {
+            "count": merged["count"],
+            "mean": merged["mean"],
+            "std": merged["std"],
+            "min": merged["minimum"],
+            "max": merged["maximum"],
+            "quantiles": histogram_quantiles(
+                spec, merged["histogram"], merged["minimum"], merged["maximum"]
+            )
+        }
+
+
+# Global drift monitor instance
+drift_monitor = DriftMonitor(DRIFT_FEATURES, enabled=settings.DRIFT_MONITORING_ENABLED)
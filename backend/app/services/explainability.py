@@ -0,0 +1,353 @@
+"""
+Deferred explainability heatmaps for brain tumor predictions
+Computes Grad-CAM (or occlusion) saliency maps on a low-priority background worker
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Explanation states stored in Prediction.detailed_analysis["explanation_status"]
+EXPLANATION_PENDING = "pending"
+EXPLANATION_RUNNING = "running"
+EXPLANATION_READY = "ready"
+EXPLANATION_FAILED = "failed"
+EXPLANATION_SKIPPED = "skipped"
+
+# Occlusion fallback: grid of patches masked one at a time
+OCCLUSION_GRID = 8
+OCCLUSION_BATCH_SIZE = 16
+
+
+def _last_conv_layer(model: Any):
+    """Last layer of a Keras model with a 4D (spatial) output, if any"""
+    for layer in reversed(getattr(model, "layers", [])):
+        try:
+            if len(layer.output.shape) == 4:
+                return layer
+        except (AttributeError, ValueError):
+            continue
+    return None
+
+
+def grad_cam(model: Any, image: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Grad-CAM saliency of the positive class for a Keras CNN
+
+    Args:
+        model: Keras model with at least one convolutional layer
+        image: Preprocessed image array (240, 240, 3)
+
+    Returns:
+        Heatmap of shape (240, 240) in [0, 1], or None if the model has no
+        usable convolutional layer
+    """
+    conv_layer = _last_conv_layer(model)
+    if conv_layer is None:
+        return None
+
+    import tensorflow as tf
+    from tensorflow import keras
+
+    grad_model = keras.Model(model.inputs[0], [conv_layer.output, model.outputs[0]])
+    with tf.GradientTape() as tape:
+        conv_output, prediction = grad_model(image[np.newaxis], training=False)
+        score = prediction[:, 0]
+    gradients = tape.gradient(score, conv_output)
+
+    # Channel weights are the spatially averaged gradients
+    weights = tf.reduce_mean(gradients, axis=(1, 2))
+    cam = tf.nn.relu(tf.reduce_sum(conv_output * weights[:, tf.newaxis, tf.newaxis, :], axis=-1))[0]
+    return _normalize(cv2.resize(cam.numpy().astype(np.float32), image.shape[1::-1]))
+
+
+def occlusion_map(model: Any, image: np.ndarray) -> np.ndarray:
+    """
+    Model-agnostic saliency: confidence drop when each grid patch is masked
+
+    Args:
+        model: Any model exposing ``predict(batch)``
+        image: Preprocessed image array (240, 240, 3)
+
+    Returns:
+        Heatmap of shape (240, 240) in [0, 1]
+    """
+    height, width = image.shape[:2]
+    patch_h, patch_w = height // OCCLUSION_GRID, width // OCCLUSION_GRID
+    fill = image.mean(axis=(0, 1))
+    base = float(np.asarray(model.predict(image[np.newaxis], verbose=0)).reshape(-1)[0])
+
+    cells = [(row, col) for row in range(OCCLUSION_GRID) for col in range(OCCLUSION_GRID)]
+    drops = np.zeros((OCCLUSION_GRID, OCCLUSION_GRID), dtype=np.float32)
+    batch = np.empty((OCCLUSION_BATCH_SIZE,) + image.shape, dtype=np.float32)
+    for start in range(0, len(cells), OCCLUSION_BATCH_SIZE):
+        chunk = cells[start:start + OCCLUSION_BATCH_SIZE]
+        for i, (row, col) in enumerate(chunk):
+            batch[i] = image
+            batch[i, row * patch_h:(row + 1) * patch_h, col * patch_w:(col + 1) * patch_w] = fill
+        scores = np.asarray(model.predict(batch[:len(chunk)], verbose=0)).reshape(len(chunk), -1)[:, 0]
+        for (row, col), score in zip(chunk, scores):
+            drops[row, col] = base - score
+
+    heatmap = cv2.resize(np.maximum(drops, 0), (width, height), interpolation=cv2.INTER_CUBIC)
+    return _normalize(heatmap)
+
+
+def _normalize(heatmap: np.ndarray) -> np.ndarray:
+    heatmap = np.maximum(heatmap, 0)
+    peak = float(heatmap.max())
+    return heatmap / peak if peak > 0 else heatmap
+
+
+def render_overlay(image: np.ndarray, heatmap: np.ndarray, path: Path):
+    """Write the heatmap blended over the preprocessed image as a PNG"""
+    base = cv2.cvtColor(np.clip(image * 255.0, 0, 255).astype(np.uint8), cv2.COLOR_RGB2BGR)
+    colored = cv2.applyColorMap((heatmap * 255).astype(np.uint8), cv2.COLORMAP_JET)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not cv2.imwrite(str(path), cv2.addWeighted(base, 0.6, colored, 0.4, 0)):
+        raise OSError(f"Could not write heatmap {path}")
+
+
+class ExplanationWorker:
+    """
+    Single low-priority thread computing heatmaps after predictions return
+
+    Jobs wait in a bounded queue; a full queue skips the explanation rather
+    than holding memory. Before each job the worker waits for the inference
+    executor to go idle (up to ``max_defer_seconds``), and the thread runs
+    at the lowest OS scheduling priority, so live inference always wins.
+
+    Heatmaps come from the model version recorded with the prediction, not
+    whichever version is active when the job runs; if that version can no
+    longer be loaded the explanation is skipped.
+    """
+
+    def __init__(self, queue_size: int = 256, max_defer_seconds: float = 30.0):
+        """
+        Initialize the worker; the thread starts on the first submitted job
+
+        Args:
+            queue_size: Maximum number of queued explanations
+            max_defer_seconds: Longest a job waits for the executor to go idle
+        """
+        self.max_defer_seconds = max_defer_seconds
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Last non-active model version loaded for an explanation, as (version, model)
+        self._version_cache: Optional[Tuple[str, Any]] = None
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def submit(self, prediction_id: str):
+        """
+        Queue a heatmap for a stored brain tumor prediction
+
+        Meant to run as a background task after the response is sent.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(prediction_id)
+        except queue.Full:
+            self.skipped += 1
+            logger.warning(f"Explanation queue full, skipping prediction {prediction_id}")
+            self._set_status(prediction_id, EXPLANATION_SKIPPED, reason="explanation queue full")
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="explanations", daemon=True)
+                self._thread.start()
+
+    def _lower_priority(self):
+        """Drop this thread to the lowest scheduling priority where supported"""
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"Could not lower explanation worker priority: {e}")
+
+    def _wait_for_idle(self):
+        from app.services.inference_executor import inference_executor
+
+        deadline = time.monotonic() + self.max_defer_seconds
+        while inference_executor.pending > 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _run(self):
+        self._lower_priority()
+        while True:
+            prediction_id = self._queue.get()
+            if prediction_id is None:
+                return
+            self._wait_for_idle()
+            try:
+                if self.explain(prediction_id) == EXPLANATION_SKIPPED:
+                    self.skipped += 1
+                else:
+                    self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error computing explanation for prediction {prediction_id}: {e}")
+                self._set_status(prediction_id, EXPLANATION_FAILED, error=str(e))
+
+    def _model_for_version(self, version: Optional[str]) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Brain tumor model of a recorded version
+
+        Returns:
+            (model, None), or (None, reason) if the version cannot be loaded
+        """
+        from app.services.ml_service import DUMMY_MODEL_VERSION, ml_service
+
+        if not version:
+            return None, "prediction has no recorded model version"
+
+        entry = ml_service.registry.get("brain_tumor")
+        if entry is not None and entry.version == version:
+            return entry.model, None
+        if self._version_cache is not None and self._version_cache[0] == version:
+            return self._version_cache[1], None
+        if version == DUMMY_MODEL_VERSION:
+            return None, "the development model that made the prediction cannot be reloaded"
+
+        try:
+            loaded = ml_service.load_brain_tumor_model(version)
+        except ValueError as e:
+            return None, f"model version {version} is no longer available: {e}"
+        if loaded is None:
+            return None, f"model version {version} cannot be loaded"
+        model, _ = loaded
+        self._version_cache = (version, model)
+        return model, None
+
+    def explain(self, prediction_id: str) -> str:
+        """
+        Compute and store the heatmap for one prediction (blocking)
+
+        Returns:
+            The final explanation status
+        """
+        from app.core.database import SessionLocal
+        from app.models.models import MedicalRecord, Prediction
+        from app.services.image_preprocessing import image_preprocessor
+
+        self._set_status(prediction_id, EXPLANATION_RUNNING)
+
+        db = SessionLocal()
+        try:
+            prediction = db.get(Prediction, prediction_id)
+            if prediction is None:
+                return EXPLANATION_SKIPPED
+
+            version = (prediction.detailed_analysis or {}).get("model_version")
+            model, reason = self._model_for_version(version)
+            if model is None:
+                logger.info(f"Skipping explanation for prediction {prediction_id}: {reason}")
+                prediction.detailed_analysis = {
+                    **(prediction.detailed_analysis or {}),
+                    "explanation_status": EXPLANATION_SKIPPED,
+                    "explanation_reason": reason
+                }
+                db.commit()
+                return EXPLANATION_SKIPPED
+
+            input_data = prediction.input_data or {}
+            image_path = Path(input_data["file_path"])
+            image = image_preprocessor.preprocess_mri_bytes(
+                image_path.read_bytes(), input_data.get("sha256")
+            )
+
+            heatmap = None
+            method = "grad_cam"
+            try:
+                heatmap = grad_cam(model, image)
+            except Exception as e:
+                logger.warning(f"Grad-CAM failed, falling back to occlusion: {e}")
+            if heatmap is None:
+                heatmap = occlusion_map(model, image)
+                method = "occlusion"
+
+            heatmap_path = settings.UPLOAD_DIR / "heatmaps" / f"{prediction_id}.png"
+            render_overlay(image, heatmap, heatmap_path)
+
+            if prediction.medical_record_id:
+                record = db.get(MedicalRecord, prediction.medical_record_id)
+                if record is not None:
+                    # JSON columns only persist reassigned values
+                    record.record_metadata = {
+                        **(record.record_metadata or {}),
+                        "heatmap_path": str(heatmap_path)
+                    }
+
+            prediction.detailed_analysis = {
+                **(prediction.detailed_analysis or {}),
+                "explanation_status": EXPLANATION_READY,
+                "explanation": {"method": method, "model_version": version}
+            }
+            db.commit()
+            return EXPLANATION_READY
+        finally:
+            db.close()
+
+    @staticmethod
+    def _set_status(
+        prediction_id: str,
+        state: str,
+        error: Optional[str] = None,
+        reason: Optional[str] = None
+    ):
+        from app.core.database import SessionLocal
+        from app.models.models import Prediction
+
+        db = SessionLocal()
+        try:
+            prediction = db.get(Prediction, prediction_id)
+            if prediction is None:
+                return
+            analysis = {**(prediction.detailed_analysis or {}), "explanation_status": state}
+            if error is not None:
+                analysis["explanation_error"] = error
+            if reason is not None:
+                analysis["explanation_reason"] = reason
+            prediction.detailed_analysis = analysis
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error updating explanation status for prediction {prediction_id}: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and job counters"""
+        return {
+            "queued": self._queue.qsize(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped
+        }
+
+    def stop(self):
+        """Let the worker finish its current job and exit"""
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+
+
+# Global explanation worker instance
+explanation_worker = ExplanationWorker(
+    queue_size=settings.EXPLANATION_QUEUE_SIZE,
+    max_defer_seconds=settings.EXPLANATION_MAX_DEFER_SECONDS
+)
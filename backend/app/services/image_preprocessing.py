@@ -2,26 +2,105 @@
 Image preprocessing for medical imaging
 """
 
+import hashlib
+import io
+import threading
+from concurrent.futures import Executor
 import cv2
 import numpy as np
 from PIL import Image
 import logging
-from typing import Tuple
+from typing import Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.services.tensor_cache import PreprocessedTensorCache
+from app.services.volume_loader import MedicalVolume, is_volume_path, load_volume
 
 logger = logging.getLogger(__name__)
 
+# Bump when the preprocessing pipeline changes so cached tensors are not reused
+PREPROCESSING_VERSION = 1
+
+# Test-time augmentation views produced by tta_views, in order
+TTA_VIEW_NAMES = ("horizontal_flip", "rotate_ccw", "rotate_cw")
+
+# JPEG decode scales, largest first; libjpeg's DCT scaling decodes straight
+# to 1/2, 1/4 or 1/8 resolution without materializing the full image
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2)
+)
+
 
 class ImagePreprocessor:
     """Image preprocessing for medical images"""
     
-    def __init__(self, target_size: Tuple[int, int] = (240, 240)):
+    def __init__(
+        self,
+        target_size: Tuple[int, int] = (240, 240),
+        reduced_decode: bool = True,
+        tensor_cache: Optional[PreprocessedTensorCache] = None
+    ):
         """
         Initialize image preprocessor
         
         Args:
             target_size: Target size for resizing images
+            reduced_decode: Decode large JPEGs at a reduced scale that still
+                covers the target size
+            tensor_cache: Optional disk cache for preprocessed tensors
         """
         self.target_size = target_size
+        self.reduced_decode = reduced_decode
+        self.tensor_cache = tensor_cache
+        # CLAHE objects and scratch buffers are not thread-safe; keep one set per thread
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # Pickled when sent to process-pool workers; thread-locals do not pickle
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def output_shape(self) -> Tuple[int, int, int]:
+        """Shape of one preprocessed image, (height, width, 3)"""
+        return (self.target_size[1], self.target_size[0], 3)
+    
+    @property
+    def cache_fingerprint(self) -> str:
+        """Short hash of every parameter that affects the preprocessed output"""
+        params = (
+            f"v{PREPROCESSING_VERSION}:{self.target_size[0]}x{self.target_size[1]}:"
+            f"reduced={self.reduced_decode}:clahe=2.0/8x8"
+        )
+        return hashlib.sha256(params.encode()).hexdigest()[:12]
+    
+    def _clahe(self):
+        """CLAHE instance for the calling thread"""
+        clahe = getattr(self._local, "clahe", None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            self._local.clahe = clahe
+        return clahe
+    
+    def _scratch(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Per-thread (resized, lab, luminance) uint8 buffers at the target size"""
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None or scratch[0].shape != self.output_shape:
+            height, width, _ = self.output_shape
+            scratch = (
+                np.empty((height, width, 3), dtype=np.uint8),
+                np.empty((height, width, 3), dtype=np.uint8),
+                np.empty((height, width), dtype=np.uint8)
+            )
+            self._local.scratch = scratch
+        return scratch
     
     def preprocess_mri_image(
         self,
@@ -37,68 +116,282 @@ class ImagePreprocessor:
             Preprocessed image array
         """
         try:
-            # Read image
-            image = cv2.imread(image_path)
+            # DICOM/NIfTI studies: use the central slice
+            if is_volume_path(image_path):
+                volume = load_volume(image_path)
+                return self.preprocess_volume_slice(volume, volume.num_slices // 2)
+            
+            # Read image (OpenCV decodes to BGR)
+            image = cv2.imread(image_path, self._decode_flag(image_path))
             
             if image is None:
                 # Try with PIL if OpenCV fails
-                pil_image = Image.open(image_path)
-                image = np.array(pil_image.convert('RGB'))
-            
-            # Convert BGR to RGB if needed
-            if len(image.shape) == 3 and image.shape[2] == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                image = self._pil_to_bgr(Image.open(image_path))
             
-            # Resize to target size
-            image = cv2.resize(image, self.target_size)
+            return self._preprocess_image(image)
+        
+        except Exception as e:
+            logger.error(f"Error preprocessing image: {e}")
+            raise
+    
+    def preprocess_mri_bytes(
+        self,
+        data: bytes,
+        content_hash: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Preprocess an in-memory MRI image for brain tumor detection
+        
+        Args:
+            data: Encoded image bytes (or any buffer)
+            content_hash: Hex SHA-256 of ``data``; enables the tensor cache
             
-            # Apply contrast enhancement
-            image = self._enhance_contrast(image)
+        Returns:
+            Preprocessed image array (read-only memory map on a cache hit)
+        """
+        try:
+            if content_hash is not None and self.tensor_cache is not None:
+                cached = self.tensor_cache.get(content_hash, self.cache_fingerprint)
+                if cached is not None:
+                    return cached
             
-            # Normalize pixel values to [0, 1]
-            image = image.astype(np.float32) / 255.0
+            image = self._preprocess_image(self._decode_bgr(data))
             
+            if content_hash is not None and self.tensor_cache is not None:
+                self.tensor_cache.put(content_hash, self.cache_fingerprint, image)
             return image
-        
         except Exception as e:
             logger.error(f"Error preprocessing image: {e}")
             raise
     
-    def _enhance_contrast(
+    def preprocess_batch(
         self,
-        image: np.ndarray
+        buffers: Sequence[bytes],
+        pool: Optional[Executor] = None,
+        out: Optional[np.ndarray] = None,
+        content_hashes: Optional[Sequence[str]] = None
     ) -> np.ndarray:
         """
-        Enhance image contrast using CLAHE
+        Decode and preprocess many encoded images into one contiguous array
+        
+        Every image is written straight into its row of the output; the
+        only per-image allocation is the decoded source image. OpenCV
+        releases the GIL, so passing a thread pool decodes and enhances
+        images in parallel.
         
         Args:
-            image: Input image array
+            buffers: Encoded image bytes (or any buffers)
+            pool: Optional executor to spread images over
+            out: Optional preallocated float32 array of shape (N, 240, 240, 3)
+            content_hashes: Hex SHA-256 per buffer; enables the tensor cache,
+                so cached images skip decoding
             
         Returns:
-            Contrast-enhanced image
+            Preprocessed float32 array of shape (N, 240, 240, 3) in [0, 1]
         """
-        try:
-            # Convert to LAB color space
-            lab = cv2.cvtColor(image, cv2.COLOR_RGB2LAB)
+        shape = (len(buffers),) + self.output_shape
+        if out is None:
+            out = np.empty(shape, dtype=np.float32)
+        elif out.shape != shape or out.dtype != np.float32:
+            raise ValueError(f"Output array must be float32 with shape {shape}")
+        
+        use_cache = content_hashes is not None and self.tensor_cache is not None
+        fingerprint = self.cache_fingerprint
+        
+        def preprocess(index: int):
+            if use_cache:
+                cached = self.tensor_cache.get(content_hashes[index], fingerprint)
+                if cached is not None:
+                    out[index] = cached
+                    return
             
-            # Split channels
-            l, a, b = cv2.split(lab)
+            self._preprocess_into(self._decode_bgr(buffers[index]), out[index])
             
-            # Apply CLAHE to L channel
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            l = clahe.apply(l)
+            if use_cache:
+                self.tensor_cache.put(content_hashes[index], fingerprint, out[index])
+        
+        if pool is None:
+            for index in range(len(buffers)):
+                preprocess(index)
+        else:
+            # Consume the iterator so worker exceptions are raised here
+            list(pool.map(preprocess, range(len(buffers))))
+        
+        return out
+    
+    def preprocess_volume_slice(
+        self,
+        volume: MedicalVolume,
+        index: int,
+        window_center: Optional[float] = None,
+        window_width: Optional[float] = None,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Preprocess one slice of a DICOM/NIfTI volume for brain tumor detection
+        
+        Only the requested slice is read from the volume.
+        
+        Args:
+            volume: Opened volume
+            index: Slice index
+            window_center: Window center (stored or automatic window if omitted)
+            window_width: Window width (stored or automatic window if omitted)
+            out: Optional preallocated float32 array of shape (240, 240, 3)
             
-            # Merge channels
-            lab = cv2.merge([l, a, b])
+        Returns:
+            Preprocessed image array
+        """
+        gray = volume.windowed_slice(index, window_center, window_width)
+        return self._preprocess_image(gray, out)
+    
+    def tta_views(
+        self,
+        image: np.ndarray,
+        rotation_degrees: float = 10.0
+    ) -> np.ndarray:
+        """
+        Augmented views of a preprocessed image for test-time augmentation
+        
+        Args:
+            image: Preprocessed image array (240, 240, 3)
+            rotation_degrees: Angle of the small rotations in both directions
+            
+        Returns:
+            float32 array of shape (3, 240, 240, 3) holding the views named
+            in ``TTA_VIEW_NAMES``
+        """
+        height, width = image.shape[:2]
+        views = np.empty((len(TTA_VIEW_NAMES),) + image.shape, dtype=np.float32)
+        np.copyto(views[0], image[:, ::-1])
+        
+        center = (width / 2.0, height / 2.0)
+        for row, angle in ((1, rotation_degrees), (2, -rotation_degrees)):
+            matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+            # Reflected borders avoid black corners the model never saw in training
+            cv2.warpAffine(
+                image, matrix, (width, height),
+                dst=views[row],
+                borderMode=cv2.BORDER_REFLECT_101
+            )
+        return views
+    
+    def decode_image(
+        self,
+        data: bytes
+    ) -> np.ndarray:
+        """
+        Decode an encoded image buffer into an RGB array without copying it
+        
+        Args:
+            data: Encoded image bytes (or any buffer)
             
-            # Convert back to RGB
-            enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
+        Returns:
+            RGB image array
+        """
+        return cv2.cvtColor(self._decode_bgr(data), cv2.COLOR_BGR2RGB)
+    
+    def _decode_bgr(
+        self,
+        data: bytes
+    ) -> np.ndarray:
+        """Decode an encoded image buffer into a BGR array, as OpenCV returns it"""
+        buffer = np.frombuffer(memoryview(data), dtype=np.uint8)
+        image = cv2.imdecode(buffer, self._decode_flag(io.BytesIO(data)))
+        
+        if image is None:
+            # Try with PIL if OpenCV fails
+            return self._pil_to_bgr(Image.open(io.BytesIO(data)))
+        
+        return image
+    
+    def _decode_flag(self, source) -> int:
+        """
+        OpenCV decode flag for an image, chosen from its header dimensions
+        
+        Only the header is parsed. JPEGs get the smallest DCT scale whose
+        output still covers the target size, so decode time and memory
+        follow the target size rather than the source size. Other formats
+        have no reduced decode and are read at full size.
+        
+        Args:
+            source: Image path or file-like object
             
-            return enhanced
+        Returns:
+            A cv2.IMREAD_* flag
+        """
+        if not self.reduced_decode:
+            return cv2.IMREAD_COLOR
+        
+        try:
+            with Image.open(source) as header:
+                if header.format != "JPEG":
+                    return cv2.IMREAD_COLOR
+                width, height = header.size
+        except Exception:
+            return cv2.IMREAD_COLOR
+        
+        target_width, target_height = self.target_size
+        for factor, flag in REDUCED_DECODE_FLAGS:
+            if width // factor >= target_width and height // factor >= target_height:
+                return flag
+        return cv2.IMREAD_COLOR
+    
+    def _pil_to_bgr(self, pil_image: Image.Image) -> np.ndarray:
+        """Convert a PIL image to a contiguous BGR array"""
+        if self.reduced_decode:
+            # JPEG only: pick the smallest DCT scale covering the target size
+            pil_image.draft('RGB', self.target_size)
+        return np.ascontiguousarray(np.array(pil_image.convert('RGB'))[:, :, ::-1])
+    
+    def _preprocess_image(
+        self,
+        image: np.ndarray,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Preprocess one decoded BGR (or grayscale) image into a new or given array"""
+        if out is None:
+            out = np.empty(self.output_shape, dtype=np.float32)
+        self._preprocess_into(image, out)
+        return out
+    
+    def _preprocess_into(
+        self,
+        image: np.ndarray,
+        out: np.ndarray
+    ):
+        """
+        Resize, enhance and normalize a decoded image into ``out``
+        
+        Works at the target size in per-thread scratch buffers: the image is
+        resized first and channel reordering is folded into the LAB
+        conversion, so nothing is copied at the source resolution.
         
+        Args:
+            image: Decoded BGR image, or a 2D grayscale image
+            out: float32 array of shape (240, 240, 3) receiving RGB values in [0, 1]
+        """
+        resized, lab, luminance = self._scratch()
+        
+        # Resize to target size
+        if image.ndim == 2:
+            cv2.cvtColor(cv2.resize(image, self.target_size), cv2.COLOR_GRAY2BGR, dst=resized)
+        else:
+            cv2.resize(image, self.target_size, dst=resized)
+        
+        # Apply contrast enhancement (CLAHE on the L channel) and convert to RGB
+        try:
+            cv2.cvtColor(resized, cv2.COLOR_BGR2LAB, dst=lab)
+            cv2.extractChannel(lab, 0, dst=luminance)
+            self._clahe().apply(luminance, dst=luminance)
+            cv2.insertChannel(luminance, lab, 0)
+            cv2.cvtColor(lab, cv2.COLOR_LAB2RGB, dst=resized)
         except Exception as e:
             logger.warning(f"Error enhancing contrast: {e}, returning original image")
-            return image
+            cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=resized)
+        
+        # Normalize pixel values to [0, 1]
+        np.divide(resized, np.float32(255.0), out=out)
     
     def validate_image(
         self,
@@ -133,7 +426,42 @@ class ImagePreprocessor:
             return True, "Valid image"
         except Exception as e:
             return False, f"Invalid image file: {str(e)}"
+    
+    def validate_image_bytes(
+        self,
+        data: bytes,
+        max_size_mb: int = 10
+    ) -> Tuple[bool, str]:
+        """
+        Validate an in-memory image
+        
+        Args:
+            data: Encoded image bytes
+            max_size_mb: Maximum allowed size in MB
+            
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        if not data:
+            return False, "File is empty"
+        
+        # Check size
+        if len(data) / (1024 * 1024) > max_size_mb:
+            return False, f"File size exceeds {max_size_mb}MB limit"
+        
+        # Check if buffer can be opened as image
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.verify()
+            return True, "Valid image"
+        except Exception as e:
+            return False, f"Invalid image file: {str(e)}"
 
 
 # Global preprocessor instance
-image_preprocessor = ImagePreprocessor()
+image_preprocessor = ImagePreprocessor(
+    tensor_cache=PreprocessedTensorCache(
+        settings.PREPROCESSED_CACHE_DIR,
+        settings.PREPROCESSED_CACHE_MAX_BYTES
+    ) if settings.PREPROCESSED_CACHE_ENABLED else None
+)
@@ -0,0 +1,165 @@
+"""
+Dedicated executor for blocking ML work
+Keeps OpenCV, Keras and scikit-learn calls off the event loop
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the executor has no room for another job"""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"Inference queue is full, retry after {retry_after}s")
+
+
+class InferenceExecutor:
+    """
+    Bounded executor for inference and preprocessing
+
+    A thread pool runs GIL-releasing kernels (OpenCV, TensorFlow, NumPy);
+    an optional process pool runs CPU-bound Python preprocessing. Admission
+    is bounded: once ``max_pending`` jobs are queued or running, new work is
+    rejected with ``InferenceQueueFull`` instead of piling up.
+    """
+
+    def __init__(
+        self,
+        thread_workers: int = 4,
+        process_workers: int = 0,
+        max_pending: int = 64,
+        retry_after: int = 1,
+        preprocess_workers: int = 4
+    ):
+        """
+        Initialize the executor
+
+        Args:
+            thread_workers: Size of the inference thread pool
+            process_workers: Size of the preprocessing process pool (0 disables it)
+            max_pending: Maximum number of admitted jobs (queued plus running)
+            retry_after: Seconds suggested to clients when saturated
+            preprocess_workers: Size of the pool used by admitted jobs to fan
+                out per-slice preprocessing
+        """
+        self.thread_workers = max(1, thread_workers)
+        self.process_workers = max(0, process_workers)
+        self.max_pending = max(1, max_pending)
+        self.retry_after = retry_after
+        self.preprocess_workers = max(1, preprocess_workers)
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._preprocess_pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        """Thread pool, created on first use"""
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.thread_workers,
+                thread_name_prefix="inference"
+            )
+        return self._thread_pool
+
+    @property
+    def cpu_pool(self) -> Executor:
+        """Process pool if configured, otherwise the thread pool"""
+        if self.process_workers == 0:
+            return self.thread_pool
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        return self._process_pool
+
+    @property
+    def preprocess_pool(self) -> ThreadPoolExecutor:
+        """
+        Thread pool for fan-out from a job already running on the thread pool
+
+        Kept separate so a job waiting on its sub-tasks can never starve
+        them of workers. Created on first use.
+        """
+        if self._preprocess_pool is None:
+            self._preprocess_pool = ThreadPoolExecutor(
+                max_workers=self.preprocess_workers,
+                thread_name_prefix="preprocess"
+            )
+        return self._preprocess_pool
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Reserve one admission slot for the duration of the block
+
+        Raises:
+            InferenceQueueFull: If ``max_pending`` jobs are already admitted
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise InferenceQueueFull(self.retry_after)
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def _dispatch(self, pool: Executor, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        async with self.slot():
+            return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable on the inference thread pool"""
+        return await self._dispatch(self.thread_pool, fn, *args, **kwargs)
+
+    async def run_cpu(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a CPU-bound callable on the preprocessing pool"""
+        return await self._dispatch(self.cpu_pool, fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current saturation of the executor"""
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "thread_workers": self.thread_workers,
+            "process_workers": self.process_workers,
+            "preprocess_workers": self.preprocess_workers
+        }
+
+    def shutdown(self):
+        """Shut down the worker pools"""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+        if self._preprocess_pool is not None:
+            self._preprocess_pool.shutdown(wait=False, cancel_futures=True)
+            self._preprocess_pool = None
+        logger.info("Inference executor shut down")
+
+
+# Global inference executor instance
+inference_executor = InferenceExecutor(
+    thread_workers=settings.INFERENCE_THREAD_WORKERS,
+    process_workers=settings.INFERENCE_PROCESS_WORKERS,
+    max_pending=settings.INFERENCE_MAX_PENDING,
+    retry_after=settings.INFERENCE_RETRY_AFTER_SECONDS,
+    preprocess_workers=settings.INFERENCE_PREPROCESS_WORKERS
+)
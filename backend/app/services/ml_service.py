@@ -4,84 +4,568 @@ Handles loading and inference of AI/ML models
 """
 
 import os
+import re
+import asyncio
+import importlib.util
 import logging
+import time
 import numpy as np
-from typing import Dict, Tuple, Optional, Any
+from collections import deque
+from typing import Callable, Dict, List, Tuple, Optional, Any
 from pathlib import Path
 import pickle
 
+from app.services.inference_executor import InferenceExecutor, inference_executor
+from app.services.model_registry import LoadedModel, ModelRegistry
+from app.services.compiled_models import compile_logistic_model
+from app.services.image_preprocessing import TTA_VIEW_NAMES, image_preprocessor
+from app.services.shadow import ShadowEvaluator
+from app.services.drift_monitor import drift_monitor, image_intensity_features
+from app.services.volume_loader import MedicalVolume, load_volume, select_slice_indices
+
 logger = logging.getLogger(__name__)
 
-# Try to import TensorFlow, but make it optional
-HAS_TENSORFLOW = False
-try:
-    import tensorflow as tf  # noqa: F401
-    from tensorflow import keras  # noqa: F401
-    from tensorflow.keras import layers  # noqa: F401
-    HAS_TENSORFLOW = True
-    logger.info("TensorFlow loaded successfully")
-except ImportError:
+# TensorFlow is optional and only imported when the brain tumor model loads,
+# so workers that never predict don't pay for it
+HAS_TENSORFLOW = importlib.util.find_spec("tensorflow") is not None
+if not HAS_TENSORFLOW:
     logger.warning("TensorFlow not available. Brain tumor predictions will use fallback.")
 
+# Model versions live in MODELS_DIR/<name>/<version>/
+MODEL_VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+MODEL_ARTIFACT_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "brain_tumor": ("*.keras", "*.h5"),
+    "diabetes": ("*.pkl",)
+}
+# Settings naming the pinned version and the legacy single-file path
+MODEL_VERSION_SETTINGS: Dict[str, str] = {
+    "brain_tumor": "BRAIN_TUMOR_MODEL_VERSION",
+    "diabetes": "DIABETES_MODEL_VERSION"
+}
+LEGACY_MODEL_PATH_SETTINGS: Dict[str, str] = {
+    "brain_tumor": "BRAIN_TUMOR_MODEL_PATH",
+    "diabetes": "DIABETES_MODEL_PATH"
+}
+# Settings naming the version shadowing each model
+SHADOW_VERSION_SETTINGS: Dict[str, str] = {
+    "brain_tumor": "SHADOW_BRAIN_TUMOR_VERSION",
+    "diabetes": "SHADOW_DIABETES_VERSION"
+}
+LEGACY_MODEL_VERSION = "v1.0"
+DUMMY_MODEL_VERSION = "dummy"
+
+
+# Diabetes model feature order and the value used when a feature is missing
+DIABETES_FEATURES: List[Tuple[str, float]] = [
+    ('pregnancies', 0),
+    ('glucose_level', 100),
+    ('blood_pressure', 120),
+    ('skin_thickness', 20),
+    ('insulin', 79),
+    ('bmi', 32),
+    ('diabetes_pedigree', 0.5),
+    ('age', 33)
+]
+DIABETES_FEATURE_NAMES = [name for name, _ in DIABETES_FEATURES]
+DIABETES_FEATURE_DEFAULTS = np.array([default for _, default in DIABETES_FEATURES], dtype=np.float64)
+DIABETES_FEATURE_INDEX = {name: i for i, name in enumerate(DIABETES_FEATURE_NAMES)}
+
+# Risk level assigned when the diabetes probability exceeds the threshold
+DIABETES_RISK_LEVELS: List[Tuple[str, float]] = [
+    ('high', 0.7),
+    ('moderate', 0.4)
+]
+
+# Clinical risk factors flagged when a feature exceeds its threshold
+DIABETES_RISK_FACTORS: List[Tuple[str, float, str]] = [
+    ('glucose_level', 140, "High blood glucose level"),
+    ('bmi', 30, "High BMI (obesity)"),
+    ('age', 45, "Age over 45"),
+    ('blood_pressure', 140, "High blood pressure"),
+    ('diabetes_pedigree', 0.5, "Family history of diabetes")
+]
+
+
+class BatchingMetrics:
+    """Counters for tuning micro-batch throughput against tail latency"""
+    
+    def __init__(self, window: int = 1024):
+        """
+        Initialize batching metrics
+        
+        Args:
+            window: Number of recent queue waits kept for percentiles
+        """
+        self.total_requests = 0
+        self.total_batches = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self.max_queue_depth = 0
+        self._queue_waits_ms: deque = deque(maxlen=window)
+        self._batch_latencies_ms: deque = deque(maxlen=window)
+    
+    def record_batch(
+        self,
+        batch_size: int,
+        queue_waits_ms: List[float],
+        latency_ms: float
+    ):
+        """Record one completed forward pass"""
+        self.total_batches += 1
+        self.total_requests += batch_size
+        self.batch_size_histogram[batch_size] = self.batch_size_histogram.get(batch_size, 0) + 1
+        self._queue_waits_ms.extend(queue_waits_ms)
+        self._batch_latencies_ms.append(latency_ms)
+    
+    def record_queue_depth(self, depth: int):
+        """Track the high-water mark of pending requests"""
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+    
+    @staticmethod
+    def _percentile(values: deque, q: float) -> float:
+        if not values:
+            return 0.0
+        return float(np.percentile(np.fromiter(values, dtype=np.float64), q))
+    
+    def snapshot(self, queue_depth: int) -> Dict[str, Any]:
+        """Return a JSON-serializable view of the metrics"""
+        return {
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "total_requests": self.total_requests,
+            "total_batches": self.total_batches,
+            "avg_batch_size": (
+                self.total_requests / self.total_batches if self.total_batches else 0.0
+            ),
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            "queue_wait_ms": {
+                "p50": self._percentile(self._queue_waits_ms, 50),
+                "p99": self._percentile(self._queue_waits_ms, 99),
+            },
+            "batch_latency_ms": {
+                "p50": self._percentile(self._batch_latencies_ms, 50),
+                "p99": self._percentile(self._batch_latencies_ms, 99),
+            },
+        }
+
+
+class InferenceBatcher:
+    """
+    Dynamic micro-batching queue
+    
+    Pending inputs are collected until either ``max_batch_size`` items are
+    queued or ``max_wait_ms`` has elapsed since the first one arrived, then
+    a single forward pass is run and each caller's future is resolved with
+    its own row of the output.
+    """
+    
+    def __init__(
+        self,
+        predict_batch: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher",
+        executor: Optional[InferenceExecutor] = None
+    ):
+        """
+        Initialize the batcher
+        
+        Args:
+            predict_batch: Callable mapping a stacked (N, ...) array to N outputs
+            max_batch_size: Largest batch handed to a single forward pass
+            max_wait_ms: Longest time the first queued item waits for company
+            name: Name used in logs
+            executor: Inference executor whose thread pool runs the forward pass
+        """
+        self.predict_batch = predict_batch
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self.metrics = BatchingMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @property
+    def queue_depth(self) -> int:
+        """Number of inputs waiting for a forward pass"""
+        return self._queue.qsize() if self._queue is not None else 0
+    
+    def _ensure_started(self):
+        """Start the worker task on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker = loop.create_task(self._run())
+        logger.info(
+            f"Started {self.name} (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:.1f})"
+        )
+    
+    async def submit(self, item: np.ndarray) -> Any:
+        """
+        Queue one input and wait for its prediction
+        
+        Args:
+            item: Single input without batch dimension
+            
+        Returns:
+            The row of the batch output belonging to this input
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        self.metrics.record_queue_depth(self._queue.qsize())
+        return await future
+    
+    async def _collect(self) -> list:
+        """Wait for the first item, then gather more until full or timed out"""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+    
+    async def _run(self):
+        """Worker loop: collect, predict, fan results back out"""
+        while True:
+            batch = await self._collect()
+            # Callers that gave up (e.g. client disconnect) don't need a slot
+            batch = [entry for entry in batch if not entry[1].cancelled()]
+            if not batch:
+                continue
+            
+            started = time.perf_counter()
+            queue_waits_ms = [(started - enqueued) * 1000 for _, _, enqueued in batch]
+            try:
+                inputs = np.stack([entry[0] for entry in batch])
+                pool = self.executor.thread_pool if self.executor is not None else None
+                outputs = await self._loop.run_in_executor(pool, self.predict_batch, inputs)
+            except Exception as e:
+                logger.error(f"Error in {self.name} forward pass: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            self.metrics.record_batch(
+                len(batch),
+                queue_waits_ms,
+                (time.perf_counter() - started) * 1000
+            )
+            for (_, future, _), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+    
+    async def stop(self):
+        """Cancel the worker task"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Current batch-size and queue-depth metrics"""
+        stats = self.metrics.snapshot(self.queue_depth)
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000
+        return stats
+
 
 class MLService:
     """Main ML Service for all AI models"""
     
     def __init__(self):
-        """Initialize ML service and load models"""
-        self.brain_tumor_model = None
-        self.diabetes_model = None
-        self.load_models()
+        """Initialize ML service; models load on first use or warm_up()"""
+        from app.core.config import settings
+        
+        self.registry = ModelRegistry(
+            lazy=not settings.ML_WARMUP_ON_STARTUP,
+            retry_seconds=settings.MODEL_LOAD_RETRY_SECONDS,
+            retry_max_seconds=settings.MODEL_LOAD_RETRY_MAX_SECONDS
+        )
+        self.registry.register(
+            "brain_tumor", self.load_brain_tumor_model, warmup=self._warm_up_brain_tumor_model
+        )
+        self.registry.register(
+            "diabetes", self.load_diabetes_model, warmup=self._warm_up_diabetes_model
+        )
+        self.brain_tumor_batcher = InferenceBatcher(
+            self._predict_brain_tumor_requests,
+            max_batch_size=settings.BRAIN_TUMOR_BATCH_MAX_SIZE,
+            max_wait_ms=settings.BRAIN_TUMOR_BATCH_MAX_WAIT_MS,
+            name="brain tumor batcher",
+            executor=inference_executor
+        )
+        
+        # Candidate versions scored on copies of live inputs; never served
+        self.shadow_registry = ModelRegistry(
+            retry_seconds=settings.MODEL_LOAD_RETRY_SECONDS,
+            retry_max_seconds=settings.MODEL_LOAD_RETRY_MAX_SECONDS
+        )
+        self.shadow_registry.register(
+            "brain_tumor", self.load_brain_tumor_model, warmup=self._warm_up_brain_tumor_model
+        )
+        self.shadow_registry.register(
+            "diabetes", self.load_diabetes_model, warmup=self._warm_up_diabetes_model
+        )
+        self.shadow = ShadowEvaluator(
+            self.shadow_registry,
+            scorers={
+                "brain_tumor": self._shadow_score_brain_tumor,
+                "diabetes": self._shadow_score_diabetes
+            },
+            max_per_second=settings.SHADOW_MAX_PER_SECOND,
+            burst=settings.SHADOW_BURST,
+            max_pending=settings.SHADOW_MAX_PENDING
+        )
+    
+    @property
+    def brain_tumor_model(self):
+        """Brain tumor model, loaded on first access"""
+        entry = self.registry.get("brain_tumor")
+        return entry.model if entry else None
+    
+    @property
+    def diabetes_model(self):
+        """Diabetes model, loaded on first access"""
+        entry = self.registry.get("diabetes")
+        return entry.model if entry else None
     
-    def load_models(self):
-        """Load all ML models"""
+    def warm_up(self):
+        """Load all ML models now instead of on first request"""
+        self.registry.warm_up()
+        logger.info(f"ML models warmed up: {self.registry.status()}")
+    
+    def load_shadow_models(self):
+        """
+        Load the shadow versions pinned in settings (blocking)
+        
+        A version that fails to load is logged and leaves that model
+        without a shadow; serving is unaffected.
+        """
+        from app.core.config import settings
+        
+        for name, setting in SHADOW_VERSION_SETTINGS.items():
+            version = getattr(settings, setting, None)
+            if not version:
+                continue
+            try:
+                self.shadow.configure(name, version)
+            except Exception as e:
+                logger.error(f"Could not load shadow {name} model {version}: {e}")
+    
+    @staticmethod
+    def _shadow_score_brain_tumor(entry: LoadedModel, image: np.ndarray) -> float:
+        """Positive-class confidence of a shadow brain tumor model for one image"""
+        prediction = entry.model.predict(image[np.newaxis], verbose=0)
+        return float(np.asarray(prediction, dtype=np.float32).reshape(-1)[0])
+    
+    def _shadow_score_diabetes(self, entry: LoadedModel, features: Dict[str, float]) -> float:
+        """Positive-class probability of a shadow diabetes model for one row"""
+        raw = self._diabetes_feature_matrix([features])
+        feature_array = np.where(np.isnan(raw), DIABETES_FEATURE_DEFAULTS, raw)
+        return float(entry.model.predict_proba(feature_array)[0, 1])
+    
+    def available_versions(self, name: str) -> List[str]:
+        """
+        List deployable versions of a model
+        
+        Versions live in ``MODELS_DIR/<name>/<version>/`` and must contain
+        a model artifact.
+        """
+        from app.core.config import settings
+        
+        model_dir = settings.MODELS_DIR / name
+        if not model_dir.is_dir():
+            return []
+        return sorted(
+            path.name
+            for path in model_dir.iterdir()
+            if path.is_dir() and self._find_model_artifact(name, path) is not None
+        )
+    
+    def activate_model_version(self, name: str, version: str) -> bool:
+        """
+        Load, warm up and swap in a model version, then persist it as active
+        
+        Blocking; meant to run as a background task. Failures are recorded
+        in the registry status and the current version keeps serving.
+        
+        Returns:
+            True if the version is now active
+        """
         try:
-            self.load_brain_tumor_model()
-            self.load_diabetes_model()
-            logger.info("All ML models loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading ML models: {e}")
+            self.registry.activate(name, version)
+        except Exception:
+            return False
+        self._write_active_pointer(name, version)
+        return True
     
-    def load_brain_tumor_model(self):
+    def sync_model_versions(self):
+        """
+        Follow versions activated by other workers
+        
+        Each worker polls the ``ACTIVE`` pointer written on activation and
+        hot-swaps when it changes. Models not loaded yet are left alone;
+        they pick up the pointer on first use.
+        """
+        for name in self.registry.names:
+            pointer = self._read_active_pointer(name)
+            current = self.registry.active_version(name)
+            if (
+                pointer
+                and current is not None
+                and pointer != current
+                and not self.registry.is_activating(name)
+            ):
+                logger.info(f"Model {name} pointer moved to {pointer}, hot-swapping from {current}")
+                try:
+                    self.registry.activate(name, pointer)
+                except Exception:
+                    pass
+    
+    def load_brain_tumor_model(self, version: Optional[str] = None):
         """Load brain tumor detection model"""
         if not HAS_TENSORFLOW:
             logger.warning("TensorFlow not available, skipping brain tumor model")
-            self.brain_tumor_model = None
-            return
-            
-        try:
-            from tensorflow import keras
-            from app.core.config import settings
-            
-            model_path = settings.BRAIN_TUMOR_MODEL_PATH
-            if os.path.exists(model_path):
-                self.brain_tumor_model = keras.models.load_model(model_path)
-                logger.info("Brain tumor model loaded successfully")
-            else:
-                logger.warning(f"Brain tumor model not found at {model_path}")
-                # Create a dummy model for development
-                self.brain_tumor_model = self._create_dummy_brain_tumor_model()
-        except Exception as e:
-            logger.error(f"Error loading brain tumor model: {e}")
-            self.brain_tumor_model = None
+            return None
+        
+        from tensorflow import keras
+        
+        resolved = self._resolve_model_artifact("brain_tumor", version)
+        if resolved is not None:
+            model_path, resolved_version = resolved
+            model = keras.models.load_model(model_path)
+            logger.info(f"Brain tumor model {resolved_version} loaded successfully")
+            return model, resolved_version
+        
+        logger.warning("Brain tumor model not found")
+        # Create a dummy model for development
+        return self._create_dummy_brain_tumor_model(), DUMMY_MODEL_VERSION
     
-    def load_diabetes_model(self):
+    def load_diabetes_model(self, version: Optional[str] = None):
         """Load diabetes prediction model"""
+        resolved = self._resolve_model_artifact("diabetes", version)
+        if resolved is not None:
+            model_path, resolved_version = resolved
+            with open(model_path, 'rb') as f:
+                model = pickle.load(f)
+            logger.info(f"Diabetes model {resolved_version} loaded successfully")
+            return self._compile_diabetes_model(model), resolved_version
+        
+        logger.warning("Diabetes model not found")
+        # Create a dummy model for development
+        return self._compile_diabetes_model(self._create_dummy_diabetes_model()), DUMMY_MODEL_VERSION
+    
+    @staticmethod
+    def _compile_diabetes_model(model):
+        """
+        Swap a linear/logistic estimator for its compiled NumPy evaluator
+        
+        For a handful of rows sklearn's input validation costs more than the
+        dot product itself. Other model types are returned unchanged.
+        """
+        # Parity-check rows spread around the default feature values
+        rng = np.random.default_rng(0)
+        reference_rows = DIABETES_FEATURE_DEFAULTS * rng.uniform(0.0, 2.0, size=(64, len(DIABETES_FEATURES)))
+        return compile_logistic_model(model, reference_rows) or model
+    
+    def _resolve_model_artifact(
+        self,
+        name: str,
+        version: Optional[str]
+    ) -> Optional[Tuple[Path, str]]:
+        """
+        Find the artifact to load for a model version
+        
+        Without an explicit version this uses the configured version, then
+        the ``ACTIVE`` pointer, then the legacy single-file path from
+        settings. A version directory is never served just because it is
+        present, so copying a new model in does not put it into production.
+        
+        Raises:
+            ValueError: If an explicitly requested version does not exist
+        """
+        from app.core.config import settings
+        
+        explicit = version is not None
+        if not explicit:
+            version = (
+                getattr(settings, MODEL_VERSION_SETTINGS[name])
+                or self._read_active_pointer(name)
+            )
+        
+        if version:
+            if not MODEL_VERSION_PATTERN.match(version):
+                raise ValueError(f"Invalid model version: {version}")
+            artifact = self._find_model_artifact(name, settings.MODELS_DIR / name / version)
+            if artifact is not None:
+                return artifact, version
+            if explicit:
+                raise ValueError(f"Model {name} version {version} not found")
+            logger.warning(f"Model {name} version {version} not found, trying legacy path")
+        
+        legacy_path = getattr(settings, LEGACY_MODEL_PATH_SETTINGS[name])
+        if os.path.exists(legacy_path):
+            return Path(legacy_path), LEGACY_MODEL_VERSION
+        return None
+    
+    @staticmethod
+    def _find_model_artifact(name: str, version_dir: Path) -> Optional[Path]:
+        """First file in a version directory matching the model's artifact patterns"""
+        for pattern in MODEL_ARTIFACT_PATTERNS[name]:
+            matches = sorted(version_dir.glob(pattern))
+            if matches:
+                return matches[0]
+        return None
+    
+    @staticmethod
+    def _read_active_pointer(name: str) -> Optional[str]:
+        """Version recorded in ``MODELS_DIR/<name>/ACTIVE``, if present"""
+        from app.core.config import settings
+        
         try:
-            from app.core.config import settings
-            
-            model_path = settings.DIABETES_MODEL_PATH
-            if os.path.exists(model_path):
-                with open(model_path, 'rb') as f:
-                    self.diabetes_model = pickle.load(f)
-                logger.info("Diabetes model loaded successfully")
-            else:
-                logger.warning(f"Diabetes model not found at {model_path}")
-                # Create a dummy model for development
-                self.diabetes_model = self._create_dummy_diabetes_model()
-        except Exception as e:
-            logger.error(f"Error loading diabetes model: {e}")
-            self.diabetes_model = None
+            return (settings.MODELS_DIR / name / "ACTIVE").read_text().strip() or None
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _write_active_pointer(name: str, version: str):
+        """Atomically record the active version for other workers and restarts"""
+        from app.core.config import settings
+        
+        model_dir = settings.MODELS_DIR / name
+        tmp_path = model_dir / f".ACTIVE.{os.getpid()}"
+        tmp_path.write_text(version)
+        os.replace(tmp_path, model_dir / "ACTIVE")
+    
+    def _warm_up_brain_tumor_model(self, model):
+        """Run a synthetic full-size batch so graph tracing happens before traffic"""
+        batch = np.zeros((self.brain_tumor_batcher.max_batch_size, 240, 240, 3), dtype=np.float32)
+        model.predict(batch, verbose=0)
+    
+    @staticmethod
+    def _warm_up_diabetes_model(model):
+        """Score a synthetic batch of default feature rows"""
+        model.predict_proba(np.tile(DIABETES_FEATURE_DEFAULTS, (8, 1)))
     
     def _create_dummy_brain_tumor_model(self):
         """Create a dummy brain tumor model for development"""
@@ -127,24 +611,11 @@ class MLService:
         Returns:
             Dictionary containing prediction results
         """
-        if self.brain_tumor_model is None:
-            # Return dummy prediction when model not available
-            return {
-                "result": "Model Not Available",
-                "confidence_score": 0.5,
-                "tumor_detected": False,
-                "risk_level": "unknown",
-                "analysis": {
-                    "confidence_percentage": "50.00%",
-                    "model_version": "dummy",
-                    "image_quality": "good",
-                    "note": "TensorFlow not available. Using fallback prediction."
-                },
-                "recommendations": [
-                    "Upload to system with TensorFlow installed for accurate prediction",
-                    "Consult with a medical professional for proper diagnosis"
-                ]
-            }
+        drift_monitor.record("brain_tumor", image_intensity_features(image))
+        
+        entry = self.registry.get("brain_tumor")
+        if entry is None:
+            return self._unavailable_tumor_result()
         
         try:
             # Add batch dimension if needed
@@ -152,39 +623,326 @@ class MLService:
                 image = np.expand_dims(image, axis=0)
             
             # Make prediction
-            prediction = self.brain_tumor_model.predict(image, verbose=0)
+            prediction = entry.model.predict(image, verbose=0)
             confidence = float(prediction[0][0])
             
-            # Determine result
-            has_tumor = confidence > 0.5
-            result = "Tumor Detected" if has_tumor else "No Tumor Detected"
+            if self._needs_tta(confidence):
+                return self._predict_with_tta(entry, image[0], confidence)
+            return self._build_tumor_result(confidence, entry.version)
+        except Exception as e:
+            logger.error(f"Error in brain tumor prediction: {e}")
+            raise
+    
+    async def predict_brain_tumor_batched(
+        self,
+        image: np.ndarray
+    ) -> Dict[str, Any]:
+        """
+        Predict brain tumor through the micro-batching queue
+        
+        Concurrent callers are coalesced into a single forward pass.
+        
+        Args:
+            image: Preprocessed image array (240, 240, 3)
             
-            # Determine risk level
-            if confidence > 0.8:
-                risk_level = "high"
-            elif confidence > 0.5:
-                risk_level = "moderate"
-            else:
-                risk_level = "low"
+        Returns:
+            Dictionary containing prediction results
+        """
+        # Resolving the model can load it (lazy mode, or retrying a failed
+        # load), so it never happens on the event loop
+        if await inference_executor.run(self.registry.get, "brain_tumor") is None:
+            return await inference_executor.run(self.predict_brain_tumor, image)
+        
+        # Admission is per request; the shared forward pass runs on the
+        # inference thread pool so the event loop stays responsive
+        async with inference_executor.slot():
+            confidence, model_version = await self.brain_tumor_batcher.submit(image)
             
-            # Generate recommendations
-            recommendations = self._generate_tumor_recommendations(has_tumor, confidence)
+            # Borderline scores get a second, augmented pass under the same slot
+            entry = self.registry.loaded("brain_tumor")
+            if entry is not None and self._needs_tta(confidence) and entry.version == model_version:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    inference_executor.thread_pool,
+                    self._predict_with_tta, entry, image, confidence
+                )
+        return self._build_tumor_result(confidence, model_version)
+    
+    @staticmethod
+    def _needs_tta(confidence: float) -> bool:
+        """True if TTA is enabled and the score falls inside the uncertainty band"""
+        from app.core.config import settings
+        
+        return (
+            settings.BRAIN_TUMOR_TTA_ENABLED
+            and abs(confidence - 0.5) <= settings.BRAIN_TUMOR_TTA_BAND
+        )
+    
+    def _predict_with_tta(
+        self,
+        entry,
+        image: np.ndarray,
+        first_confidence: float
+    ) -> Dict[str, Any]:
+        """
+        Re-score a borderline image over augmented views in one forward pass
+        
+        The flipped and rotated views are stacked into a single batch; the
+        reported confidence is the mean over the views and the first pass.
+        
+        Args:
+            entry: Registry entry of the model that produced the first pass
+            image: Preprocessed image array (240, 240, 3)
+            first_confidence: Confidence of the un-augmented first pass
             
-            return {
-                "result": result,
-                "confidence_score": confidence,
-                "tumor_detected": has_tumor,
-                "risk_level": risk_level,
-                "analysis": {
-                    "confidence_percentage": f"{confidence * 100:.2f}%",
-                    "model_version": "v1.0",
-                    "image_quality": "good"
-                },
-                "recommendations": recommendations
+        Returns:
+            Dictionary containing prediction results with TTA statistics
+        """
+        from app.core.config import settings
+        
+        views = image_preprocessor.tta_views(image, settings.BRAIN_TUMOR_TTA_ROTATION_DEGREES)
+        prediction = entry.model.predict(views, verbose=0)
+        confidences = np.concatenate([
+            [first_confidence],
+            np.asarray(prediction, dtype=np.float32).reshape(len(views), -1)[:, 0]
+        ])
+        mean_confidence = float(confidences.mean())
+        
+        result = self._build_tumor_result(mean_confidence, entry.version)
+        result["analysis"]["tta"] = {
+            "first_pass_confidence": float(first_confidence),
+            "mean_confidence": mean_confidence,
+            "variance": float(confidences.var()),
+            "views": {
+                name: float(confidence)
+                for name, confidence in zip(("original",) + TTA_VIEW_NAMES, confidences)
             }
-        except Exception as e:
-            logger.error(f"Error in brain tumor prediction: {e}")
-            raise
+        }
+        return result
+    
+    def predict_brain_tumor_many(
+        self,
+        images: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        """
+        Predict brain tumor for a stacked batch in one forward pass
+        
+        Blocking, and may load the model; run it off the event loop.
+        
+        Args:
+            images: Preprocessed images of shape (N, 240, 240, 3)
+            
+        Returns:
+            List of prediction results in input order
+        """
+        if self.registry.get("brain_tumor") is None:
+            return [self._unavailable_tumor_result() for _ in range(len(images))]
+        return [
+            self._build_tumor_result(confidence, model_version)
+            for confidence, model_version in self._predict_brain_tumor_batch(images)
+        ]
+    
+    def _predict_brain_tumor_requests(
+        self,
+        images: np.ndarray
+    ) -> List[Tuple[float, str]]:
+        """Batcher entry point: add live inputs to the drift statistics, then score"""
+        drift_monitor.record("brain_tumor", image_intensity_features(images))
+        return self._predict_brain_tumor_batch(images)
+    
+    def _predict_brain_tumor_batch(
+        self,
+        images: np.ndarray
+    ) -> List[Tuple[float, str]]:
+        """
+        Run one forward pass over a stacked (N, 240, 240, 3) batch
+        
+        The model is resolved once per batch, so a hot-swap never splits a
+        batch across versions; each row carries the version that scored it.
+        """
+        entry = self.registry.get("brain_tumor")
+        prediction = entry.model.predict(images, verbose=0)
+        confidences = np.asarray(prediction, dtype=np.float32).reshape(len(images), -1)[:, 0]
+        return [(float(confidence), entry.version) for confidence in confidences]
+    
+    async def predict_brain_tumor_study_async(
+        self,
+        volume_path: str,
+        max_slices: Optional[int] = None,
+        top_k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Open a DICOM/NIfTI study and score it on the inference executor
+        
+        Args:
+            volume_path: Path to a NIfTI file, DICOM file or zipped series
+            max_slices: Maximum number of slices to score
+            top_k: Number of most suspicious slices to aggregate and report
+            
+        Returns:
+            Dictionary containing the study-level prediction results
+        """
+        def score():
+            return self.predict_brain_tumor_study(load_volume(volume_path), max_slices, top_k)
+        
+        return await inference_executor.run(score)
+    
+    def predict_brain_tumor_study(
+        self,
+        volume: MedicalVolume,
+        max_slices: Optional[int] = None,
+        top_k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Predict brain tumor over the slices of an MRI study
+        
+        Slices are sampled evenly from the central part of the volume,
+        preprocessed in parallel and scored in fixed-size batches through a
+        single reused buffer, so memory stays bounded by the batch size
+        whatever the number of slices. The study confidence is the mean of
+        the ``top_k`` highest slice confidences.
+        
+        Args:
+            volume: Opened volume
+            max_slices: Maximum number of slices to score
+            top_k: Number of most suspicious slices to aggregate and report
+            
+        Returns:
+            Dictionary containing the study-level prediction results
+        """
+        from app.core.config import settings
+        
+        entry = self.registry.get("brain_tumor")
+        if entry is None:
+            return self._unavailable_tumor_result()
+        
+        max_slices = min(
+            max_slices or settings.BRAIN_TUMOR_STUDY_MAX_SLICES,
+            settings.BRAIN_TUMOR_STUDY_MAX_SLICES
+        )
+        top_k = max(1, top_k or settings.BRAIN_TUMOR_STUDY_TOP_K)
+        batch_size = max(1, settings.BRAIN_TUMOR_STUDY_BATCH_SIZE)
+        
+        indices = select_slice_indices(
+            volume.num_slices,
+            max_slices,
+            settings.BRAIN_TUMOR_STUDY_SLICE_START,
+            settings.BRAIN_TUMOR_STUDY_SLICE_END
+        )
+        if not indices:
+            raise ValueError("Study contains no slices")
+        
+        # One window for the whole study keeps slices comparable
+        window = volume.default_window or volume.estimate_window(indices)
+        
+        batch = np.zeros((batch_size,) + image_preprocessor.output_shape, dtype=np.float32)
+        confidences = np.empty(len(indices), dtype=np.float32)
+        pool = inference_executor.preprocess_pool
+        
+        for start in range(0, len(indices), batch_size):
+            chunk = indices[start:start + batch_size]
+            # Each slice is preprocessed straight into its row of the batch
+            list(pool.map(
+                lambda row: image_preprocessor.preprocess_volume_slice(
+                    volume, chunk[row], *window, out=batch[row]
+                ),
+                range(len(chunk))
+            ))
+            
+            # Always feed the full buffer so every forward pass has the same
+            # shape; rows past the chunk are stale and their outputs ignored
+            prediction = entry.model.predict(batch, verbose=0)
+            scores = np.asarray(prediction, dtype=np.float32).reshape(batch_size, -1)[:, 0]
+            confidences[start:start + len(chunk)] = scores[:len(chunk)]
+        
+        top_k = min(top_k, len(indices))
+        top_rows = np.argsort(-confidences, kind="stable")[:top_k]
+        study_confidence = float(confidences[top_rows].mean())
+        
+        result = self._build_tumor_result(study_confidence, entry.version)
+        result["analysis"].update({
+            "aggregation": f"mean_of_top_{top_k}",
+            "total_slices": volume.num_slices,
+            "slices_analyzed": len(indices),
+            "suspicious_slices": int(np.count_nonzero(confidences > 0.5)),
+            "max_slice_confidence": float(confidences.max()),
+            "top_slices": [
+                {"slice_index": int(indices[row]), "confidence": float(confidences[row])}
+                for row in top_rows
+            ],
+            "window": [float(window[0]), float(window[1])],
+            "volume": volume.metadata()
+        })
+        return result
+    
+    @staticmethod
+    def _unavailable_tumor_result() -> Dict[str, Any]:
+        """Fallback brain tumor payload used when no model is available"""
+        return {
+            "result": "Model Not Available",
+            "confidence_score": 0.5,
+            "tumor_detected": False,
+            "risk_level": "unknown",
+            "analysis": {
+                "confidence_percentage": "50.00%",
+                "model_version": "dummy",
+                "image_quality": "good",
+                "note": "TensorFlow not available. Using fallback prediction."
+            },
+            "recommendations": [
+                "Upload to system with TensorFlow installed for accurate prediction",
+                "Consult with a medical professional for proper diagnosis"
+            ]
+        }
+    
+    def _build_tumor_result(
+        self,
+        confidence: float,
+        model_version: str
+    ) -> Dict[str, Any]:
+        """Build the brain tumor response payload from a model confidence"""
+        # Determine result
+        has_tumor = confidence > 0.5
+        result = "Tumor Detected" if has_tumor else "No Tumor Detected"
+        
+        # Determine risk level
+        if confidence > 0.8:
+            risk_level = "high"
+        elif confidence > 0.5:
+            risk_level = "moderate"
+        else:
+            risk_level = "low"
+        
+        # Generate recommendations
+        recommendations = self._generate_tumor_recommendations(has_tumor, confidence)
+        
+        return {
+            "result": result,
+            "confidence_score": confidence,
+            "tumor_detected": has_tumor,
+            "risk_level": risk_level,
+            "analysis": {
+                "confidence_percentage": f"{confidence * 100:.2f}%",
+                "model_version": model_version,
+                "image_quality": "good"
+            },
+            "recommendations": recommendations
+        }
+    
+    async def predict_diabetes_async(
+        self,
+        features: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """
+        Predict diabetes risk on the inference executor
+        
+        Args:
+            features: Dictionary with clinical features
+            
+        Returns:
+            Dictionary containing prediction results
+        """
+        return await inference_executor.run(self.predict_diabetes, features)
     
     def predict_diabetes(
         self,
@@ -199,57 +957,205 @@ class MLService:
         Returns:
             Dictionary containing prediction results
         """
-        if self.diabetes_model is None:
+        return self.predict_diabetes_batch([features], record_drift=True)[0]
+    
+    async def predict_diabetes_batch_async(
+        self,
+        rows: List[Dict[str, float]],
+        include_recommendations: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Score a cohort of patients on the inference executor
+        
+        Args:
+            rows: List of dictionaries with clinical features
+            include_recommendations: Whether to attach per-row recommendations
+            
+        Returns:
+            List of prediction results in input order
+        """
+        return await inference_executor.run(
+            self.predict_diabetes_batch, rows, include_recommendations, record_drift=True
+        )
+    
+    def predict_diabetes_batch(
+        self,
+        rows: List[Dict[str, float]],
+        include_recommendations: bool = True,
+        record_drift: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Predict diabetes risk for many patients at once
+        
+        All rows are scored with a single vectorized ``predict_proba`` call;
+        the label is derived from the probability rather than a second
+        ``predict`` pass, and risk-factor flags are computed column-wise.
+        
+        Args:
+            rows: List of dictionaries with clinical features
+            include_recommendations: Whether to attach per-row recommendations
+            record_drift: Whether to add the rows to the input drift statistics
+                (live traffic only, not offline re-scoring)
+            
+        Returns:
+            List of prediction results in input order
+        """
+        entry = self.registry.get("diabetes")
+        if entry is None:
             raise ValueError("Diabetes model not loaded")
         
+        if not rows:
+            return []
+        
         try:
-            # Extract features in correct order
-            feature_array = np.array([[
-                features.get('pregnancies', 0),
-                features.get('glucose_level', 100),
-                features.get('blood_pressure', 120),
-                features.get('skin_thickness', 20),
-                features.get('insulin', 79),
-                features.get('bmi', 32),
-                features.get('diabetes_pedigree', 0.5),
-                features.get('age', 33)
-            ]])
+            # Missing features are NaN here so they never raise a risk flag,
+            # then fall back to the model defaults for scoring
+            raw = self._diabetes_feature_matrix(rows)
+            if record_drift:
+                drift_monitor.record(
+                    "diabetes", {name: raw[:, i] for i, name in enumerate(DIABETES_FEATURE_NAMES)}
+                )
+            feature_array = np.where(np.isnan(raw), DIABETES_FEATURE_DEFAULTS, raw)
             
-            # Make prediction
-            prediction = self.diabetes_model.predict(feature_array)[0]
-            prediction_proba = self.diabetes_model.predict_proba(feature_array)[0]
-            
-            # Get probability
-            probability = float(prediction_proba[1])
+            # Make prediction; for a binary classifier predict() is
+            # equivalent to thresholding the positive-class probability
+            probabilities = entry.model.predict_proba(feature_array)[:, 1]
+            detected = probabilities > 0.5
             
             # Determine risk level
-            if probability > 0.7:
-                risk_level = "high"
-            elif probability > 0.4:
-                risk_level = "moderate"
-            else:
-                risk_level = "low"
-            
-            # Determine result
-            result = "Diabetes Risk Detected" if prediction == 1 else "Low Diabetes Risk"
+            risk_levels = self._diabetes_risk_levels(probabilities)
             
             # Identify risk factors
-            risk_factors = self._identify_diabetes_risk_factors(features)
+            flags = np.column_stack([
+                raw[:, DIABETES_FEATURE_INDEX[feature]] > threshold
+                for feature, threshold, _ in DIABETES_RISK_FACTORS
+            ])
             
-            # Generate recommendations
-            recommendations = self._generate_diabetes_recommendations(risk_level, risk_factors)
+            results = []
+            for i in range(len(rows)):
+                risk_level = str(risk_levels[i])
+                risk_factors = [
+                    label
+                    for (_, _, label), flagged in zip(DIABETES_RISK_FACTORS, flags[i])
+                    if flagged
+                ] or ["No major risk factors identified"]
+                
+                prediction = {
+                    "result": "Diabetes Risk Detected" if detected[i] else "Low Diabetes Risk",
+                    "probability": float(probabilities[i]),
+                    "risk_level": risk_level,
+                    "risk_factors": risk_factors,
+                    "model_version": entry.version
+                }
+                if include_recommendations:
+                    prediction["recommendations"] = self._generate_diabetes_recommendations(
+                        risk_level, risk_factors
+                    )
+                results.append(prediction)
             
-            return {
-                "result": result,
-                "probability": probability,
-                "risk_level": risk_level,
-                "risk_factors": risk_factors,
-                "recommendations": recommendations
-            }
+            return results
         except Exception as e:
             logger.error(f"Error in diabetes prediction: {e}")
             raise
     
+    async def predict_diabetes_what_if_async(
+        self,
+        features: Dict[str, float],
+        ranges: List[Tuple[str, np.ndarray]]
+    ) -> Dict[str, Any]:
+        """
+        Score a what-if grid on the inference executor
+        
+        Args:
+            features: Dictionary with the patient's clinical features
+            ranges: (feature, values) pairs to vary
+            
+        Returns:
+            Dictionary containing the baseline and the risk surface
+        """
+        return await inference_executor.run(self.predict_diabetes_what_if, features, ranges)
+    
+    def predict_diabetes_what_if(
+        self,
+        features: Dict[str, float],
+        ranges: List[Tuple[str, np.ndarray]]
+    ) -> Dict[str, Any]:
+        """
+        Diabetes risk over a grid of changes to one patient's features
+        
+        The full Cartesian grid is built as one (N, 8) matrix by
+        broadcasting each axis into its feature column, and scored together
+        with the unchanged baseline in a single ``predict_proba`` call.
+        
+        Args:
+            features: Dictionary with the patient's clinical features
+            ranges: (feature, values) pairs to vary, one grid axis each
+            
+        Returns:
+            Dictionary with the baseline, the axes, the probability surface
+            (nested in axis order) and the lowest-risk grid point
+        """
+        entry = self.registry.get("diabetes")
+        if entry is None:
+            raise ValueError("Diabetes model not loaded")
+        
+        raw = self._diabetes_feature_matrix([features])[0]
+        baseline = np.where(np.isnan(raw), DIABETES_FEATURE_DEFAULTS, raw)
+        
+        shape = tuple(len(values) for _, values in ranges)
+        grid = np.empty(shape + (len(DIABETES_FEATURE_NAMES),), dtype=np.float64)
+        grid[...] = baseline
+        for axis, (name, values) in enumerate(ranges):
+            # Reshape the axis so it broadcasts along its own grid dimension
+            axis_shape = [1] * len(shape)
+            axis_shape[axis] = len(values)
+            grid[..., DIABETES_FEATURE_INDEX[name]] = np.asarray(values, dtype=np.float64).reshape(axis_shape)
+        
+        feature_array = np.vstack([grid.reshape(-1, len(DIABETES_FEATURE_NAMES)), baseline])
+        probabilities = entry.model.predict_proba(feature_array)[:, 1]
+        surface = probabilities[:-1].reshape(shape)
+        baseline_probability = float(probabilities[-1])
+        
+        best = np.unravel_index(int(np.argmin(surface)), shape)
+        return {
+            "baseline": {
+                "probability": baseline_probability,
+                "risk_level": str(self._diabetes_risk_levels(probabilities[-1:])[0])
+            },
+            "axes": [
+                {"feature": name, "values": np.asarray(values, dtype=np.float64).tolist()}
+                for name, values in ranges
+            ],
+            "probabilities": surface.tolist(),
+            "risk_thresholds": {level: threshold for level, threshold in DIABETES_RISK_LEVELS},
+            "lowest_risk": {
+                "features": {name: float(values[i]) for (name, values), i in zip(ranges, best)},
+                "probability": float(surface[best]),
+                "risk_level": str(self._diabetes_risk_levels(surface[best].reshape(1))[0])
+            },
+            "points": int(surface.size),
+            "model_version": entry.version
+        }
+    
+    @staticmethod
+    def _diabetes_risk_levels(probabilities: np.ndarray) -> np.ndarray:
+        """Risk level label for each probability"""
+        return np.select(
+            [probabilities > threshold for _, threshold in DIABETES_RISK_LEVELS],
+            [level for level, _ in DIABETES_RISK_LEVELS],
+            default="low"
+        )
+    
+    @staticmethod
+    def _diabetes_feature_matrix(
+        rows: List[Dict[str, float]]
+    ) -> np.ndarray:
+        """Stack feature dictionaries into an (N, 8) array in model order, NaN where missing"""
+        return np.array(
+            [[row.get(name, np.nan) for name in DIABETES_FEATURE_NAMES] for row in rows],
+            dtype=np.float64
+        )
+    
     def _generate_tumor_recommendations(
         self,
         has_tumor: bool,
@@ -273,30 +1179,6 @@ class MLService:
                 "Consult your doctor if you experience persistent headaches or vision changes"
             ]
     
-    def _identify_diabetes_risk_factors(
-        self,
-        features: Dict[str, float]
-    ) -> list:
-        """Identify risk factors from clinical data"""
-        risk_factors = []
-        
-        if features.get('glucose_level', 0) > 140:
-            risk_factors.append("High blood glucose level")
-        
-        if features.get('bmi', 0) > 30:
-            risk_factors.append("High BMI (obesity)")
-        
-        if features.get('age', 0) > 45:
-            risk_factors.append("Age over 45")
-        
-        if features.get('blood_pressure', 0) > 140:
-            risk_factors.append("High blood pressure")
-        
-        if features.get('diabetes_pedigree', 0) > 0.5:
-            risk_factors.append("Family history of diabetes")
-        
-        return risk_factors if risk_factors else ["No major risk factors identified"]
-    
     def _generate_diabetes_recommendations(
         self,
         risk_level: str,
@@ -0,0 +1,323 @@
+"""
+Model registry for CuraGenie
+Loads each ML model once per process, on first use or during warm-up,
+and hot-swaps new model versions without dropping in-flight requests
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Model states reported by the registry
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+LOADED = "loaded"
+UNAVAILABLE = "unavailable"  # loader ran but has nothing to serve (e.g. optional dependency missing)
+FAILED = "failed"
+
+# Activation states for a version being swapped in
+ACTIVATION_LOADING = "loading"
+ACTIVATION_WARMING = "warming"
+ACTIVATION_ACTIVE = "active"
+ACTIVATION_FAILED = "failed"
+
+# A loader takes the requested version (None for the default) and returns
+# (model, resolved_version), or None if the model cannot be served
+ModelLoader = Callable[[Optional[str]], Optional[Tuple[Any, str]]]
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, where /proc is available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class LoadedModel:
+    """A model held by the registry together with its load statistics"""
+
+    def __init__(
+        self,
+        name: str,
+        model: Any,
+        version: str,
+        load_seconds: float,
+        memory_bytes: Optional[int]
+    ):
+        self.name = name
+        self.model = model
+        self.version = version
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        self.loaded_at = datetime.now(timezone.utc)
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of ML models
+
+    Each model is registered with a loader callable and materialized at most
+    once, either lazily by ``get`` or eagerly by ``warm_up``. Concurrent
+    first calls block on a per-model lock instead of loading twice. A load
+    that raised is retried by a later ``get`` after an exponential backoff.
+
+    New versions are loaded and warmed up next to the active one by
+    ``activate`` and then swapped in with a single reference assignment.
+    Callers hold on to the ``LoadedModel`` they got from ``get``, so
+    requests already in flight finish on the old version.
+    """
+
+    def __init__(
+        self,
+        lazy: bool = False,
+        retry_seconds: float = 5.0,
+        retry_max_seconds: float = 300.0
+    ):
+        """
+        Initialize the registry
+
+        Args:
+            lazy: Models load on first use rather than at startup, so a
+                model that was never requested still counts as ready
+            retry_seconds: Delay before retrying a failed load; doubles
+                after each further failure
+            retry_max_seconds: Upper bound for the retry delay
+        """
+        self.lazy = lazy
+        self.retry_seconds = retry_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._loaders: Dict[str, ModelLoader] = {}
+        self._warmups: Dict[str, Optional[Callable[[Any], None]]] = {}
+        self._models: Dict[str, LoadedModel] = {}
+        self._states: Dict[str, str] = {}
+        self._errors: Dict[str, str] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._activation_locks: Dict[str, threading.Lock] = {}
+        self._activations: Dict[str, Dict[str, Any]] = {}
+        self._failures: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+
+    def register(
+        self,
+        name: str,
+        loader: ModelLoader,
+        warmup: Optional[Callable[[Any], None]] = None
+    ):
+        """
+        Register a model loader
+
+        Args:
+            name: Model name, e.g. "brain_tumor"
+            loader: Callable taking a version (None for the default) and
+                returning (model, version), or None if it cannot be served
+            warmup: Optional callable running a synthetic batch through a
+                freshly loaded model before it is swapped in
+        """
+        self._loaders[name] = loader
+        self._warmups[name] = warmup
+        self._states.setdefault(name, NOT_LOADED)
+        self._locks.setdefault(name, threading.Lock())
+        self._activation_locks.setdefault(name, threading.Lock())
+
+    @property
+    def names(self) -> List[str]:
+        """Names of all registered models"""
+        return list(self._loaders)
+
+    def get(self, name: str) -> Optional[LoadedModel]:
+        """
+        Return the loaded model, loading it on first use
+
+        Args:
+            name: Model name
+
+        Returns:
+            The loaded model entry, or None if the model is unavailable
+        """
+        state = self._states.get(name)
+        if state in (LOADED, UNAVAILABLE) or (state == FAILED and not self._retry_due(name)):
+            return self._models.get(name)
+
+        with self._locks[name]:
+            state = self._states[name]
+            if state in (NOT_LOADED, LOADING) or (state == FAILED and self._retry_due(name)):
+                self._load(name)
+        return self._models.get(name)
+
+    def _retry_due(self, name: str) -> bool:
+        """True once the backoff after a failed load has elapsed"""
+        return time.monotonic() >= self._retry_at.get(name, 0.0)
+
+    def _materialize(
+        self,
+        name: str,
+        version: Optional[str]
+    ) -> Optional[LoadedModel]:
+        """Run the loader and measure it; returns None if nothing to serve"""
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        loaded = self._loaders[name](version)
+        load_seconds = time.perf_counter() - started
+        if loaded is None:
+            return None
+
+        model, resolved_version = loaded
+        rss_after = _rss_bytes()
+        memory_bytes = (
+            max(0, rss_after - rss_before)
+            if rss_before is not None and rss_after is not None
+            else None
+        )
+        logger.info(
+            f"Loaded {name} model {resolved_version} in {load_seconds:.2f}s"
+            + (f" (+{memory_bytes / (1024 * 1024):.1f} MB RSS)" if memory_bytes is not None else "")
+        )
+        return LoadedModel(name, model, resolved_version, load_seconds, memory_bytes)
+
+    def _load(self, name: str):
+        """Load the default version of ``name``; caller holds the model lock"""
+        self._states[name] = LOADING
+        try:
+            entry = self._materialize(name, None)
+            warmup = self._warmups.get(name)
+            if entry is not None and warmup is not None:
+                warmup(entry.model)
+        except Exception as e:
+            failures = self._failures.get(name, 0) + 1
+            delay = min(self.retry_seconds * 2 ** (failures - 1), self.retry_max_seconds)
+            logger.error(f"Error loading {name} model (attempt {failures}, retrying in {delay:.0f}s): {e}")
+            self._states[name] = FAILED
+            self._errors[name] = str(e)
+            self._failures[name] = failures
+            self._retry_at[name] = time.monotonic() + delay
+            return
+
+        if entry is None:
+            self._states[name] = UNAVAILABLE
+            return
+
+        self._models[name] = entry
+        self._states[name] = LOADED
+        self._clear_failure(name)
+
+    def _clear_failure(self, name: str):
+        self._errors.pop(name, None)
+        self._failures.pop(name, None)
+        self._retry_at.pop(name, None)
+
+    def activate(self, name: str, version: str) -> LoadedModel:
+        """
+        Load, warm up and atomically swap in a model version
+
+        Blocking; run it off the event loop. The previously active model
+        keeps serving until the swap and is released once the last
+        in-flight request holding it completes.
+
+        Args:
+            name: Model name
+            version: Version to activate
+
+        Returns:
+            The newly active model entry
+
+        Raises:
+            ValueError: If the version cannot be loaded
+        """
+        with self._activation_locks[name]:
+            self._activations[name] = {"version": version, "state": ACTIVATION_LOADING, "error": None}
+            try:
+                entry = self._materialize(name, version)
+                if entry is None:
+                    raise ValueError(f"Model {name} version {version} cannot be served")
+
+                warmup = self._warmups.get(name)
+                if warmup is not None:
+                    self._activations[name]["state"] = ACTIVATION_WARMING
+                    warmup(entry.model)
+            except Exception as e:
+                logger.error(f"Error activating {name} model {version}: {e}")
+                self._activations[name].update(state=ACTIVATION_FAILED, error=str(e))
+                raise
+
+            with self._locks[name]:
+                previous = self._models.get(name)
+                self._models[name] = entry
+                self._states[name] = LOADED
+                self._clear_failure(name)
+            self._activations[name]["state"] = ACTIVATION_ACTIVE
+            logger.info(
+                f"Activated {name} model {version}"
+                + (f" (replacing {previous.version})" if previous else "")
+            )
+            return entry
+
+    def loaded(self, name: str) -> Optional[LoadedModel]:
+        """Return the model if it is already loaded, without loading it"""
+        return self._models.get(name)
+
+    def unload(self, name: str):
+        """
+        Drop the loaded model for ``name``
+
+        In-flight callers keep their reference; the next ``get`` loads the
+        default version again.
+        """
+        with self._locks[name]:
+            entry = self._models.pop(name, None)
+            self._states[name] = NOT_LOADED
+            self._clear_failure(name)
+        self._activations.pop(name, None)
+        if entry is not None:
+            logger.info(f"Unloaded {name} model {entry.version}")
+
+    def active_version(self, name: str) -> Optional[str]:
+        """Version currently served for ``name`` without triggering a load"""
+        entry = self._models.get(name)
+        return entry.version if entry else None
+
+    def is_activating(self, name: str) -> bool:
+        """True while a version of ``name`` is being loaded or warmed up"""
+        return self._activation_locks[name].locked()
+
+    def warm_up(self, names: Optional[List[str]] = None):
+        """Eagerly load the given models (all registered models by default)"""
+        for name in names or self.names:
+            self.get(name)
+
+    @property
+    def ready(self) -> bool:
+        """
+        True once every model has been loaded or found unavailable
+
+        In lazy mode a model nobody has requested yet also counts as ready.
+        """
+        ready_states = (LOADED, UNAVAILABLE, NOT_LOADED) if self.lazy else (LOADED, UNAVAILABLE)
+        return all(state in ready_states for state in self._states.values())
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model state, load time and memory for health reporting"""
+        report = {}
+        for name in self.names:
+            entry = self._models.get(name)
+            retry_at = self._retry_at.get(name)
+            report[name] = {
+                "state": self._states[name],
+                "version": entry.version if entry else None,
+                "load_seconds": round(entry.load_seconds, 3) if entry else None,
+                "memory_bytes": entry.memory_bytes if entry else None,
+                "loaded_at": entry.loaded_at.isoformat() if entry else None,
+                "error": self._errors.get(name),
+                "failed_attempts": self._failures.get(name, 0),
+                "retry_in_seconds": (
+                    round(max(0.0, retry_at - time.monotonic()), 1) if retry_at is not None else None
+                ),
+                "activation": self._activations.get(name)
+            }
+        return report
@@ -0,0 +1,176 @@
+"""
+Prediction result cache keyed by upload content hash and model version
+Local bounded LRU with an optional shared Redis tier
+"""
+
+import copy
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis is optional; without it the cache is process-local only
+HAS_REDIS = False
+try:
+    import redis.asyncio as aioredis
+    HAS_REDIS = True
+except ImportError:
+    aioredis = None
+
+
+class PredictionCache:
+    """
+    Two-tier cache for prediction results
+
+    Keys combine the SHA-256 of the uploaded bytes with the model version,
+    so activating a new model naturally invalidates old results. The local
+    tier is an LRU bounded by entry count; the Redis tier (if enabled) is
+    shared between workers and expires entries after a TTL. Redis errors
+    are logged and treated as misses, never as request failures.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        redis_url: Optional[str] = None,
+        ttl_seconds: int = 86400,
+        namespace: str = "curagenie:prediction"
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum entries in the local LRU (0 disables it)
+            redis_url: Redis URL for the shared tier, or None to disable it
+            ttl_seconds: Expiry of Redis entries
+            namespace: Prefix for Redis keys
+        """
+        self.max_entries = max(0, max_entries)
+        self.redis_url = redis_url if HAS_REDIS else None
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self._local: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def make_key(kind: str, content_hash: str, model_version: str) -> str:
+        """Cache key for a prediction kind, content hash and model version"""
+        return f"{kind}:{model_version}:{content_hash}"
+
+    def _get_redis(self):
+        if self.redis_url is None:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(self.redis_url)
+        return self._redis
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._local.get(key)
+            if value is None:
+                return None
+            self._local.move_to_end(key)
+        # Callers may mutate results (e.g. add analysis fields), so never share them
+        return copy.deepcopy(value)
+
+    def _set_local(self, key: str, value: Dict[str, Any]):
+        if self.max_entries == 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._local[key] = value
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    async def get(
+        self,
+        kind: str,
+        content_hash: str,
+        model_version: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result
+
+        Args:
+            kind: Prediction kind, e.g. "brain_tumor"
+            content_hash: Hex SHA-256 of the uploaded bytes
+            model_version: Version of the model that would score the upload
+
+        Returns:
+            The cached result, or None on a miss
+        """
+        key = self.make_key(kind, content_hash, model_version)
+        value = self._get_local(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = await client.get(f"{self.namespace}:{key}")
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Prediction cache Redis lookup failed: {e}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self._set_local(key, value)
+                self.hits += 1
+                self.redis_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(
+        self,
+        kind: str,
+        content_hash: str,
+        model_version: str,
+        value: Dict[str, Any]
+    ):
+        """Store a JSON-serializable result in both tiers"""
+        key = self.make_key(kind, content_hash, model_version)
+        self._set_local(key, value)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                await client.set(f"{self.namespace}:{key}", json.dumps(value), ex=self.ttl_seconds)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Prediction cache Redis store failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and local occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "local_entries": len(self._local),
+            "max_local_entries": self.max_entries,
+            "redis_enabled": self.redis_url is not None,
+            "redis_errors": self.redis_errors
+        }
+
+
+# Global prediction cache instance
+prediction_cache = PredictionCache(
+    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL if settings.PREDICTION_CACHE_REDIS_ENABLED else None,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS
+)
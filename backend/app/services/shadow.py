@@ -0,0 +1,248 @@
+"""
+Shadow model evaluation on live traffic
+Scores copies of production inputs with a candidate model version after the
+primary response is sent, and tracks agreement and latency per version
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services.model_registry import LoadedModel, ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+# A scorer takes the shadow model entry and one input, and returns the
+# positive-class confidence
+ShadowScorer = Callable[[LoadedModel, Any], float]
+
+
+def _lower_thread_priority():
+    """Run shadow work at the lowest OS scheduling priority where supported"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter"""
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class ShadowComparison:
+    """Agreement and latency of one shadow version against one primary version"""
+
+    def __init__(self, window: int = 1024):
+        self.requests = 0
+        self.agreements = 0
+        self.abs_confidence_diff_sum = 0.0
+        self.latencies_ms: deque = deque(maxlen=window)
+
+    def record(self, agree: bool, confidence_diff: float, latency_ms: float):
+        self.requests += 1
+        self.agreements += int(agree)
+        self.abs_confidence_diff_sum += abs(confidence_diff)
+        self.latencies_ms.append(latency_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = np.asarray(self.latencies_ms) if self.latencies_ms else None
+        return {
+            "requests": self.requests,
+            "agreements": self.agreements,
+            "disagreements": self.requests - self.agreements,
+            "agreement_rate": self.agreements / self.requests if self.requests else None,
+            "mean_abs_confidence_diff": (
+                self.abs_confidence_diff_sum / self.requests if self.requests else None
+            ),
+            "latency_ms_p50": float(np.percentile(latencies, 50)) if latencies is not None else None,
+            "latency_ms_p95": float(np.percentile(latencies, 95)) if latencies is not None else None
+        }
+
+
+class ShadowEvaluator:
+    """
+    Runs candidate model versions next to the primary ones
+
+    Shadow models live in their own ``ModelRegistry`` and run on a separate
+    single-thread, lowest-priority executor, so they never take inference
+    threads from live requests. Submissions beyond the rate limit, or while
+    ``max_pending`` jobs are outstanding, are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        scorers: Dict[str, ShadowScorer],
+        max_per_second: float = 5.0,
+        burst: int = 10,
+        max_pending: int = 32
+    ):
+        """
+        Initialize the evaluator
+
+        Args:
+            registry: Registry holding the shadow models
+            scorers: Scoring callable per model name
+            max_per_second: Shadow evaluations allowed per second
+            burst: Evaluations allowed in a burst above the rate
+            max_pending: Maximum queued or running evaluations
+        """
+        self.registry = registry
+        self.scorers = scorers
+        self.max_pending = max(1, max_pending)
+        self._bucket = TokenBucket(max_per_second, burst)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._comparisons: Dict[Tuple[str, str, str], ShadowComparison] = {}
+        self.dropped_rate_limited = 0
+        self.dropped_queue_full = 0
+        self.errors = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Shadow executor, created on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="shadow",
+                initializer=_lower_thread_priority
+            )
+        return self._executor
+
+    def configure(self, name: str, version: str):
+        """
+        Load and warm up a shadow version (blocking)
+
+        Raises:
+            ValueError: If the version cannot be loaded
+        """
+        self.registry.activate(name, version)
+        logger.info(f"Shadowing {name} with version {version}")
+
+    def clear(self, name: str):
+        """Stop shadowing ``name`` and release its shadow model"""
+        self.registry.unload(name)
+
+    def shadow_version(self, name: str) -> Optional[str]:
+        """Version currently shadowing ``name``, if any"""
+        return self.registry.active_version(name)
+
+    def submit(
+        self,
+        name: str,
+        payload: Any,
+        primary_confidence: float,
+        primary_version: str
+    ):
+        """
+        Queue a shadow evaluation of one input
+
+        Meant to run as a background task after the primary response is
+        sent. Returns immediately; does nothing if no shadow is configured.
+
+        Args:
+            name: Model name
+            payload: Input passed to the shadow scorer
+            primary_confidence: Primary model's confidence on this same input,
+                without test-time augmentation
+            primary_version: Primary model version that produced it
+        """
+        entry = self.registry.loaded(name)
+        if entry is None or name not in self.scorers:
+            return
+        if not self._bucket.try_acquire():
+            self.dropped_rate_limited += 1
+            return
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped_queue_full += 1
+                return
+            self._pending += 1
+        try:
+            self.executor.submit(self._evaluate, name, entry, payload, primary_confidence, primary_version)
+        except Exception as e:
+            # _evaluate never runs, so release its slot here
+            with self._lock:
+                self._pending -= 1
+            self.errors += 1
+            logger.warning(f"Could not queue shadow evaluation of {name}: {e}")
+
+    def _evaluate(
+        self,
+        name: str,
+        entry: LoadedModel,
+        payload: Any,
+        primary_confidence: float,
+        primary_version: str
+    ):
+        try:
+            started = time.perf_counter()
+            confidence = self.scorers[name](entry, payload)
+            latency_ms = (time.perf_counter() - started) * 1000
+
+            key = (name, entry.version, primary_version)
+            with self._lock:
+                comparison = self._comparisons.setdefault(key, ShadowComparison())
+                comparison.record(
+                    (confidence > 0.5) == (primary_confidence > 0.5),
+                    confidence - primary_confidence,
+                    latency_ms
+                )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shadow evaluation of {name} {entry.version} failed: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def report(self) -> Dict[str, Any]:
+        """Per-version comparison statistics and drop counters"""
+        with self._lock:
+            comparisons = [
+                {"model": name, "shadow_version": shadow, "primary_version": primary, **comparison.snapshot()}
+                for (name, shadow, primary), comparison in self._comparisons.items()
+            ]
+        return {
+            "shadow_versions": {name: self.shadow_version(name) for name in self.registry.names},
+            "comparisons": comparisons,
+            "pending": self._pending,
+            "dropped_rate_limited": self.dropped_rate_limited,
+            "dropped_queue_full": self.dropped_queue_full,
+            "errors": self.errors
+        }
+
+    def shutdown(self):
+        """Shut down the shadow executor, dropping queued evaluations"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
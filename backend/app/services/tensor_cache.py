@@ -0,0 +1,163 @@
+"""
+Disk-backed cache for preprocessed image tensors
+Stores normalized model inputs as .npy files and reads them back memory-mapped
+"""
+
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Eviction trims the cache to this fraction of its limit, so it does not run on every write
+EVICTION_TARGET_FRACTION = 0.9
+
+
+class PreprocessedTensorCache:
+    """
+    Content-addressed store of preprocessed tensors
+
+    Entries are keyed by the SHA-256 of the source bytes plus a fingerprint
+    of the preprocessing parameters, so changing the pipeline never serves
+    stale tensors. Files are written atomically and loaded with
+    ``np.load(mmap_mode='r')``. Reads refresh an entry's modification
+    time; once the total size exceeds ``max_bytes``, the least recently
+    used files are deleted.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        """
+        Initialize the cache
+
+        Args:
+            directory: Directory holding the .npy files (created if missing)
+            max_bytes: Maximum total size of cached files
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def __getstate__(self):
+        # Copies sent to process-pool workers get their own lock and size count
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_total_bytes"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, content_hash: str, fingerprint: str) -> Path:
+        # Two-character fan-out keeps directories small
+        return self.directory / content_hash[:2] / f"{content_hash}-{fingerprint}.npy"
+
+    def _scan(self) -> List[Tuple[float, int, Path]]:
+        """(mtime, size, path) for every cached file"""
+        entries = []
+        for path in self.directory.glob("*/*.npy"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _ensure_total(self):
+        """Initialize the size counter from disk on first use; caller holds the lock"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    def get(self, content_hash: str, fingerprint: str) -> Optional[np.ndarray]:
+        """
+        Load a cached tensor as a read-only memory map
+
+        Args:
+            content_hash: Hex SHA-256 of the source bytes
+            fingerprint: Preprocessing parameter fingerprint
+
+        Returns:
+            The memory-mapped array, or None on a miss
+        """
+        path = self._path(content_hash, fingerprint)
+        try:
+            array = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return array
+
+    def put(self, content_hash: str, fingerprint: str, array: np.ndarray):
+        """
+        Store a tensor, evicting old entries if the cache is over its limit
+
+        Write failures are logged and ignored; the cache is an optimization.
+        """
+        if self.max_bytes <= 0:
+            return
+        path = self._path(content_hash, fingerprint)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+            # Atomic so concurrent readers never map a partial file
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError as e:
+            logger.warning(f"Could not write preprocessed tensor {path.name}: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._ensure_total()
+            self._total_bytes += size
+            self.writes += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used files down to the target size; caller holds the lock"""
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * EVICTION_TARGET_FRACTION)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                # Open memory maps of an unlinked file stay valid
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and disk usage"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "directory": str(self.directory)
+        }
@@ -0,0 +1,175 @@
+"""
+Streaming upload reader
+Enforces the size limit, hashes and sniffs the file type in a single pass
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+# Bytes read from the upload per iteration
+CHUNK_SIZE = 1024 * 1024
+
+# Bytes needed to recognize every supported signature (NIfTI-1 magic ends at 348)
+SNIFF_BYTES = 352
+
+
+class UploadTooLarge(Exception):
+    """Raised as soon as an upload crosses its size limit"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"Upload exceeds {limit // (1024 * 1024)}MB limit")
+
+
+class UploadReadResult:
+    """Upload with its content hash and sniffed type
+
+    ``data`` holds the bytes for buffered reads and is None for uploads
+    streamed to disk by ``save_upload``.
+    """
+
+    def __init__(
+        self,
+        data: Optional[bytearray],
+        sha256: str,
+        detected_type: Optional[str],
+        size: Optional[int] = None
+    ):
+        self.data = data
+        self.sha256 = sha256
+        self.detected_type = detected_type
+        self._size = size
+
+    @property
+    def size(self) -> int:
+        return len(self.data) if self.data is not None else self._size
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """
+    Identify a file from its leading bytes
+
+    Args:
+        head: At least the first ``SNIFF_BYTES`` bytes (fewer if the file is shorter)
+
+    Returns:
+        A MIME type, or None if the signature is not recognized
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[128:132] == b"DICM":
+        return "application/dicom"
+    if len(head) >= 348 and head[344:348] in (b"n+1\x00", b"ni1\x00"):
+        return "application/x-nifti"
+    if head[4:8] in (b"n+2\x00", b"ni2\x00"):
+        return "application/x-nifti"
+    if head.startswith(b"\x1f\x8b"):
+        return "application/gzip"
+    if head.startswith(b"PK\x03\x04"):
+        return "application/zip"
+    return None
+
+
+async def read_upload(
+    file: UploadFile,
+    max_size: int,
+    chunk_size: int = CHUNK_SIZE
+) -> UploadReadResult:
+    """
+    Read an upload in chunks, hashing and sniffing it as it streams
+
+    Reading stops as soon as the limit is crossed, so an oversized upload
+    never gets buffered in full.
+
+    Args:
+        file: Uploaded file
+        max_size: Maximum allowed size in bytes
+        chunk_size: Bytes read per iteration
+
+    Returns:
+        The buffered upload with its SHA-256 and sniffed type
+
+    Raises:
+        UploadTooLarge: If the upload is larger than ``max_size``
+    """
+    data = bytearray()
+    digest = hashlib.sha256()
+    detected_type = None
+    sniffed = False
+
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        if len(data) + len(chunk) > max_size:
+            raise UploadTooLarge(max_size)
+
+        data += chunk
+        digest.update(chunk)
+        if not sniffed and len(data) >= SNIFF_BYTES:
+            detected_type = sniff_content_type(bytes(data[:SNIFF_BYTES]))
+            sniffed = True
+
+    if not sniffed:
+        detected_type = sniff_content_type(bytes(data))
+
+    return UploadReadResult(data, digest.hexdigest(), detected_type)
+
+
+async def save_upload(
+    file: UploadFile,
+    destination: Path,
+    max_size: int,
+    chunk_size: int = CHUNK_SIZE
+) -> UploadReadResult:
+    """
+    Stream an upload to disk, hashing and sniffing it on the way
+
+    Used for study volumes that are too large to buffer. At most one chunk
+    is held in memory; a partial file is removed if the limit is crossed.
+
+    Args:
+        file: Uploaded file
+        destination: Path to write the upload to
+        max_size: Maximum allowed size in bytes
+        chunk_size: Bytes read per iteration
+
+    Returns:
+        The upload's size, SHA-256 and sniffed type (``data`` is None)
+
+    Raises:
+        UploadTooLarge: If the upload is larger than ``max_size``
+    """
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+
+    try:
+        with open(destination, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(max_size)
+
+                digest.update(chunk)
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        try:
+            os.remove(destination)
+        except OSError:
+            pass
+        raise
+
+    return UploadReadResult(None, digest.hexdigest(), sniff_content_type(head), size=size)
@@ -0,0 +1,474 @@
+"""
+Volume loader for DICOM series and NIfTI files
+Memory-maps NIfTI data and reads DICOM pixel data only for the slices requested,
+so large studies are never fully materialized in RAM
+"""
+
+import contextlib
+import logging
+import os
+import zipfile
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# nibabel and pydicom are optional; without them the matching formats are rejected
+HAS_NIBABEL = False
+try:
+    import nibabel
+    HAS_NIBABEL = True
+except ImportError:
+    nibabel = None
+
+HAS_PYDICOM = False
+try:
+    import pydicom
+    from pydicom.errors import InvalidDicomError
+    HAS_PYDICOM = True
+except ImportError:
+    pydicom = None
+    InvalidDicomError = Exception
+
+# pydicom 3 can decode a single frame without decoding the whole pixel data element
+try:
+    from pydicom.pixels import pixel_array as _read_pixel_array
+except ImportError:
+    _read_pixel_array = None
+
+NIFTI_EXTENSIONS = (".nii", ".nii.gz")
+DICOM_EXTENSIONS = (".dcm",)
+VOLUME_EXTENSIONS = NIFTI_EXTENSIONS + DICOM_EXTENSIONS
+
+# Percentiles used for the automatic window when none is given or stored
+AUTO_WINDOW_PERCENTILES = (1.0, 99.0)
+
+# Limits on the uncompressed size of zipped series, checked against the
+# sizes declared in the archive (zipfile never inflates a member past its
+# declared size), so a small upload cannot expand without bound
+ZIP_MAX_MEMBER_BYTES = 512 * 1024 * 1024
+ZIP_MAX_TOTAL_BYTES = 4 * 1024 * 1024 * 1024
+ZIP_MAX_MEMBERS = 10000
+
+
+def is_volume_path(path: str) -> bool:
+    """True if ``path`` names a NIfTI file, DICOM file or DICOM directory"""
+    lower = str(path).lower()
+    return os.path.isdir(path) or lower.endswith(VOLUME_EXTENSIONS)
+
+
+def apply_window(
+    pixels: np.ndarray,
+    center: Optional[float] = None,
+    width: Optional[float] = None
+) -> np.ndarray:
+    """
+    Map raw intensities to 8-bit gray levels through a window
+
+    Args:
+        pixels: 2D array of raw (rescaled) intensities
+        center: Window center; derived from the slice percentiles if omitted
+        width: Window width; derived from the slice percentiles if omitted
+
+    Returns:
+        uint8 array of the same shape
+    """
+    pixels = np.asarray(pixels, dtype=np.float32)
+    if center is None or width is None:
+        low, high = np.percentile(pixels, AUTO_WINDOW_PERCENTILES)
+    else:
+        low = center - width / 2.0
+        high = center + width / 2.0
+
+    if high <= low:
+        return np.zeros(pixels.shape, dtype=np.uint8)
+
+    scaled = (pixels - low) * (255.0 / (high - low))
+    return np.clip(scaled, 0.0, 255.0).astype(np.uint8)
+
+
+def select_slice_indices(
+    num_slices: int,
+    max_slices: Optional[int] = None,
+    start_fraction: float = 0.0,
+    end_fraction: float = 1.0
+) -> List[int]:
+    """
+    Choose evenly spaced slice indices from a range of the volume
+
+    Args:
+        num_slices: Number of slices in the volume
+        max_slices: Maximum number of indices to return (all if None)
+        start_fraction: Start of the range as a fraction of the volume
+        end_fraction: End of the range as a fraction of the volume
+
+    Returns:
+        Sorted, unique slice indices
+    """
+    start = min(num_slices - 1, max(0, int(num_slices * start_fraction)))
+    end = max(start + 1, min(num_slices, int(round(num_slices * end_fraction))))
+    count = end - start
+    if max_slices is None or max_slices >= count:
+        return list(range(start, end))
+    if max_slices <= 0:
+        return []
+    return sorted(set(np.linspace(start, end - 1, max_slices).round().astype(int).tolist()))
+
+
+class MedicalVolume(ABC):
+    """
+    A stack of 2D slices read on demand
+
+    Subclasses implement ``get_slice``; nothing is decoded until a slice
+    is requested.
+    """
+
+    num_slices: int = 0
+    slice_shape: Tuple[int, int] = (0, 0)
+
+    @abstractmethod
+    def get_slice(self, index: int) -> np.ndarray:
+        """Raw intensities of one slice as a 2D float32 array"""
+
+    @property
+    def default_window(self) -> Optional[Tuple[float, float]]:
+        """(center, width) stored with the study, if any"""
+        return None
+
+    @property
+    def inverted(self) -> bool:
+        """True if higher values should be displayed darker"""
+        return False
+
+    def windowed_slice(
+        self,
+        index: int,
+        center: Optional[float] = None,
+        width: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Read one slice and window it to uint8
+
+        Args:
+            index: Slice index
+            center: Window center (stored or automatic window if omitted)
+            width: Window width (stored or automatic window if omitted)
+
+        Returns:
+            2D uint8 array
+        """
+        if (center is None or width is None) and self.default_window is not None:
+            center, width = self.default_window
+        windowed = apply_window(self.get_slice(index), center, width)
+        return 255 - windowed if self.inverted else windowed
+
+    def estimate_window(
+        self,
+        indices: Optional[Sequence[int]] = None,
+        sample_slices: int = 8
+    ) -> Tuple[float, float]:
+        """
+        Estimate one (center, width) window for a set of slices
+
+        Windowing every slice by its own percentiles erases intensity
+        differences between slices; this reads a few evenly spaced slices
+        and derives a shared window from their pooled percentiles.
+
+        Args:
+            indices: Slices the window should cover (all slices if None)
+            sample_slices: Maximum number of slices read for the estimate
+
+        Returns:
+            (center, width)
+        """
+        indices = list(range(self.num_slices) if indices is None else indices)
+        step = max(1, len(indices) // max(1, sample_slices))
+        samples = [self.get_slice(index)[::4, ::4].ravel() for index in indices[::step][:sample_slices]]
+        low, high = np.percentile(np.concatenate(samples), AUTO_WINDOW_PERCENTILES)
+        return float((low + high) / 2.0), float(max(high - low, 1e-6))
+
+    def iter_slices(
+        self,
+        indices: Optional[Sequence[int]] = None,
+        center: Optional[float] = None,
+        width: Optional[float] = None
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (index, windowed slice) pairs, one slice in memory at a time"""
+        for index in (range(self.num_slices) if indices is None else indices):
+            yield index, self.windowed_slice(index, center, width)
+
+    def _check_index(self, index: int):
+        if not 0 <= index < self.num_slices:
+            raise IndexError(f"Slice {index} out of range for {self.num_slices} slices")
+
+    def metadata(self) -> Dict[str, Any]:
+        """Summary of the volume for logging and API responses"""
+        return {
+            "format": type(self).__name__,
+            "num_slices": self.num_slices,
+            "slice_shape": list(self.slice_shape),
+            "default_window": list(self.default_window) if self.default_window else None
+        }
+
+
+class NiftiVolume(MedicalVolume):
+    """
+    NIfTI volume backed by a memory map
+
+    Uncompressed ``.nii`` files are memory-mapped, so reading a slice only
+    touches the pages holding it. ``.nii.gz`` cannot be mapped; nibabel then
+    streams the gzip up to the requested slice instead of inflating it all.
+    """
+
+    def __init__(self, path: str, slice_axis: int = 2):
+        """
+        Open a NIfTI file without reading its data
+
+        Args:
+            path: Path to a .nii or .nii.gz file
+            slice_axis: Spatial axis (0-2) to slice along; 2 is axial for RAS data
+        """
+        if not HAS_NIBABEL:
+            raise RuntimeError("nibabel is not installed; NIfTI volumes are unavailable")
+
+        image = nibabel.load(path, mmap=True)
+        if len(image.shape) < 3:
+            raise ValueError(f"Expected a 3D NIfTI volume, got shape {image.shape}")
+
+        self.path = path
+        self.slice_axis = slice_axis
+        self._proxy = image.dataobj
+        self._extra_dims = len(image.shape) - 3
+        spatial = list(image.shape[:3])
+        self.num_slices = spatial.pop(slice_axis)
+        self.slice_shape = tuple(spatial)
+        self.voxel_size = tuple(float(v) for v in image.header.get_zooms()[:3])
+
+    def get_slice(self, index: int) -> np.ndarray:
+        self._check_index(index)
+        slicer: List[Any] = [slice(None)] * 3
+        slicer[self.slice_axis] = index
+        # 4D series (e.g. fMRI, DWI): use the first volume
+        slicer.extend([0] * self._extra_dims)
+        # ArrayProxy slicing reads only this slice and applies scl_slope/scl_inter
+        return np.asarray(self._proxy[tuple(slicer)], dtype=np.float32)
+
+    def metadata(self) -> Dict[str, Any]:
+        data = super().metadata()
+        data["voxel_size"] = list(self.voxel_size)
+        return data
+
+
+class _DicomSlice:
+    """Location of one DICOM frame plus the header fields needed to decode it"""
+
+    def __init__(self, source: Any, frame: Optional[int], header: Any):
+        self.source = source
+        self.frame = frame
+        self.slope = float(getattr(header, "RescaleSlope", 1) or 1)
+        self.intercept = float(getattr(header, "RescaleIntercept", 0) or 0)
+        self.instance_number = int(getattr(header, "InstanceNumber", 0) or 0)
+        self.position = _slice_position(header)
+
+
+def _first_value(value: Any) -> Optional[float]:
+    """First entry of a possibly multi-valued DICOM element"""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)) or type(value).__name__ == "MultiValue":
+        value = value[0] if len(value) else None
+    return float(value) if value is not None else None
+
+
+def _slice_position(header: Any) -> Optional[float]:
+    """Distance of a slice along its normal, from ImagePositionPatient"""
+    position = getattr(header, "ImagePositionPatient", None)
+    orientation = getattr(header, "ImageOrientationPatient", None)
+    if position is None:
+        return None
+    if orientation is None or len(orientation) != 6:
+        return float(position[2])
+    normal = np.cross(np.asarray(orientation[:3], float), np.asarray(orientation[3:], float))
+    return float(np.dot(normal, np.asarray(position, float)))
+
+
+class DicomSeries(MedicalVolume):
+    """
+    DICOM series read lazily
+
+    Only headers are parsed up front (``stop_before_pixels``); a slice's
+    pixel data is read from its file when the slice is requested. Slices are
+    ordered by position along the slice normal, falling back to
+    InstanceNumber. Multi-frame files contribute one slice per frame.
+    """
+
+    def __init__(self, sources: Sequence[Any]):
+        """
+        Index a DICOM series from its files
+
+        Args:
+            sources: File paths, or (zip_path, member) tuples for zipped series.
+                Files that are not DICOM are skipped.
+        """
+        if not HAS_PYDICOM:
+            raise RuntimeError("pydicom is not installed; DICOM series are unavailable")
+
+        slices: List[_DicomSlice] = []
+        reference = None
+        for source in sources:
+            try:
+                with self._open(source) as f:
+                    header = pydicom.dcmread(f, stop_before_pixels=True)
+            except (InvalidDicomError, OSError, zipfile.BadZipFile) as e:
+                logger.debug(f"Skipping non-DICOM file {source}: {e}")
+                continue
+            if "Rows" not in header or "Columns" not in header:
+                continue
+
+            if reference is None:
+                reference = header
+            frames = int(getattr(header, "NumberOfFrames", 1) or 1)
+            if frames > 1:
+                slices.extend(_DicomSlice(source, frame, header) for frame in range(frames))
+            else:
+                slices.append(_DicomSlice(source, None, header))
+
+        if reference is None:
+            raise ValueError("No DICOM images found")
+
+        if all(s.position is not None for s in slices) and len({s.position for s in slices}) == len(slices):
+            slices.sort(key=lambda s: s.position)
+        else:
+            slices.sort(key=lambda s: (s.instance_number, s.frame or 0))
+
+        self._slices = slices
+        self.num_slices = len(slices)
+        self.slice_shape = (int(reference.Rows), int(reference.Columns))
+        self.modality = getattr(reference, "Modality", None)
+        self.series_description = getattr(reference, "SeriesDescription", None)
+        self._inverted = getattr(reference, "PhotometricInterpretation", "") == "MONOCHROME1"
+        center = _first_value(getattr(reference, "WindowCenter", None))
+        width = _first_value(getattr(reference, "WindowWidth", None))
+        self._default_window = (center, width) if center is not None and width else None
+
+    @classmethod
+    def from_directory(cls, directory: str) -> "DicomSeries":
+        """Index every file below ``directory`` (DICOM files often lack an extension)"""
+        paths = []
+        for root, _, files in os.walk(directory):
+            paths.extend(os.path.join(root, name) for name in sorted(files))
+        return cls(paths)
+
+    @classmethod
+    def from_zip(
+        cls,
+        zip_path: str,
+        max_member_bytes: int = ZIP_MAX_MEMBER_BYTES,
+        max_total_bytes: int = ZIP_MAX_TOTAL_BYTES,
+        max_members: int = ZIP_MAX_MEMBERS
+    ) -> "DicomSeries":
+        """
+        Index the members of a zipped series; members are read on demand
+
+        Raises:
+            ValueError: If the archive exceeds the member count or the
+                uncompressed size limits
+        """
+        with zipfile.ZipFile(zip_path) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+        if len(members) > max_members:
+            raise ValueError(f"Zipped series has {len(members)} files; the limit is {max_members}")
+        total = 0
+        for info in members:
+            if info.file_size > max_member_bytes:
+                raise ValueError(
+                    f"{info.filename} is {info.file_size} bytes uncompressed; "
+                    f"the limit per file is {max_member_bytes}"
+                )
+            total += info.file_size
+        if total > max_total_bytes:
+            raise ValueError(
+                f"Zipped series is {total} bytes uncompressed; the limit is {max_total_bytes}"
+            )
+        return cls([(zip_path, info.filename) for info in members])
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _open(source: Any):
+        if isinstance(source, tuple):
+            zip_path, member = source
+            # Members are streamed: header reads stop before the pixel data,
+            # and a member is only inflated fully when its slice is requested
+            with zipfile.ZipFile(zip_path) as archive, archive.open(member) as f:
+                yield f
+        else:
+            with open(source, "rb") as f:
+                yield f
+
+    @property
+    def default_window(self) -> Optional[Tuple[float, float]]:
+        return self._default_window
+
+    @property
+    def inverted(self) -> bool:
+        return self._inverted
+
+    def get_slice(self, index: int) -> np.ndarray:
+        self._check_index(index)
+        item = self._slices[index]
+        with self._open(item.source) as f:
+            if _read_pixel_array is not None:
+                pixels = _read_pixel_array(f, index=item.frame)
+            else:
+                pixels = pydicom.dcmread(f).pixel_array
+                if item.frame is not None:
+                    pixels = pixels[item.frame]
+
+        pixels = pixels.astype(np.float32)
+        if pixels.ndim == 3:
+            # Color DICOM: collapse to luminance
+            pixels = pixels.mean(axis=-1)
+        return pixels * item.slope + item.intercept
+
+    def metadata(self) -> Dict[str, Any]:
+        data = super().metadata()
+        data["modality"] = self.modality
+        data["series_description"] = self.series_description
+        return data
+
+
+def load_volume(path: str, slice_axis: int = 2) -> MedicalVolume:
+    """
+    Open a medical volume without reading its pixel data
+
+    Args:
+        path: NIfTI file, DICOM file, directory of DICOM files or zip of a series
+        slice_axis: Slicing axis for NIfTI volumes
+
+    Returns:
+        The opened volume
+
+    Raises:
+        ValueError: If the format is not recognized
+    """
+    lower = str(path).lower()
+    if os.path.isdir(path):
+        return DicomSeries.from_directory(path)
+    if lower.endswith(NIFTI_EXTENSIONS):
+        return NiftiVolume(path, slice_axis=slice_axis)
+    if lower.endswith(".zip") or zipfile.is_zipfile(path):
+        return DicomSeries.from_zip(path)
+    if lower.endswith(DICOM_EXTENSIONS):
+        return DicomSeries([path])
+
+    # Sniff files uploaded without a meaningful extension
+    from app.services.upload_reader import SNIFF_BYTES, sniff_content_type
+    with open(path, "rb") as f:
+        detected = sniff_content_type(f.read(SNIFF_BYTES))
+    if detected == "application/dicom":
+        return DicomSeries([path])
+    if detected in ("application/x-nifti", "application/gzip"):
+        return NiftiVolume(path, slice_axis=slice_axis)
+    raise ValueError(f"Unrecognized volume format: {path}")
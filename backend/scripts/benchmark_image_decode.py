@@ -0,0 +1,77 @@
+"""
+Benchmark full versus reduced-resolution JPEG decoding in ImagePreprocessor
+
+Run from the backend directory:
+
+    python -m scripts.benchmark_image_decode [--repeat 5] [--quality 90]
+
+For each source size, a synthetic MRI-like JPEG is preprocessed with and
+without reduced decoding. The script reports the median time, the size of
+the decoded image (which bounds peak memory), and the largest difference
+in the preprocessed 240x240 output.
+"""
+
+import argparse
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from app.services.image_preprocessing import ImagePreprocessor
+
+SOURCE_SIZES = [(512, 512), (1024, 768), (2048, 1536), (4032, 3024), (6000, 4000)]
+
+
+def synthetic_jpeg(width: int, height: int, quality: int) -> bytes:
+    """Smooth radial structure with noise, roughly like an MRI photo"""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    radius = np.hypot(x - width / 2, y - height / 2) / (min(width, height) / 2)
+    base = np.clip(200 * (1 - radius) + 30 * np.sin(radius * 25), 0, 255)
+    noise = np.random.default_rng(0).normal(0, 8, base.shape)
+    gray = np.clip(base + noise, 0, 255).astype(np.uint8)
+    image = cv2.merge([gray, gray, gray])
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+def median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quality", type=int, default=90)
+    args = parser.parse_args()
+
+    full = ImagePreprocessor(reduced_decode=False)
+    reduced = ImagePreprocessor(reduced_decode=True)
+
+    print(
+        f"{'source':>11} {'jpeg KB':>8} {'full ms':>8} {'reduced ms':>10} {'speedup':>8} "
+        f"{'full MB':>8} {'reduced MB':>10} {'max diff':>9}"
+    )
+    for width, height in SOURCE_SIZES:
+        data = synthetic_jpeg(width, height, args.quality)
+
+        full_ms = median_ms(lambda: full.preprocess_mri_bytes(data), args.repeat)
+        reduced_ms = median_ms(lambda: reduced.preprocess_mri_bytes(data), args.repeat)
+        full_mb = full._decode_bgr(data).nbytes / (1024 * 1024)
+        reduced_mb = reduced._decode_bgr(data).nbytes / (1024 * 1024)
+        difference = float(np.abs(
+            full.preprocess_mri_bytes(data) - reduced.preprocess_mri_bytes(data)
+        ).max())
+
+        print(
+            f"{width:>5}x{height:<5} {len(data) / 1024:>8.0f} {full_ms:>8.1f} {reduced_ms:>10.1f} "
+            f"{full_ms / reduced_ms:>7.1f}x {full_mb:>8.1f} {reduced_mb:>10.1f} {difference:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
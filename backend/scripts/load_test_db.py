@@ -0,0 +1,138 @@
+"""
+Load test for database-bound API routes
+
+Run against a running server, from the backend directory:
+
+    python -m scripts.load_test_db --base-url http://localhost:8000 [--concurrency 50] [--requests 2000]
+
+Registers a throwaway patient, then keeps ``--concurrency`` requests in
+flight against database-bound routes (prediction history, health metrics,
+chat history) until ``--requests`` have completed. While that runs, a
+probe requests ``/health`` (no database access) every 50 ms; its latency
+shows how long the event loop is blocked by queries. Connection pool
+usage from ``/metrics/database`` is printed at the end.
+
+Run it once against the previous commit and once against this one with
+the same database to compare throughput before and after.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import List
+
+import httpx
+
+DB_ROUTES = [
+    "/api/v1/ml/predictions",
+    "/api/v1/health/metrics?days=30",
+    "/api/v1/chatbot/history",
+    "/api/v1/auth/me"
+]
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    email = f"loadtest-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "full_name": "Load Test", "role": "patient", "password": "loadtest"}
+    )
+    response.raise_for_status()
+    response = await client.post(
+        "/api/v1/auth/login", data={"username": email, "password": "loadtest"}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def seed(client: httpx.AsyncClient, rows: int):
+    """Give the routes something to read"""
+    for i in range(rows):
+        await client.post(
+            "/api/v1/health/metrics",
+            json={"metric_type": "heart_rate", "value": 60 + i % 40, "unit": "bpm"}
+        )
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, latencies: List[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.05)
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        client.headers["Authorization"] = f"Bearer {await login(client)}"
+        await seed(client, args.seed_rows)
+
+        latencies: List[float] = []
+        probe_latencies: List[float] = []
+        errors = 0
+        issued = 0
+
+        async def worker():
+            nonlocal errors, issued
+            while issued < args.requests:
+                route = DB_ROUTES[issued % len(DB_ROUTES)]
+                issued += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(route)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, probe_latencies))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe_task
+        pools = await client.get("/metrics/database")
+
+    print(f"requests     {len(latencies)} ({errors} errors) in {elapsed:.2f}s")
+    print(f"throughput   {len(latencies) / elapsed:.1f} req/s at concurrency {args.concurrency}")
+    print(
+        f"latency ms   p50 {statistics.median(latencies):.1f}  "
+        f"p95 {percentile(latencies, 95):.1f}  p99 {percentile(latencies, 99):.1f}"
+    )
+    print(
+        f"/health ms   p50 {statistics.median(probe_latencies):.1f}  "
+        f"p99 {percentile(probe_latencies, 99):.1f}  max {max(probe_latencies):.1f}"
+    )
+    if pools.status_code == 200:
+        for name, pool in pools.json()["engines"].items():
+            wait = pool["checkout_wait_ms"]
+            print(
+                f"{name:<5} pool   peak {pool['checked_out_peak']} checked out  "
+                f"overflow peak {pool.get('overflow_peak', 0)}  timeouts {pool['checkout_timeouts']}  "
+                f"wait ms p50 {wait['p50']:.2f} p99 {wait['p99']:.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed-rows", type=int, default=200, help="Health metrics created before the run")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
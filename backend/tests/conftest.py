@@ -0,0 +1,15 @@
+"""
+Point the application at a scratch database before any test imports it
+
+Settings and the engines are created at import time, so this has to run
+first. Set TEST_DATABASE_URL to run against another database, such as an
+empty PostgreSQL one.
+"""
+
+import os
+import tempfile
+
+_scratch = tempfile.mkdtemp(prefix="curagenie-tests-")
+
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{_scratch}/test.db"
+os.environ["DATABASE_REPLICA_URLS"] = ""
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from app.services.compiled_models import PARITY_TOLERANCE, compile_logistic_model
+
+N_FEATURES = 8
+
+
+def training_data(seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(loc=[3, 120, 70, 20, 80, 32, 0.5, 33], scale=[3, 30, 12, 10, 100, 7, 0.3, 11], size=(400, N_FEATURES))
+    # Constant column: StandardScaler leaves it with scale_ == 1
+    X[:, 3] = 20.0
+    y = (X[:, 1] + 10 * X[:, 5] > 440).astype(int)
+    return X, y
+
+
+def edge_rows(X):
+    rng = np.random.default_rng(1)
+    return np.vstack([
+        X[:50],
+        np.zeros((1, N_FEATURES)),
+        X.mean(axis=0, keepdims=True),
+        # Large magnitudes saturate the sigmoid in both directions
+        np.full((1, N_FEATURES), 1e6),
+        np.full((1, N_FEATURES), -1e6),
+        rng.normal(scale=1e4, size=(20, N_FEATURES)),
+        # Off-training values in the zero-variance column
+        np.where(np.arange(N_FEATURES) == 3, 1e3, X[0])[np.newaxis]
+    ])
+
+
+ESTIMATORS = {
+    "logistic": lambda: LogisticRegression(max_iter=5000),
+    "scaled": lambda: make_pipeline(StandardScaler(), LogisticRegression(max_iter=5000)),
+    "scaled_no_mean": lambda: make_pipeline(StandardScaler(with_mean=False), LogisticRegression(max_iter=5000)),
+    "scaled_twice": lambda: make_pipeline(StandardScaler(), StandardScaler(with_std=False), LogisticRegression(max_iter=5000))
+}
+
+
+@pytest.fixture(params=sorted(ESTIMATORS))
+def estimator(request):
+    X, y = training_data()
+    return ESTIMATORS[request.param]().fit(X, y)
+
+
+def test_matches_sklearn_predict_proba(estimator):
+    X, _ = training_data()
+    compiled = compile_logistic_model(estimator, X[:64])
+    assert compiled is not None
+
+    rows = edge_rows(X)
+    expected = estimator.predict_proba(rows)
+    proba = compiled.predict_proba(rows)
+
+    assert proba.shape == expected.shape
+    np.testing.assert_allclose(proba, expected, rtol=0, atol=PARITY_TOLERANCE)
+    assert np.all(np.isfinite(proba))
+    np.testing.assert_array_equal(compiled.predict(rows[:50]), estimator.predict(rows[:50]))
+    assert list(compiled.classes_) == list(estimator.classes_)
+
+
+def test_single_row(estimator):
+    X, _ = training_data()
+    compiled = compile_logistic_model(estimator, X[:64])
+
+    np.testing.assert_allclose(
+        compiled.predict_proba(X[:1]), estimator.predict_proba(X[:1]), rtol=0, atol=PARITY_TOLERANCE
+    )
+
+
+def test_unsupported_estimators_are_not_compiled():
+    X, y = training_data()
+    assert compile_logistic_model(make_pipeline(MinMaxScaler(), LogisticRegression()).fit(X, y), X[:64]) is None
+
+    multiclass = LogisticRegression(max_iter=5000).fit(X, np.digitize(X[:, 1], [100, 140]))
+    assert compile_logistic_model(multiclass, X[:64]) is None
+
+
+def test_feature_count_mismatch_is_not_compiled():
+    X, y = training_data()
+    model = LogisticRegression(max_iter=5000).fit(X, y)
+    assert compile_logistic_model(model, X[:64, :4]) is None
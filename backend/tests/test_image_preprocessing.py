@@ -0,0 +1,50 @@
+import hashlib
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.image_preprocessing import ImagePreprocessor
+from app.services.tensor_cache import PreprocessedTensorCache
+
+
+@pytest.fixture
+def mri_bytes():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size=(320, 300, 3), dtype=np.uint8)
+    ok, encoded = cv2.imencode(".png", image)
+    assert ok
+    return encoded.tobytes()
+
+
+def test_bound_method_pickles_after_use(mri_bytes):
+    preprocessor = ImagePreprocessor()
+    # Populate the per-thread CLAHE instance and scratch buffers first
+    expected = preprocessor.preprocess_mri_bytes(mri_bytes)
+
+    method = pickle.loads(pickle.dumps(preprocessor.preprocess_mri_bytes))
+
+    np.testing.assert_array_equal(method(mri_bytes), expected)
+
+
+def test_pickles_with_tensor_cache(tmp_path, mri_bytes):
+    preprocessor = ImagePreprocessor(tensor_cache=PreprocessedTensorCache(tmp_path, 10_000_000))
+    content_hash = hashlib.sha256(mri_bytes).hexdigest()
+    expected = preprocessor.preprocess_mri_bytes(mri_bytes, content_hash)
+
+    copy = pickle.loads(pickle.dumps(preprocessor))
+
+    assert copy.tensor_cache.directory == tmp_path
+    np.testing.assert_array_equal(copy.preprocess_mri_bytes(mri_bytes, content_hash), expected)
+
+
+def test_runs_in_process_pool(mri_bytes):
+    preprocessor = ImagePreprocessor()
+    expected = preprocessor.preprocess_mri_bytes(mri_bytes)
+
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        result = pool.submit(preprocessor.preprocess_mri_bytes, mri_bytes).result(timeout=60)
+
+    np.testing.assert_array_equal(result, expected)
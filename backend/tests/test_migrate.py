@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.cli import migrate as migrate_cli
+from app.core.config import settings
+from app.core.database import Base
+
+# Tables added after the create_all era, by later revisions
+POST_BASELINE_TABLES = ("feature_drift_windows", "prediction_rescores")
+
+
+@pytest.fixture
+def database_url(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path}/migrate.db"
+    monkeypatch.setattr(settings, "DATABASE_URL", url)
+    return url
+
+
+def create_legacy_schema(url, skip=()):
+    """Tables as the old create_all made them, without migration history"""
+    engine = create_engine(url)
+    tables = [
+        table for name, table in Base.metadata.tables.items()
+        if name not in POST_BASELINE_TABLES and name not in skip
+    ]
+    Base.metadata.create_all(bind=engine, tables=tables)
+    engine.dispose()
+
+
+def schema(url):
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        tables = set(inspect(conn).get_table_names())
+        version = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    engine.dispose()
+    return tables, version
+
+
+def test_fresh_database_gets_every_table(database_url):
+    migrate_cli.migrate()
+
+    tables, version = schema(database_url)
+    assert set(Base.metadata.tables) <= tables
+    assert version == "0003"
+
+
+def test_legacy_database_is_stamped_and_gains_new_tables(database_url):
+    create_legacy_schema(database_url)
+
+    migrate_cli.migrate()
+
+    tables, version = schema(database_url)
+    assert set(POST_BASELINE_TABLES) <= tables
+    assert version == "0003"
+
+
+def test_legacy_database_missing_baseline_tables_is_not_stamped(database_url):
+    create_legacy_schema(database_url, skip=("payments",))
+
+    with pytest.raises(RuntimeError, match="payments"):
+        migrate_cli.migrate()
+
+    engine = create_engine(database_url)
+    assert "alembic_version" not in inspect(engine).get_table_names()
+    engine.dispose()
+
+
+def test_require_tables_exits_with_migrate_hint():
+    with pytest.raises(SystemExit, match="python -m app.cli.migrate"):
+        migrate_cli.require_tables("no_such_table")
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from app.services.model_registry import FAILED, LOADED, NOT_LOADED, ModelRegistry
+
+
+class FlakyLoader:
+    """Raises for the first ``failures`` calls, then returns a model"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, version):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError(f"load failure {self.calls}")
+        return object(), "v1"
+
+
+def test_failed_load_is_retried_after_backoff(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    loader = FlakyLoader(failures=2)
+    registry = ModelRegistry(retry_seconds=5.0, retry_max_seconds=60.0)
+    registry.register("model", loader)
+
+    assert registry.get("model") is None
+    assert registry.status()["model"]["state"] == FAILED
+    assert registry.status()["model"]["retry_in_seconds"] == 5.0
+
+    # Within the backoff window no load is attempted
+    now[0] += 4.9
+    assert registry.get("model") is None
+    assert loader.calls == 1
+
+    now[0] += 0.2
+    assert registry.get("model") is None
+    assert loader.calls == 2
+    # The delay doubles after each failure
+    assert registry.status()["model"]["retry_in_seconds"] == 10.0
+
+    now[0] += 10.0
+    entry = registry.get("model")
+    assert entry is not None and entry.version == "v1"
+    status = registry.status()["model"]
+    assert status["state"] == LOADED
+    assert status["error"] is None and status["failed_attempts"] == 0 and status["retry_in_seconds"] is None
+
+
+def test_retry_delay_is_capped(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    registry = ModelRegistry(retry_seconds=5.0, retry_max_seconds=12.0)
+    registry.register("model", FlakyLoader(failures=10))
+
+    for _ in range(4):
+        registry.get("model")
+        now[0] += 100.0
+    registry.get("model")
+
+    assert registry.status()["model"]["failed_attempts"] == 5
+    assert registry.status()["model"]["retry_in_seconds"] == 12.0
+
+
+@pytest.mark.parametrize("lazy,expected", [(True, True), (False, False)])
+def test_unrequested_model_readiness(lazy, expected):
+    registry = ModelRegistry(lazy=lazy)
+    registry.register("model", FlakyLoader(failures=0))
+
+    assert registry.status()["model"]["state"] == NOT_LOADED
+    assert registry.ready is expected
+
+    registry.get("model")
+    assert registry.ready
+
+
+def test_failed_model_is_not_ready_in_lazy_mode():
+    registry = ModelRegistry(lazy=True)
+    registry.register("model", FlakyLoader(failures=1))
+
+    registry.get("model")
+
+    assert not registry.ready
@@ -0,0 +1,304 @@
+"""
+Query plans of the hot list endpoints
+
+Migrates the scratch database to head, seeds it with synthetic users and
+rows, calls each endpoint in-process and runs EXPLAIN on every SELECT it
+issues. Each hot query must be served by its composite index, and no
+endpoint may read a table with a full scan.
+
+The seeded tables are small, so on SQLite the ANALYZE statistics are
+scaled up to production-sized row counts: the planner then chooses as it
+would for real tables, whatever the seed size. On PostgreSQL (set
+TEST_DATABASE_URL) sequential scans are disabled for the EXPLAIN session,
+so a ``Seq Scan`` in the plan means no index can serve the query at all.
+"""
+
+import asyncio
+import json
+import random
+import re
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Set, Tuple
+
+import httpx
+import pytest
+from sqlalchemy import event, func, insert, select, text
+
+from app.api.v1.auth import create_access_token
+from app.cli.migrate import migrate
+from app.core.database import Base, SessionLocal, async_engine, engine
+from app.models.models import (
+    Appointment, ChatMessage, Doctor, FamilyHealthTimeline, FamilyMember,
+    HealthMetric, Patient, Prediction, User
+)
+
+PATIENTS = 20
+ROWS_PER_PATIENT = 50
+
+# sqlite_stat1 row counts are multiplied by this; per-key averages are kept,
+# which models more users each holding the seeded amount of data
+STAT_SCALE = 100_000
+
+METRIC_TYPES = ["heart_rate", "blood_pressure", "glucose", "oxygen", "temperature"]
+APPOINTMENT_STATUSES = ["scheduled", "completed", "cancelled"]
+
+# (role, path) of every endpoint whose queries are checked
+ENDPOINTS = [
+    ("patient", "/api/v1/auth/me"),
+    ("patient", "/api/v1/health/metrics?days=30"),
+    ("patient", "/api/v1/health/metrics?days=30&metric_type=glucose"),
+    ("patient", "/api/v1/health/stats?days=30"),
+    ("patient", "/api/v1/chatbot/history"),
+    ("patient", "/api/v1/chatbot/history?session_id={session_id}"),
+    ("patient", "/api/v1/telemedicine/appointments"),
+    ("patient", "/api/v1/telemedicine/appointments?status_filter=scheduled"),
+    ("patient", "/api/v1/ml/predictions"),
+    ("patient", "/api/v1/family/members"),
+    ("patient", "/api/v1/family/timeline"),
+    ("patient", "/api/v1/family/timeline?member_id={member_id}"),
+    ("doctor", "/api/v1/auth/me"),
+    ("doctor", "/api/v1/telemedicine/appointments?status_filter=scheduled")
+]
+
+# (role, path, index) the endpoint's list query must use
+HOT_QUERIES = [
+    ("patient", "/api/v1/health/metrics?days=30", "ix_health_metrics_patient_type_recorded"),
+    ("patient", "/api/v1/health/metrics?days=30&metric_type=glucose", "ix_health_metrics_patient_type_recorded"),
+    ("patient", "/api/v1/health/stats?days=30", "ix_health_metrics_patient_type_recorded"),
+    ("patient", "/api/v1/chatbot/history", "ix_chat_messages_user_session_created"),
+    ("patient", "/api/v1/chatbot/history?session_id={session_id}", "ix_chat_messages_user_session_created"),
+    ("patient", "/api/v1/telemedicine/appointments", "ix_appointments_patient_status_date"),
+    ("patient", "/api/v1/telemedicine/appointments?status_filter=scheduled", "ix_appointments_patient_status_date"),
+    ("patient", "/api/v1/ml/predictions", "ix_predictions_patient_created"),
+    ("patient", "/api/v1/family/members", "ix_family_members_primary_user_active"),
+    ("patient", "/api/v1/family/timeline", "ix_family_health_timeline_member_date"),
+    ("patient", "/api/v1/family/timeline", "ix_family_members_primary_user_active"),
+    ("patient", "/api/v1/family/timeline?member_id={member_id}", "ix_family_health_timeline_member_date"),
+    ("doctor", "/api/v1/telemedicine/appointments?status_filter=scheduled", "ix_appointments_doctor_status_date")
+]
+
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)")
+SQLITE_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+class Plan:
+    """EXPLAIN output of one captured statement"""
+
+    def __init__(self, statement: str, lines: List[str], indexes: Set[str], scans: Set[str]):
+        self.statement = statement
+        self.lines = lines
+        self.indexes = indexes
+        self.scans = scans
+
+    def __str__(self) -> str:
+        return "\n".join([" ".join(self.statement.split())] + [f"  {line}" for line in self.lines])
+
+
+def seed(patients: int, rows: int, seed_value: int = 0) -> Dict[str, str]:
+    """
+    Insert synthetic users and per-user rows for every hot table
+
+    Args:
+        patients: Number of patient users (a doctor is created per ten patients)
+        rows: Rows per patient in each of the per-user tables
+        seed_value: Seed for the generated values and identifiers
+
+    Returns:
+        Identifiers used to fill in the endpoint paths
+    """
+    rng = random.Random(seed_value)
+    now = datetime.now()
+
+    def new_id() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def past(days: int) -> datetime:
+        return now - timedelta(days=rng.uniform(0, days))
+
+    doctors = max(1, patients // 10)
+    users, patient_rows, doctor_rows = [], [], []
+    for index in range(patients + doctors):
+        user_id = new_id()
+        role = "patient" if index < patients else "doctor"
+        users.append({
+            "id": user_id, "email": f"plan-{index}@example.com", "hashed_password": "-",
+            "full_name": f"Plan {role} {index}", "role": role, "is_active": True
+        })
+        target = patient_rows if role == "patient" else doctor_rows
+        target.append({"id": new_id(), "user_id": user_id})
+
+    metrics, messages, appointments, predictions, members, events = [], [], [], [], [], []
+    for user, patient in zip(users, patient_rows):
+        sessions = [new_id() for _ in range(5)]
+        member_ids = [new_id() for _ in range(4)]
+        for member_id in member_ids:
+            members.append({
+                "id": member_id, "primary_user_id": user["id"], "full_name": "Member",
+                "relationship": "child", "date_of_birth": past(20 * 365), "is_active": True
+            })
+        for _ in range(rows):
+            metrics.append({
+                "id": new_id(), "patient_id": patient["id"],
+                "metric_type": rng.choice(METRIC_TYPES), "value": rng.uniform(60, 120),
+                "unit": "-", "is_alert": False, "recorded_at": past(90)
+            })
+            messages.append({
+                "id": new_id(), "user_id": user["id"], "role": "user",
+                "content": "-", "session_id": rng.choice(sessions), "created_at": past(90)
+            })
+            appointments.append({
+                "id": new_id(), "patient_id": patient["id"],
+                "doctor_id": rng.choice(doctor_rows)["id"], "appointment_date": past(365),
+                "status": rng.choice(APPOINTMENT_STATUSES)
+            })
+            predictions.append({
+                "id": new_id(), "patient_id": patient["id"],
+                "prediction_type": "diabetes", "input_data": {}, "result": "-",
+                "confidence_score": rng.random(), "risk_level": "low",
+                "status": "pending", "created_at": past(365)
+            })
+            events.append({
+                "id": new_id(), "family_member_id": rng.choice(member_ids),
+                "event_type": "checkup", "event_title": "-", "event_date": past(3650)
+            })
+
+    with SessionLocal() as db:
+        for model, values in (
+            (User, users), (Patient, patient_rows), (Doctor, doctor_rows),
+            (HealthMetric, metrics), (ChatMessage, messages), (Appointment, appointments),
+            (Prediction, predictions), (FamilyMember, members), (FamilyHealthTimeline, events)
+        ):
+            db.execute(insert(model), values)
+        db.commit()
+
+    return {
+        "patient": users[0]["id"],
+        "doctor": users[patients]["id"],
+        "session_id": messages[0]["session_id"],
+        "member_id": members[0]["id"]
+    }
+
+
+def analyze():
+    """Collect planner statistics, scaled to production row counts on SQLite"""
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+        if conn.dialect.name != "sqlite":
+            return
+        for table, index, stat in conn.execute(text("SELECT tbl, idx, stat FROM sqlite_stat1")).all():
+            count, _, rest = stat.partition(" ")
+            scaled = " ".join(filter(None, [str(int(count) * STAT_SCALE), rest]))
+            conn.execute(
+                text("UPDATE sqlite_stat1 SET stat = :stat WHERE tbl = :tbl AND idx IS :idx"),
+                {"stat": scaled, "tbl": table, "idx": index}
+            )
+    # Connections load sqlite_stat1 when they open
+    engine.dispose()
+
+
+async def capture_queries(ids: Dict[str, str]) -> List[Tuple[Tuple[str, str], str, Any]]:
+    """
+    Call every endpoint and collect the SELECT statements it executes
+
+    Returns:
+        ((role, path template), statement, parameters) per statement
+    """
+    from app.main import app
+
+    captured: List[Tuple[Tuple[str, str], str, Any]] = []
+    current = {"endpoint": None}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current["endpoint"] and statement.lstrip().upper().startswith("SELECT"):
+            captured.append((current["endpoint"], statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://plans") as client:
+            for role, path in ENDPOINTS:
+                token = create_access_token(data={"sub": ids[role]})
+                current["endpoint"] = (role, path)
+                response = await client.get(path.format(**ids), headers={"Authorization": f"Bearer {token}"})
+                current["endpoint"] = None
+                assert response.status_code == 200, f"GET {path} returned {response.status_code}: {response.text}"
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def _postgres_nodes(plan: Dict[str, Any]):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _postgres_nodes(child)
+
+
+async def explain(statement: str, parameters: Any) -> Plan:
+    """EXPLAIN one captured statement on the async engine's own driver"""
+    tables = set(Base.metadata.tables)
+    async with async_engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            nodes = list(_postgres_nodes(plan[0]["Plan"]))
+            lines = json.dumps(plan[0]["Plan"], indent=1).splitlines()
+            indexes = {node["Index Name"] for node in nodes if "Index Name" in node}
+            scans = {
+                node.get("Relation Name") for node in nodes
+                if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in tables
+            }
+        else:
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            lines = [row[-1] for row in result]
+            indexes = {match for line in lines for match in SQLITE_INDEX.findall(line)}
+            scans = set()
+            for line in lines:
+                match = SQLITE_SCAN.match(line)
+                if match and match.group(1) in tables:
+                    scans.add(match.group(1))
+    return Plan(statement, lines, indexes, scans)
+
+
+async def _explain_endpoints(ids: Dict[str, str]) -> Dict[Tuple[str, str], List[Plan]]:
+    plans: Dict[Tuple[str, str], List[Plan]] = {endpoint: [] for endpoint in ENDPOINTS}
+    seen = set()
+    try:
+        for endpoint, statement, parameters in await capture_queries(ids):
+            if (endpoint, statement) in seen:
+                continue
+            seen.add((endpoint, statement))
+            plans[endpoint].append(await explain(statement, parameters))
+    finally:
+        await async_engine.dispose()
+    return plans
+
+
+@pytest.fixture(scope="module")
+def plans() -> Dict[Tuple[str, str], List[Plan]]:
+    # The schema under test is the migrated one, not Base.metadata
+    migrate()
+    with SessionLocal() as db:
+        if db.scalar(select(func.count()).select_from(User)):
+            pytest.fail("Refusing to seed a database that already has users; use an empty TEST_DATABASE_URL")
+
+    ids = seed(PATIENTS, ROWS_PER_PATIENT)
+    analyze()
+    return asyncio.run(_explain_endpoints(ids))
+
+
+@pytest.mark.parametrize("role,path", ENDPOINTS)
+def test_no_full_table_scans(plans, role, path):
+    assert plans[(role, path)], "endpoint issued no SELECT statements"
+    for plan in plans[(role, path)]:
+        assert not plan.scans, f"full scan of {', '.join(sorted(plan.scans))}:\n{plan}"
+
+
+@pytest.mark.parametrize("role,path,index", HOT_QUERIES)
+def test_hot_query_uses_index(plans, role, path, index):
+    endpoint_plans = plans[(role, path)]
+    assert any(index in plan.indexes for plan in endpoint_plans), (
+        f"{index} is not used:\n" + "\n".join(str(plan) for plan in endpoint_plans)
+    )
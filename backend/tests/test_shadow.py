@@ -0,0 +1,38 @@
+from app.services.model_registry import ModelRegistry
+from app.services.shadow import ShadowEvaluator
+
+
+class RejectingExecutor:
+    def submit(self, *args, **kwargs):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+
+def make_evaluator(max_pending=1):
+    registry = ModelRegistry()
+    registry.register("model", lambda version: (object(), version or "shadow1"))
+    registry.activate("model", "shadow1")
+    return ShadowEvaluator(registry, {"model": lambda entry, payload: 0.9}, max_pending=max_pending)
+
+
+def test_rejected_submission_releases_pending_slot():
+    evaluator = make_evaluator()
+    evaluator._executor = RejectingExecutor()
+
+    evaluator.submit("model", None, 0.8, "primary1")
+    evaluator.submit("model", None, 0.8, "primary1")
+
+    assert evaluator._pending == 0
+    assert evaluator.errors == 2
+    assert evaluator.dropped_queue_full == 0
+
+
+def test_submission_records_agreement():
+    evaluator = make_evaluator()
+
+    evaluator.submit("model", None, 0.8, "primary1")
+    evaluator.executor.shutdown(wait=True)
+
+    [comparison] = evaluator.report()["comparisons"]
+    assert evaluator._pending == 0
+    assert comparison["shadow_version"] == "shadow1"
+    assert comparison["agreements"] == 1
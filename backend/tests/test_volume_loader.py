@@ -0,0 +1,87 @@
+import zipfile
+
+import numpy as np
+import pytest
+
+pydicom = pytest.importorskip("pydicom")
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+from app.services.volume_loader import DicomSeries, MedicalVolume, load_volume
+
+SLICE_SIZE = 512
+
+
+def write_dicom(path, position, value):
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds.file_meta.MediaStorageSOPClassUID = "1.2.840.10008.5.1.4.1.1.4"
+    ds.file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    ds.SOPClassUID = ds.file_meta.MediaStorageSOPClassUID
+    ds.Modality = "MR"
+    ds.Rows = ds.Columns = SLICE_SIZE
+    ds.BitsAllocated = ds.BitsStored = 16
+    ds.HighBit = 15
+    ds.PixelRepresentation = 0
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.InstanceNumber = position
+    ds.ImagePositionPatient = [0, 0, float(position)]
+    ds.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+    ds.PixelData = np.full((SLICE_SIZE, SLICE_SIZE), value, np.uint16).tobytes()
+    ds.save_as(path, enforce_file_format=True)
+
+
+@pytest.fixture
+def series_zip(tmp_path):
+    path = tmp_path / "series.zip"
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for position in (3, 1, 2):
+            dicom = tmp_path / f"slice{position}.dcm"
+            write_dicom(dicom, position, position * 100)
+            archive.write(dicom, dicom.name)
+    return path
+
+
+def test_zipped_series_reads_slices_in_position_order(series_zip):
+    volume = load_volume(str(series_zip))
+
+    assert volume.num_slices == 3
+    assert [float(volume.get_slice(i)[0, 0]) for i in range(3)] == [100.0, 200.0, 300.0]
+
+
+def test_indexing_a_zipped_series_does_not_inflate_pixel_data(series_zip, monkeypatch):
+    inflated = []
+    original_read = zipfile.ZipExtFile.read
+
+    def counting_read(self, n=-1):
+        data = original_read(self, n)
+        inflated.append(len(data))
+        return data
+
+    monkeypatch.setattr(zipfile.ZipExtFile, "read", counting_read)
+    DicomSeries.from_zip(str(series_zip))
+
+    pixel_bytes = SLICE_SIZE * SLICE_SIZE * 2
+    assert sum(inflated) < pixel_bytes
+
+
+def test_zip_member_size_limit(series_zip):
+    with pytest.raises(ValueError, match="limit per file"):
+        DicomSeries.from_zip(str(series_zip), max_member_bytes=SLICE_SIZE * SLICE_SIZE)
+
+
+def test_zip_total_size_limit(series_zip):
+    with pytest.raises(ValueError, match="uncompressed"):
+        DicomSeries.from_zip(str(series_zip), max_total_bytes=2 * SLICE_SIZE * SLICE_SIZE * 2)
+
+
+def test_zip_member_count_limit(series_zip):
+    with pytest.raises(ValueError, match="files"):
+        DicomSeries.from_zip(str(series_zip), max_members=2)
+
+
+def test_medical_volume_is_abstract():
+    with pytest.raises(TypeError):
+        MedicalVolume()
@@ -102,6 +102,8 @@ export const mlApi = {
         apiClient.uploadFile('/api/v1/ml/predict-brain-tumor', file),
     predictDiabetes: (data: any) =>
         apiClient.post('/api/v1/ml/predict-diabetes', data),
+    diabetesWhatIf: (data: any) =>
+        apiClient.post('/api/v1/ml/predict-diabetes/what-if', data),
     getPredictions: () =>
         apiClient.get('/api/v1/ml/predictions'),
     getPrediction: (id: string) =>
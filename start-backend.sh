@@ -3,5 +3,6 @@
 # Navigate to backend directory
 cd "$(dirname "$0")/backend"
 
-# Activate virtual environment and start server
+# Apply database migrations, then start the server
+./venv/bin/python -m app.cli.migrate || exit 1
 ./venv/bin/python -m uvicorn app.main:app --reload --host 0.0.0.0 --port 8000